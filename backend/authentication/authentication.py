@@ -0,0 +1,212 @@
+"""
+Token authentication shared between TenantMiddleware and DRF.
+
+The middleware resolves `Authorization: Token ...` (legacy authtoken) or
+`Authorization: Bearer ...` (signed access token) once per request and stores
+the result on the HttpRequest; the DRF authentication classes below reuse it
+instead of running the lookup a second time. Token -> user and user id ->
+user resolutions are kept in the Django cache (invalidated on User writes)
+so warm requests need no auth query at all; inactive users are rejected on
+every request in both modes.
+"""
+import logging
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+
+from .tokens import validate_access_token
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'auth_token'
+USER_CACHE_KEY_PREFIX = 'auth_user'
+
+# The password hash never leaves the database; it is left deferred on the
+# rebuilt instance and loaded on demand if anything asks for it.
+_CACHED_USER_FIELDS = [f.attname for f in User._meta.concrete_fields if f.attname != 'password']
+
+_UNRESOLVED = object()
+
+
+def _cache_key(key):
+    return f"{CACHE_KEY_PREFIX}:{key}"
+
+
+def _user_cache_key(user_id):
+    return f"{USER_CACHE_KEY_PREFIX}:{user_id}"
+
+
+def _user_state(user):
+    return [getattr(user, attname) for attname in _CACHED_USER_FIELDS]
+
+
+def _build_user(state):
+    return User.from_db('default', _CACHED_USER_FIELDS, state)
+
+
+def get_token_user(key):
+    """Return the user owning a token key, or None if the key is unknown"""
+    try:
+        state = cache.get(_cache_key(key))
+    except Exception as e:
+        logger.warning(f"Token cache unavailable: {e}")
+        state = None
+
+    if state is not None:
+        return _build_user(state)
+
+    try:
+        token = Token.objects.select_related('user').get(key=key)
+    except Token.DoesNotExist:
+        return None
+
+    try:
+        cache.set(_cache_key(key), _user_state(token.user), getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300))
+    except Exception as e:
+        logger.warning(f"Token cache unavailable: {e}")
+    return token.user
+
+
+def invalidate_token(*keys):
+    """Forget cached token -> user resolutions"""
+    keys = [_cache_key(key) for key in keys if key]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning(f"Token cache unavailable: {e}")
+
+
+def get_user(user_id):
+    """Return a user by id, or None if there is no such user"""
+    try:
+        state = cache.get(_user_cache_key(user_id))
+    except Exception as e:
+        logger.warning(f"Token cache unavailable: {e}")
+        state = None
+
+    if state is not None:
+        return _build_user(state)
+
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return None
+
+    try:
+        cache.set(_user_cache_key(user_id), _user_state(user), getattr(settings, 'AUTH_TOKEN_CACHE_TTL', 300))
+    except Exception as e:
+        logger.warning(f"Token cache unavailable: {e}")
+    return user
+
+
+def invalidate_user(*user_ids):
+    """Forget cached user id -> user resolutions"""
+    keys = [_user_cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if not keys:
+        return
+    try:
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning(f"Token cache unavailable: {e}")
+
+
+def get_request_token_key(request):
+    """Extract the key from an `Authorization: Token <key>` header, if any"""
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(auth) != 2 or auth[0] != 'Token':
+        return None
+    return auth[1]
+
+
+def resolve_request_token(request):
+    """
+    Resolve the request's token once and memoize (user, key) on the
+    HttpRequest. Returns None when there is no token header or it is invalid.
+    """
+    resolved = getattr(request, '_token_auth', _UNRESOLVED)
+    if resolved is not _UNRESOLVED:
+        return resolved
+
+    resolved = None
+    key = get_request_token_key(request)
+    if key:
+        user = get_token_user(key)
+        if user is not None:
+            resolved = (user, key)
+    request._token_auth = resolved
+    return resolved
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Drop-in replacement for DRF's TokenAuthentication that reuses the
+    resolution TenantMiddleware already made for this request.
+    """
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        resolved = resolve_request_token(request._request)
+        if resolved is None:
+            raise exceptions.AuthenticationFailed('Invalid token.')
+
+        user, key = resolved
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        return (user, key)
+
+
+def resolve_request_jwt(request):
+    """
+    Validate the request's `Authorization: Bearer <access token>` once and
+    memoize (user, token) on the HttpRequest. Returns None when the token is
+    invalid or revoked, or its user is gone or inactive.
+    """
+    resolved = getattr(request, '_jwt_auth', _UNRESOLVED)
+    if resolved is not _UNRESOLVED:
+        return resolved
+
+    resolved = None
+    auth = request.META.get('HTTP_AUTHORIZATION', '').split()
+    if len(auth) == 2 and auth[0] in jwt_settings.AUTH_HEADER_TYPES:
+        token = validate_access_token(auth[1])
+        if token is not None:
+            user = get_user(token[jwt_settings.USER_ID_CLAIM])
+            if user is not None and user.is_active:
+                resolved = (user, token)
+    request._jwt_auth = resolved
+    return resolved
+
+
+class StatelessJWTAuthentication(TokenAuthentication):
+    """
+    Authenticates signed access tokens without a database hit, reusing the
+    resolution TenantMiddleware already made for this request.
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].decode() not in jwt_settings.AUTH_HEADER_TYPES:
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Invalid token header.')
+
+        resolved = resolve_request_jwt(request._request)
+        if resolved is None:
+            raise exceptions.AuthenticationFailed('Invalid or expired token, or user inactive.')
+
+        return resolved
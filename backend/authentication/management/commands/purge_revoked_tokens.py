@@ -0,0 +1,21 @@
+"""
+Delete RevokedToken rows whose tokens have expired.
+
+    python manage.py purge_revoked_tokens
+
+An expired token is rejected on its signature alone, so its revocation row is
+dead weight. Meant to run on a schedule, e.g. daily from cron:
+
+    30 3 * * * cd /srv/backend && python manage.py purge_revoked_tokens
+"""
+from django.core.management.base import BaseCommand
+
+from authentication.tokens import purge_expired_revocations
+
+
+class Command(BaseCommand):
+    help = 'Delete revocation records of signed tokens that have already expired'
+
+    def handle(self, *args, **options):
+        deleted = purge_expired_revocations()
+        self.stdout.write(self.style.SUCCESS(f"Purged {deleted} expired token revocations"))
@@ -1,3 +1,15 @@
 from django.db import models
 
-# Create your models here.
+
+class RevokedToken(models.Model):
+    """
+    Signed tokens revoked before they expire (logout, refresh rotation).
+    The Django cache only fronts this table, so revocations survive cache
+    flushes and outages.
+    """
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
@@ -1,3 +1,84 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from tenants.models import TenantUser
+from tenants.testing import Endpoint, PASSWORD, QueryBudgetMixin, TenantAPITestCase
+
+from .models import RevokedToken
+from .tokens import issue_tokens
+
+
+def _logout(case):
+    """Each logout consumes a token, so it runs as a member with a fresh one"""
+    member = case.member()
+    Token.objects.filter(user=member).delete()
+    return {'headers': case.user_headers(member)}
+
+
+class AuthenticationQueryBudgetTests(QueryBudgetMixin, TenantAPITestCase):
+    endpoints = [
+        Endpoint('login', 3, method='post',
+                 build=lambda case: {'data': {'email': case.user.email, 'password': PASSWORD}}),
+        Endpoint('login', 2, method='post', name='jwt',
+                 build=lambda case: {'data': {'email': case.user.email, 'password': PASSWORD, 'token_type': 'jwt'}}),
+        Endpoint('logout', 3, method='post', build=_logout),
+        Endpoint('user-profile', 1),
+        Endpoint('user-profile', 1, name='jwt',
+                 build=lambda case: {'headers': {'HTTP_AUTHORIZATION': f"Bearer {issue_tokens(case.user)['access']}"}}),
+        Endpoint('token-refresh', 4, method='post',
+                 build=lambda case: {'data': {'refresh': issue_tokens(case.user)['refresh']}}),
+    ]
+
+
+class SignedTokenTests(TenantAPITestCase):
+    def authorize(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+
+    def refresh(self, raw_refresh):
+        self.client.credentials()
+        return self.client.post(reverse('token-refresh'), {'refresh': raw_refresh}, format='json')
+
+    def test_removed_members_lose_tenant_access_at_once(self):
+        member = self.member()
+        self.authorize(issue_tokens(member)['access'])
+        self.assertGreater(self.client.get(reverse('customer-list-create')).data['count'], 0)
+        
+        # The token still claims the tenant; the membership is what counts
+        TenantUser.objects.filter(user=member).delete()
+        self.assertEqual(self.client.get(reverse('customer-list-create')).status_code, 404)
+
+    def test_revocations_outlive_the_cache(self):
+        tokens = issue_tokens(self.member())
+        self.authorize(tokens['access'])
+        self.assertEqual(self.client.post(reverse('logout'), {'refresh': tokens['refresh']}, format='json').status_code, 200)
+        
+        cache.clear()
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 401)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
+
+    def test_purge_keeps_live_revocations(self):
+        tokens = issue_tokens(self.member())
+        self.authorize(tokens['access'])
+        self.client.post(reverse('logout'), {'refresh': tokens['refresh']}, format='json')
+        RevokedToken.objects.create(jti='expired', expires_at=timezone.now() - timedelta(minutes=1))
+        
+        call_command('purge_revoked_tokens', stdout=io.StringIO())
+        self.assertFalse(RevokedToken.objects.filter(jti='expired').exists())
+        self.assertEqual(RevokedToken.objects.count(), 2)
+
+    def test_inactive_users_are_rejected(self):
+        member = self.member()
+        tokens = issue_tokens(member)
+        self.authorize(tokens['access'])
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 200)
+        
+        member.is_active = False
+        member.save()
+        self.assertEqual(self.client.get(reverse('user-profile')).status_code, 401)
+        self.assertEqual(self.refresh(tokens['refresh']).status_code, 401)
@@ -0,0 +1,141 @@
+"""
+Signed access/refresh tokens (SIMPLE_JWT).
+
+Access tokens carry the user id plus, for clients, the tenant id and role
+resolved at issue time; requests authenticate without touching the
+authtoken table. The server never trusts those claims: TenantMiddleware
+resolves the context from the tenant context cache, which membership
+changes invalidate. Logout revokes tokens through the RevokedToken
+table until they would have expired anyway; the Django cache remembers each
+token's status (revoked or not) so a token costs one lookup in its lifetime,
+and any cache miss or outage reads the table, so revocation fails closed.
+Rows past their expiry are removed by `manage.py purge_revoked_tokens`.
+Deactivated users are rejected by the per-request is_active check
+(authentication.authentication).
+"""
+from datetime import datetime, timezone as dt_timezone
+import logging
+import time
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from tenants.cache import get_tenant_context
+
+from .models import RevokedToken
+
+logger = logging.getLogger(__name__)
+
+TENANT_CLAIM = 'tenant_id'
+ROLE_CLAIM = 'role'
+
+REVOKED_KEY_PREFIX = 'jwt_revoked'
+
+
+def _revoked_key(jti):
+    return f"{REVOKED_KEY_PREFIX}:{jti}"
+
+
+def _remaining(token):
+    return int(token['exp'] - time.time())
+
+
+def _set_tenant_claims(token, user_id):
+    context = get_tenant_context(user_id)
+    token[TENANT_CLAIM] = str(context.tenant_id) if context.has_tenant else None
+    token[ROLE_CLAIM] = context.role
+
+
+def issue_tokens(user):
+    """Issue a refresh/access pair carrying the user's tenant and role"""
+    refresh = RefreshToken.for_user(user)
+    _set_tenant_claims(refresh, user.pk)
+    return {
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
+    }
+
+
+def refresh_tokens(raw_refresh):
+    """
+    Exchange a refresh token for a new access token (and a rotated refresh
+    token when ROTATE_REFRESH_TOKENS is on). Tenant and role claims are
+    re-resolved so membership changes are picked up on refresh.
+    Raises TokenError for invalid, expired or revoked tokens and inactive users.
+    """
+    refresh = RefreshToken(raw_refresh)
+    if is_revoked(refresh):
+        raise TokenError('Token is revoked')
+
+    user_id = refresh[api_settings.USER_ID_CLAIM]
+    if not User.objects.filter(pk=user_id, is_active=True).exists():
+        raise TokenError('User inactive or deleted')
+    _set_tenant_claims(refresh, user_id)
+    data = {'access': str(refresh.access_token)}
+
+    if api_settings.ROTATE_REFRESH_TOKENS:
+        revoke(refresh)
+        refresh.set_jti()
+        refresh.set_exp()
+        refresh.set_iat()
+        data['refresh'] = str(refresh)
+
+    return data
+
+
+def revoke(token):
+    """Deny a validated token until it expires"""
+    ttl = _remaining(token)
+    if ttl <= 0:
+        return
+    jti = token[api_settings.JTI_CLAIM]
+    RevokedToken.objects.bulk_create(
+        [RevokedToken(jti=jti, expires_at=datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc))],
+        ignore_conflicts=True,
+    )
+    try:
+        cache.set(_revoked_key(jti), True, ttl)
+    except Exception as e:
+        logger.warning(f"Token revocation cache unavailable: {e}")
+
+
+def purge_expired_revocations(now=None):
+    """Delete revocations whose tokens have expired; returns the number removed"""
+    deleted, _ = RevokedToken.objects.filter(expires_at__lt=now or timezone.now()).delete()
+    return deleted
+
+
+def is_revoked(token):
+    """Cached status of the token's jti, read from RevokedToken on a miss or cache error"""
+    jti = token[api_settings.JTI_CLAIM]
+    key = _revoked_key(jti)
+    try:
+        revoked = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Token revocation cache unavailable: {e}")
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    if revoked is None:
+        revoked = RevokedToken.objects.filter(jti=jti).exists()
+        ttl = _remaining(token)
+        if ttl > 0:
+            try:
+                cache.set(key, revoked, ttl)
+            except Exception as e:
+                logger.warning(f"Token revocation cache unavailable: {e}")
+    return revoked
+
+
+def validate_access_token(raw_token):
+    """Return the validated AccessToken, or None if it is invalid or revoked"""
+    try:
+        token = AccessToken(raw_token)
+    except TokenError:
+        return None
+    if is_revoked(token):
+        return None
+    return token
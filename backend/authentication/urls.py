@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import health_check, login, register, logout, user_profile
+from .views import health_check, login, register, logout, user_profile, refresh_token
 
 urlpatterns = [
     path('health/', health_check, name='health-check'),
@@ -7,4 +7,5 @@ urlpatterns = [
     path('auth/register/', register, name='register'),
     path('auth/logout/', logout, name='logout'),
     path('auth/profile/', user_profile, name='user-profile'),
+    path('auth/token/refresh/', refresh_token, name='token-refresh'),
 ]
\ No newline at end of file
@@ -6,6 +6,22 @@ from django.contrib.auth import authenticate
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 from django.conf import settings
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+from .tokens import issue_tokens, refresh_tokens, revoke
+
+
+def _token_payload(request, user):
+    """
+    Credentials for a freshly authenticated user. Clients opt into signed
+    access/refresh tokens with `token_type: "jwt"`; the legacy authtoken stays
+    the default while clients migrate.
+    """
+    token_type = request.data.get('token_type', getattr(settings, 'AUTH_DEFAULT_TOKEN_TYPE', 'token'))
+    if token_type == 'jwt':
+        return {'token_type': 'jwt', **issue_tokens(user)}
+    token, created = Token.objects.get_or_create(user=user)
+    return {'token': token.key}
 
 
 @api_view(['GET'])
@@ -36,9 +52,8 @@ def login(request):
         user = authenticate(username=user.username, password=password)
         
         if user:
-            token, created = Token.objects.get_or_create(user=user)
             return Response({
-                'token': token.key,
+                **_token_payload(request, user),
                 'user': {
                     'id': user.id,
                     'email': user.email,
@@ -85,11 +100,8 @@ def register(request):
         last_name=last_name
     )
     
-    # Create token
-    token, created = Token.objects.get_or_create(user=user)
-    
     return Response({
-        'token': token.key,
+        **_token_payload(request, user),
         'user': {
             'id': user.id,
             'email': user.email,
@@ -103,6 +115,17 @@ def register(request):
 @permission_classes([IsAuthenticated])
 def logout(request):
     """Logout and delete token"""
+    if isinstance(request.auth, AccessToken):
+        # Signed tokens: revoke the access token and, if sent, its refresh token
+        revoke(request.auth)
+        raw_refresh = request.data.get('refresh')
+        if raw_refresh:
+            try:
+                revoke(RefreshToken(raw_refresh))
+            except TokenError:
+                pass
+        return Response({'message': 'Logged out successfully'})
+    
     try:
         token = Token.objects.get(user=request.user)
         token.delete()
@@ -115,10 +138,30 @@ def logout(request):
 @permission_classes([IsAuthenticated])
 def user_profile(request):
     """Get current user profile"""
+    user = request.user
     return Response({
-        'id': request.user.id,
-        'email': request.user.email,
-        'first_name': request.user.first_name,
-        'last_name': request.user.last_name,
-        'date_joined': request.user.date_joined,
+        'id': user.id,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'date_joined': user.date_joined,
     })
+
+
+@api_view(['POST'])
+@permission_classes([AllowAny])
+def refresh_token(request):
+    """Exchange a refresh token for a new access token"""
+    raw_refresh = request.data.get('refresh')
+    
+    if not raw_refresh:
+        return Response({
+            'error': 'Refresh token required'
+        }, status=status.HTTP_400_BAD_REQUEST)
+    
+    try:
+        return Response(refresh_tokens(raw_refresh))
+    except TokenError:
+        return Response({
+            'error': 'Invalid or expired refresh token'
+        }, status=status.HTTP_401_UNAUTHORIZED)
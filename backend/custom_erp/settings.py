@@ -111,6 +111,37 @@ CACHES = {
     }
 }
 
+# Tenant context cache (see tenants.cache)
+TENANT_CONTEXT_CACHE_TTL = config('TENANT_CONTEXT_CACHE_TTL', default=300, cast=int)
+TENANT_CONTEXT_LOCAL_TTL = config('TENANT_CONTEXT_LOCAL_TTL', default=30, cast=int)
+TENANT_CONTEXT_LOCAL_MAX_ENTRIES = config('TENANT_CONTEXT_LOCAL_MAX_ENTRIES', default=2048, cast=int)
+
+# Token -> user resolutions cached by authentication.authentication
+AUTH_TOKEN_CACHE_TTL = config('AUTH_TOKEN_CACHE_TTL', default=300, cast=int)
+
+# Rendered invoice PDFs (see sales.pdf)
+INVOICE_PDF_CACHE_DIR = config('INVOICE_PDF_CACHE_DIR', default=str(BASE_DIR / 'pdf_cache'))
+
+# PDF rendering worker processes (see sales.pdf_workers); 0 renders in-process.
+# Renders are CPU bound, so the default follows the core count (capped, as
+# every web worker process starts its own pool)
+PDF_RENDER_WORKERS = config('PDF_RENDER_WORKERS', default=min(os.cpu_count() or 1, 4), cast=int)
+PDF_RENDER_QUEUE_SIZE = config('PDF_RENDER_QUEUE_SIZE', default=16, cast=int)
+# Seconds a request waits for its PDF; a render already running is not interrupted
+PDF_RENDER_TIMEOUT = config('PDF_RENDER_TIMEOUT', default=30, cast=float)
+# Largest number of invoices a single ZIP export may contain
+INVOICE_PDF_EXPORT_MAX = config('INVOICE_PDF_EXPORT_MAX', default=2000, cast=int)
+# Largest number of sales orders a single batch invoicing request converts
+INVOICE_BATCH_MAX = config('INVOICE_BATCH_MAX', default=5000, cast=int)
+
+# Dashboard stats snapshots (see tenants.snapshots); 0 disables caching
+DASHBOARD_STATS_CACHE_TTL = config('DASHBOARD_STATS_CACHE_TTL', default=60, cast=int)
+
+# Query-budget test suite timings are merged into this JSON file (unset disables)
+PERF_BASELINE_PATH = config('PERF_BASELINE_PATH', default='')
+# Rows of every entity the query-budget suites grow each tenant to before re-measuring
+QUERY_BUDGET_SCALE = config('QUERY_BUDGET_SCALE', default=300, cast=int)
+
 # Celery configuration
 CELERY_BROKER_URL = REDIS_URL
 CELERY_RESULT_BACKEND = REDIS_URL
@@ -157,7 +188,8 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'authentication.authentication.StatelessJWTAuthentication',
+        'authentication.authentication.CachedTokenAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
@@ -168,13 +200,16 @@ REST_FRAMEWORK = {
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'tenants.pagination.PageNumberPagination',
     'PAGE_SIZE': 25,
     'DEFAULT_RENDERER_CLASSES': [
         'rest_framework.renderers.JSONRenderer',
     ],
 }
 
+# Largest page a client may request with ?page_size= (see tenants.pagination)
+MAX_PAGE_SIZE = config('MAX_PAGE_SIZE', default=200, cast=int)
+
 # JWT configuration (using simple JWT for now)
 from datetime import timedelta
 SIMPLE_JWT = {
@@ -183,6 +218,12 @@ SIMPLE_JWT = {
     'ROTATE_REFRESH_TOKENS': True,
 }
 
+# Credentials issued by login/register when the client does not ask for a
+# specific token_type: 'token' (legacy authtoken) or 'jwt' (signed tokens).
+# Revoked signed tokens are tracked in the default cache, which must be shared
+# between workers for logout to take effect everywhere.
+AUTH_DEFAULT_TOKEN_TYPE = config('AUTH_DEFAULT_TOKEN_TYPE', default='token')
+
 # CORS configuration
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:3000",
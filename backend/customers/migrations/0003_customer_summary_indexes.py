@@ -0,0 +1,24 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0002_customer_category'),
+        ('tenants', '0003_documentsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['tenant', 'total_spent'], name='customers_c_tenant__47ab4b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['tenant', 'last_order_date'], name='customers_c_tenant__4dce26_idx'),
+        ),
+    ]
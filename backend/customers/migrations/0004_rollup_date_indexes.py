@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_customer_summary_indexes'),
+        ('tenants', '0003_documentsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['tenant', 'created_at'], name='customers_c_tenant__7bbedf_idx'),
+        ),
+    ]
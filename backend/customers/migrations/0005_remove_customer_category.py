@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:34
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_rollup_date_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='customer',
+            name='category',
+        ),
+    ]
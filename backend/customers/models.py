@@ -1,6 +1,7 @@
 from django.db import models
 from django.contrib.auth.models import User
 from tenants.models import Tenant
+from tenants.sequences import next_document_number
 import uuid
 from decimal import Decimal
 
@@ -77,6 +78,13 @@ class Customer(models.Model):
     class Meta:
         ordering = ['name']
         unique_together = ('tenant', 'customer_code')
+        indexes = [
+            # VIP filter and sort_by on the maintained financial summary
+            models.Index(fields=['tenant', 'total_spent']),
+            models.Index(fields=['tenant', 'last_order_date']),
+            # New-customer rollups (sales.rollups)
+            models.Index(fields=['tenant', 'created_at']),
+        ]
     
     def __str__(self):
         return self.name
@@ -84,10 +92,7 @@ class Customer(models.Model):
     def save(self, *args, **kwargs):
         # Auto-generate customer code if not provided
         if not self.customer_code:
-            # Simple code generation: CUST + tenant prefix + sequential number
-            tenant_prefix = self.tenant.name[:3].upper()
-            existing_count = Customer.objects.filter(tenant=self.tenant).count()
-            self.customer_code = f"CUST-{tenant_prefix}-{existing_count + 1:04d}"
+            self.customer_code = next_document_number(self.tenant, 'customer')
         
         # Copy billing address to shipping if use_billing_as_shipping is True
         if self.use_billing_as_shipping:
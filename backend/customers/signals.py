@@ -0,0 +1,11 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from tenants.snapshots import invalidate_snapshots
+
+from .models import Customer
+
+
+@receiver([post_save, post_delete], sender=Customer)
+def invalidate_customer_stats(sender, instance, **kwargs):
+    invalidate_snapshots(instance.tenant_id, 'customers')
@@ -1,3 +1,29 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from tenants.testing import Endpoint, QueryBudgetMixin, TenantAPITestCase, cold_snapshot, make_customer
+
+from .models import Customer
+
+
+class CustomerQueryBudgetTests(QueryBudgetMixin, TenantAPITestCase):
+    endpoints = [
+        Endpoint('customer-category-list-create', 2),
+        Endpoint('customer-list-create', 2),
+        Endpoint('customer-list-create', 5, method='post', status=201,
+                 build=lambda case: {'data': {'name': f'New Customer {case.serial()}'}}),
+        Endpoint('customer-detail', 2, build=lambda case: {'kwargs': {'pk': case.first(Customer).pk}}),
+        Endpoint('customer-stats', 0),
+        Endpoint('customer-stats', 1, name='cold', build=cold_snapshot('customers')),
+        Endpoint('customer-follow-ups', 1),
+    ]
+
+
+class CustomerStatsSnapshotTests(TenantAPITestCase):
+    def test_bulk_actions_refresh_the_snapshot(self):
+        url = reverse('customer-stats')
+        make_customer(self.tenant, self.user, self.serial())
+        self.assertLess(self.client.get(url).data['leads'], Customer.objects.filter(tenant=self.tenant).count())
+        customer_ids = [str(pk) for pk in Customer.objects.filter(tenant=self.tenant).values_list('pk', flat=True)]
+        self.client.post(reverse('bulk-customer-actions'),
+                         {'action': 'update_status', 'new_status': 'lead', 'customer_ids': customer_ids}, format='json')
+        self.assertEqual(self.client.get(url).data['leads'], len(customer_ids))
@@ -8,7 +8,9 @@ from django.utils import timezone
 from decimal import Decimal
 from datetime import datetime, timedelta
 
+from tenants.eager_loading import EagerLoadingMixin
 from tenants.middleware import RequireTenantMixin, TenantQuerySetMixin
+from tenants.snapshots import get_snapshot, invalidate_snapshots
 from .models import Customer, CustomerContact, CustomerCategory, CustomerInteraction
 from .serializers import (
     CustomerCategorySerializer, CustomerContactSerializer, CustomerListSerializer,
@@ -17,7 +19,7 @@ from .serializers import (
 )
 
 
-class CustomerCategoryListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.ListCreateAPIView):
+class CustomerCategoryListCreateView(RequireTenantMixin, TenantQuerySetMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     serializer_class = CustomerCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -28,7 +30,7 @@ class CustomerCategoryListCreateView(RequireTenantMixin, TenantQuerySetMixin, ge
         serializer.save(tenant=self.request.tenant, created_by=self.request.user)
 
 
-class CustomerCategoryDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIView):
+class CustomerCategoryDetailView(RequireTenantMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CustomerCategorySerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -36,7 +38,7 @@ class CustomerCategoryDetailView(RequireTenantMixin, generics.RetrieveUpdateDest
         return CustomerCategory.objects.filter(tenant=self.request.tenant)
 
 
-class CustomerListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.ListCreateAPIView):
+class CustomerListCreateView(RequireTenantMixin, TenantQuerySetMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
@@ -45,7 +47,7 @@ class CustomerListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.L
         return CustomerListSerializer
     
     def get_queryset(self):
-        queryset = Customer.objects.filter(tenant=self.request.tenant).select_related('assigned_to')
+        queryset = Customer.objects.filter(tenant=self.request.tenant)
         
         # Filter by status
         status_filter = self.request.query_params.get('status')
@@ -95,7 +97,7 @@ class CustomerListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.L
         serializer.save(tenant=self.request.tenant, created_by=self.request.user)
 
 
-class CustomerDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIView):
+class CustomerDetailView(RequireTenantMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
@@ -104,9 +106,7 @@ class CustomerDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIVi
         return CustomerDetailSerializer
     
     def get_queryset(self):
-        return Customer.objects.filter(tenant=self.request.tenant).select_related(
-            'created_by', 'assigned_to'
-        ).prefetch_related('contacts', 'interactions')
+        return Customer.objects.filter(tenant=self.request.tenant)
 
 
 class CustomerContactListCreateView(RequireTenantMixin, generics.ListCreateAPIView):
@@ -166,35 +166,45 @@ def customer_stats(request):
     # Get date filters
     start_date = request.query_params.get('start_date')
     end_date = request.query_params.get('end_date')
+    if start_date and end_date:
+        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
+    else:
+        start_date = end_date = None
     
+    return Response(get_snapshot(
+        tenant, 'customers',
+        lambda: _compute_customer_stats(tenant, start_date, end_date),
+        params={'start_date': start_date, 'end_date': end_date}
+    ))
+
+
+def _compute_customer_stats(tenant, start_date, end_date):
     queryset = Customer.objects.filter(tenant=tenant)
     
     if start_date and end_date:
-        start_date = datetime.strptime(start_date, '%Y-%m-%d').date()
-        end_date = datetime.strptime(end_date, '%Y-%m-%d').date()
         queryset = queryset.filter(created_at__date__range=[start_date, end_date])
     
-    # Calculate statistics
-    stats = {
-        'total_customers': queryset.count(),
-        'active_customers': queryset.filter(status='active').count(),
-        'leads': queryset.filter(status='lead').count(),
-        'prospects': queryset.filter(status='prospect').count(),
-        'vip_customers': queryset.filter(total_spent__gte=Decimal('100000.00')).count(),
-        'total_customer_value': queryset.aggregate(
-            total=Sum('total_spent')
-        )['total'] or Decimal('0.00'),
-        'average_order_value': queryset.aggregate(
-            avg=Avg('total_spent')
-        )['avg'] or Decimal('0.00'),
-        'this_month_new_customers': queryset.filter(
-            created_at__month=timezone.now().month,
-            created_at__year=timezone.now().year
-        ).count()
-    }
+    # Calculate statistics in one conditional aggregation
+    now = timezone.now()
+    stats = queryset.aggregate(
+        total_customers=Count('pk'),
+        active_customers=Count('pk', filter=Q(status='active')),
+        leads=Count('pk', filter=Q(status='lead')),
+        prospects=Count('pk', filter=Q(status='prospect')),
+        vip_customers=Count('pk', filter=Q(total_spent__gte=Decimal('100000.00'))),
+        total_customer_value=Sum('total_spent'),
+        average_order_value=Avg('total_spent'),
+        this_month_new_customers=Count('pk', filter=Q(
+            created_at__month=now.month,
+            created_at__year=now.year
+        )),
+    )
+    stats['total_customer_value'] = stats['total_customer_value'] or Decimal('0.00')
+    stats['average_order_value'] = stats['average_order_value'] or Decimal('0.00')
     
     serializer = CustomerStatsSerializer(stats)
-    return Response(serializer.data)
+    return serializer.data
 
 
 @api_view(['POST'])
@@ -253,6 +263,9 @@ def bulk_customer_actions(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
     
+    # queryset.update() sends no signals
+    invalidate_snapshots(request.tenant.pk, 'customers')
+    
     return Response({
         'message': f'Successfully updated {updated_count} customers',
         'updated_count': updated_count
@@ -270,7 +283,7 @@ def customer_follow_ups(request):
         customer__tenant=tenant,
         follow_up_required=True,
         follow_up_date__lte=timezone.now().date()
-    ).select_related('customer')
+    ).select_related('customer__assigned_to', 'created_by')
     
     # Group by customer
     follow_up_data = {}
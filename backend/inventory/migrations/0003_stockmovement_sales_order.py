@@ -0,0 +1,33 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:27
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_order_movements(apps, schema_editor):
+    """Link the movements sales.stock wrote (identified by their notes) to their orders"""
+    StockMovement = apps.get_model('inventory', 'StockMovement')
+    SalesOrder = apps.get_model('sales', 'SalesOrder')
+    orders = SalesOrder.objects.filter(
+        tenant=models.OuterRef('tenant'), order_number=models.OuterRef('reference_number')
+    ).values('pk')[:1]
+    StockMovement.objects.filter(
+        movement_type__in=['sale', 'return'], notes__startswith='Sales order '
+    ).update(sales_order=models.Subquery(orders))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('inventory', '0002_keyset_pagination_indexes'),
+        ('sales', '0007_rollup_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockmovement',
+            name='sales_order',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='stock_movements', to='sales.salesorder'),
+        ),
+        migrations.RunPython(link_order_movements, migrations.RunPython.noop),
+    ]
@@ -96,7 +96,12 @@ class Product(models.Model):
         if self.cost_price > 0 and self.selling_price > 0:
             self.margin_percentage = ((self.selling_price - self.cost_price) / self.cost_price) * 100
         
-        # Update stock status based on current stock
+        self.update_stock_status()
+        
+        super().save(*args, **kwargs)
+    
+    def update_stock_status(self):
+        """Update stock status based on current stock"""
         if self.track_inventory:
             if self.current_stock <= 0:
                 self.stock_status = 'out_of_stock'
@@ -104,8 +109,6 @@ class Product(models.Model):
                 self.stock_status = 'low_stock'
             else:
                 self.stock_status = 'in_stock'
-        
-        super().save(*args, **kwargs)
     
     @property
     def profit_margin(self):
@@ -147,6 +150,9 @@ class StockMovement(models.Model):
     
     # Reference to related records (optional)
     reference_number = models.CharField(max_length=100, blank=True)
+    # Set on the movements that reserve and release a sales order's stock
+    sales_order = models.ForeignKey('sales.SalesOrder', on_delete=models.SET_NULL, null=True, blank=True,
+                                    related_name='stock_movements')
     notes = models.TextField(blank=True)
     
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='stock_movements')
@@ -154,6 +160,10 @@ class StockMovement(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Keyset pagination (tenants.pagination)
+            models.Index(fields=['tenant', 'created_at', 'id']),
+        ]
     
     def __str__(self):
         return f"{self.product.name} - {self.movement_type} - {self.quantity}"
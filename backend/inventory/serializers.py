@@ -1,10 +1,11 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
+from tenants.eager_loading import CountField
 from .models import Category, Product, StockMovement, Supplier, ProductSupplier
 
 
 class CategorySerializer(serializers.ModelSerializer):
-    product_count = serializers.SerializerMethodField()
+    product_count = CountField('products', filter={'is_active': True})
     
     class Meta:
         model = Category
@@ -13,9 +14,6 @@ class CategorySerializer(serializers.ModelSerializer):
             'created_at', 'updated_at', 'product_count'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at', 'product_count']
-    
-    def get_product_count(self, obj):
-        return obj.products.filter(is_active=True).count()
 
 
 class ProductListSerializer(serializers.ModelSerializer):
@@ -40,7 +38,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
     profit_margin = serializers.DecimalField(max_digits=10, decimal_places=2, read_only=True)
     is_low_stock = serializers.BooleanField(read_only=True)
     is_out_of_stock = serializers.BooleanField(read_only=True)
-    stock_movements_count = serializers.SerializerMethodField()
+    stock_movements_count = CountField('stock_movements')
     
     class Meta:
         model = Product
@@ -57,9 +55,7 @@ class ProductDetailSerializer(serializers.ModelSerializer):
             'id', 'sku', 'margin_percentage', 'stock_status', 'profit_margin',
             'is_low_stock', 'is_out_of_stock', 'created_at', 'updated_at'
         ]
-    
-    def get_stock_movements_count(self, obj):
-        return obj.stock_movements.count()
+        select_related = ['category', 'created_by']
 
 
 class ProductCreateUpdateSerializer(serializers.ModelSerializer):
@@ -116,7 +112,7 @@ class StockAdjustmentSerializer(serializers.Serializer):
 
 
 class SupplierSerializer(serializers.ModelSerializer):
-    products_count = serializers.SerializerMethodField()
+    products_count = CountField('supplier_products', filter={'is_active': True})
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
     
     class Meta:
@@ -127,9 +123,7 @@ class SupplierSerializer(serializers.ModelSerializer):
             'is_active', 'products_count', 'created_by_name', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'products_count', 'created_at', 'updated_at']
-    
-    def get_products_count(self, obj):
-        return obj.supplier_products.filter(is_active=True).count()
+        select_related = ['created_by']
 
 
 class ProductSupplierSerializer(serializers.ModelSerializer):
@@ -144,6 +138,7 @@ class ProductSupplierSerializer(serializers.ModelSerializer):
             'lead_time_days', 'is_primary', 'is_active', 'created_at', 'updated_at'
         ]
         read_only_fields = ['id', 'created_at', 'updated_at']
+        select_related = ['product', 'supplier']
     
     def validate(self, data):
         if data.get('supplier_price') and data['supplier_price'] < 0:
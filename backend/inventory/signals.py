@@ -0,0 +1,13 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from tenants.snapshots import invalidate_snapshots
+
+from .models import Category, Product, Supplier
+
+
+@receiver([post_save, post_delete], sender=Product)
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=Supplier)
+def invalidate_inventory_stats(sender, instance, **kwargs):
+    invalidate_snapshots(instance.tenant_id, 'inventory')
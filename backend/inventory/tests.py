@@ -1,3 +1,16 @@
-from django.test import TestCase
+from tenants.testing import Endpoint, QueryBudgetMixin, TenantAPITestCase, cold_snapshot
 
-# Create your tests here.
+
+class InventoryQueryBudgetTests(QueryBudgetMixin, TenantAPITestCase):
+    endpoints = [
+        Endpoint('category-list-create', 2),
+        Endpoint('product-list-create', 2),
+        Endpoint('product-list-create', 2, name='search', build=lambda case: {'data': {'search': 'Product 1'}}),
+        Endpoint('product-stats', 0),
+        Endpoint('product-stats', 3, name='cold', build=cold_snapshot('inventory')),
+        Endpoint('stock-movements', 2),
+        Endpoint('stock-movements-export', 1),
+        Endpoint('stock-movements', 1, name='cursor', build=lambda case: {'data': {'cursor': ''}}),
+        Endpoint('supplier-list-create', 2),
+        Endpoint('product-supplier-list-create', 2),
+    ]
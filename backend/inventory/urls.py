@@ -6,6 +6,7 @@ from .views import (
     ProductDetailView,
     adjust_stock,
     StockMovementListView,
+    StockMovementExportView,
     SupplierListCreateView,
     SupplierDetailView,
     ProductSupplierListCreateView,
@@ -28,6 +29,7 @@ urlpatterns = [
     # Stock Management
     path('stock/adjust/', adjust_stock, name='adjust-stock'),
     path('stock/movements/', StockMovementListView.as_view(), name='stock-movements'),
+    path('stock/movements/export/', StockMovementExportView.as_view(), name='stock-movements-export'),
     
     # Suppliers
     path('suppliers/', SupplierListCreateView.as_view(), name='supplier-list-create'),
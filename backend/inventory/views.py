@@ -2,11 +2,15 @@ from rest_framework import generics, permissions, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.response import Response
 from django.contrib.auth.models import User
-from django.db.models import Count, Sum, F
+from django.db.models import Count, Sum, F, Q
 from django.db import transaction
 from decimal import Decimal
 
+from tenants.eager_loading import EagerLoadingMixin
+from tenants.exports import csv_response
 from tenants.middleware import RequireTenantMixin, TenantQuerySetMixin
+from tenants.pagination import KeysetPagination
+from tenants.snapshots import get_snapshot
 from .models import Category, Product, StockMovement, Supplier, ProductSupplier
 from .serializers import (
     CategorySerializer, ProductListSerializer, ProductDetailSerializer,
@@ -15,7 +19,7 @@ from .serializers import (
 )
 
 
-class CategoryListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.ListCreateAPIView):
+class CategoryListCreateView(RequireTenantMixin, TenantQuerySetMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -26,7 +30,7 @@ class CategoryListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.L
         serializer.save(tenant=self.request.tenant, created_by=self.request.user)
 
 
-class CategoryDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIView):
+class CategoryDetailView(RequireTenantMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -34,7 +38,7 @@ class CategoryDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIVi
         return Category.objects.filter(tenant=self.request.tenant)
 
 
-class ProductListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.ListCreateAPIView):
+class ProductListCreateView(RequireTenantMixin, TenantQuerySetMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
@@ -69,20 +73,18 @@ class ProductListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.Li
         search = self.request.query_params.get('search')
         if search:
             queryset = queryset.filter(
-                name__icontains=search
-            ).union(
-                queryset.filter(sku__icontains=search)
-            ).union(
-                queryset.filter(description__icontains=search)
+                Q(name__icontains=search) |
+                Q(sku__icontains=search) |
+                Q(description__icontains=search)
             )
         
-        return queryset.distinct()
+        return queryset
     
     def perform_create(self, serializer):
         serializer.save(tenant=self.request.tenant, created_by=self.request.user)
 
 
-class ProductDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIView):
+class ProductDetailView(RequireTenantMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     permission_classes = [permissions.IsAuthenticated]
     
     def get_serializer_class(self):
@@ -157,6 +159,7 @@ def adjust_stock(request):
 class StockMovementListView(RequireTenantMixin, TenantQuerySetMixin, generics.ListAPIView):
     serializer_class = StockMovementSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     
     def get_queryset(self):
         queryset = StockMovement.objects.filter(tenant=self.request.tenant).select_related(
@@ -176,7 +179,19 @@ class StockMovementListView(RequireTenantMixin, TenantQuerySetMixin, generics.Li
         return queryset
 
 
-class SupplierListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.ListCreateAPIView):
+class StockMovementExportView(StockMovementListView):
+    """Every stock movement matching the list filters as CSV"""
+    columns = [
+        ('Date', 'created_at'), ('SKU', 'product__sku'), ('Product', 'product__name'), ('Type', 'movement_type'),
+        ('Quantity', 'quantity'), ('Previous stock', 'previous_stock'), ('New stock', 'new_stock'),
+        ('Reference', 'reference_number'), ('Notes', 'notes'), ('Created by', 'created_by__username'),
+    ]
+
+    def get(self, request, *args, **kwargs):
+        return csv_response(self.filter_queryset(self.get_queryset()), self.columns, 'stock-movements')
+
+
+class SupplierListCreateView(RequireTenantMixin, TenantQuerySetMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     serializer_class = SupplierSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -199,7 +214,7 @@ class SupplierListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.L
         serializer.save(tenant=self.request.tenant, created_by=self.request.user)
 
 
-class SupplierDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIView):
+class SupplierDetailView(RequireTenantMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = SupplierSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -207,7 +222,7 @@ class SupplierDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIVi
         return Supplier.objects.filter(tenant=self.request.tenant)
 
 
-class ProductSupplierListCreateView(RequireTenantMixin, TenantQuerySetMixin, generics.ListCreateAPIView):
+class ProductSupplierListCreateView(RequireTenantMixin, TenantQuerySetMixin, EagerLoadingMixin, generics.ListCreateAPIView):
     serializer_class = ProductSupplierSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -232,7 +247,7 @@ class ProductSupplierListCreateView(RequireTenantMixin, TenantQuerySetMixin, gen
         serializer.save(tenant=self.request.tenant)
 
 
-class ProductSupplierDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIView):
+class ProductSupplierDetailView(RequireTenantMixin, EagerLoadingMixin, generics.RetrieveUpdateDestroyAPIView):
     serializer_class = ProductSupplierSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -249,48 +264,28 @@ def product_stats(request):
     if not tenant:
         return Response({'error': 'Tenant required'}, status=400)
     
-    # Get basic counts
-    total_products = Product.objects.filter(tenant=tenant).count()
-    active_products = Product.objects.filter(tenant=tenant, is_active=True).count()
-    low_stock_products = Product.objects.filter(
-        tenant=tenant, 
-        is_active=True,
-        track_inventory=True,
-        current_stock__lte=F('minimum_stock'),
-        current_stock__gt=0
-    ).count()
-    out_of_stock_products = Product.objects.filter(
-        tenant=tenant, 
-        is_active=True,
-        track_inventory=True,
-        current_stock=0
-    ).count()
-    
-    # Calculate total inventory value
-    inventory_value = Product.objects.filter(
-        tenant=tenant, 
-        is_active=True,
-        track_inventory=True
-    ).aggregate(
-        total_value=Sum(F('current_stock') * F('cost_price'))
-    )['total_value'] or Decimal('0.00')
-    
-    # Get categories and suppliers count
-    categories_count = Category.objects.filter(tenant=tenant, is_active=True).count()
-    suppliers_count = Supplier.objects.filter(tenant=tenant, is_active=True).count()
-    
-    stats_data = {
-        'total_products': total_products,
-        'active_products': active_products,
-        'low_stock_products': low_stock_products,
-        'out_of_stock_products': out_of_stock_products,
-        'total_inventory_value': inventory_value,
-        'categories_count': categories_count,
-        'suppliers_count': suppliers_count,
-    }
+    return Response(get_snapshot(tenant, 'inventory', lambda: _compute_product_stats(tenant)))
+
+
+def _compute_product_stats(tenant):
+    # One conditional aggregation per table
+    tracked = Q(is_active=True, track_inventory=True)
+    stats_data = Product.objects.filter(tenant=tenant).aggregate(
+        total_products=Count('pk'),
+        active_products=Count('pk', filter=Q(is_active=True)),
+        low_stock_products=Count('pk', filter=tracked & Q(
+            current_stock__lte=F('minimum_stock'),
+            current_stock__gt=0
+        )),
+        out_of_stock_products=Count('pk', filter=tracked & Q(current_stock=0)),
+        total_inventory_value=Sum(F('current_stock') * F('cost_price'), filter=tracked),
+    )
+    stats_data['total_inventory_value'] = stats_data['total_inventory_value'] or Decimal('0.00')
+    stats_data['categories_count'] = Category.objects.filter(tenant=tenant, is_active=True).count()
+    stats_data['suppliers_count'] = Supplier.objects.filter(tenant=tenant, is_active=True).count()
     
     serializer = ProductStatsSerializer(stats_data)
-    return Response(serializer.data)
+    return serializer.data
 
 
 @api_view(['GET'])
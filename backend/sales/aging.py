@@ -0,0 +1,77 @@
+"""
+Accounts-receivable aging.
+
+Outstanding balances (Invoice.balance_due) of billed invoices are
+bucketed by how many days past due they are on the as-of date, in the
+tenant's timezone: current (not yet due), 1-30, 31-60, 61-90 and over 90
+days. The buckets are conditional sums in one grouped query per customer
+(SUM ... FILTER / CASE WHEN), so the database returns one row per customer
+however many invoices there are; tenant totals are the same sums without
+the grouping.
+
+Balances are as they stand now: an earlier as-of date leaves out invoices
+issued after it and re-ages the rest, but payments are not rolled back.
+"""
+from datetime import datetime, time, timedelta
+
+from django.db.models import Count, DecimalField, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from .customer_totals import UNBILLED_STATUSES, ZERO
+from .models import Invoice
+from .rollups import tenant_timezone
+
+# Bucket -> (fewest, most) whole days past due; None is unbounded
+BUCKETS = {
+    'current': (None, 0),
+    'days_1_30': (1, 30),
+    'days_31_60': (31, 60),
+    'days_61_90': (61, 90),
+    'days_over_90': (91, None),
+}
+
+
+def _midnight(day, tz):
+    return datetime.combine(day, time.min, tzinfo=tz)
+
+
+def _bucket_filter(as_of, tz, fewest, most):
+    """Invoices due between `most` and `fewest` days before `as_of`"""
+    condition = Q()
+    if most is not None:
+        # Due no earlier than the start of the day `most` days back
+        condition &= Q(due_date__gte=_midnight(as_of - timedelta(days=most), tz))
+    if fewest is not None:
+        condition &= Q(due_date__lt=_midnight(as_of - timedelta(days=fewest - 1), tz))
+    return condition
+
+
+def _buckets(as_of, tz):
+    output = DecimalField(max_digits=14, decimal_places=2)
+    sums = {
+        name: Coalesce(Sum('balance_due', filter=_bucket_filter(as_of, tz, fewest, most)), Value(ZERO), output_field=output)
+        for name, (fewest, most) in BUCKETS.items()
+    }
+    sums['total'] = Coalesce(Sum('balance_due'), Value(ZERO), output_field=output)
+    sums['invoice_count'] = Count('pk')
+    return sums
+
+
+def outstanding_invoices(tenant, as_of):
+    """Billed invoices issued by the end of `as_of` with a balance left"""
+    tz = tenant_timezone(tenant)
+    return Invoice.objects.filter(
+        tenant=tenant, invoice_date__lt=_midnight(as_of + timedelta(days=1), tz), balance_due__gt=0,
+    ).exclude(status__in=UNBILLED_STATUSES)
+
+
+def customer_aging(tenant, as_of):
+    """One row per customer with a balance, largest total exposure first"""
+    return outstanding_invoices(tenant, as_of).order_by().values(
+        'customer_id', 'customer__name'
+    ).annotate(**_buckets(as_of, tenant_timezone(tenant))).order_by('-total', 'customer_id')
+
+
+def tenant_aging(tenant, as_of):
+    """The tenant's bucket totals"""
+    return outstanding_invoices(tenant, as_of).aggregate(**_buckets(as_of, tenant_timezone(tenant)))
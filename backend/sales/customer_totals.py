@@ -0,0 +1,159 @@
+"""
+Customer financial summary.
+
+Customer.total_orders, last_order_date, total_spent and outstanding_balance
+summarize the customer's sales orders and invoices:
+
+- total_orders: number of sales orders
+- last_order_date: local date (Tenant.timezone) of the latest order
+- total_spent: sum of the invoices' paid_amount
+- outstanding_balance: total_amount - paid_amount over billed invoices
+  (everything but drafts and cancelled ones)
+
+Writes keep them current incrementally: the signal handlers in sales.signals
+compare what an order or invoice contributed before and after the write and
+shift the customer's columns by the difference with F() expressions, so an
+update is a single UPDATE of one customer row regardless of how many
+documents the customer has. Payments reach the summary through the invoice
+paid_amount changes posted by sales.ledger.
+
+Writes that bypass signals (queryset.update(), bulk_create(), the
+reconcile command's repairs) are reconciled with
+`manage.py recompute_customer_totals`.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, DateField, F, Max, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, TruncDate
+
+from customers.models import Customer
+from tenants.snapshots import invalidate_snapshots
+
+from .models import Invoice, SalesOrder
+from .rollups import UNBILLED_STATUSES, local_date, tenant_timezone
+
+ZERO = Decimal('0.00')
+
+SUMMARY_FIELDS = ['total_orders', 'last_order_date', 'total_spent', 'outstanding_balance']
+
+# Fields each document's contribution is computed from
+ORDER_FIELDS = ('customer_id', 'order_date')
+INVOICE_FIELDS = ('customer_id', 'status', 'total_amount', 'paid_amount')
+
+
+def order_contribution(order):
+    """(customer_id, order_date) an order adds to its customer"""
+    return order.customer_id, order.order_date
+
+
+def invoice_contribution(invoice):
+    """(customer_id, spent, outstanding) an invoice adds to its customer"""
+    outstanding = ZERO if invoice.status in UNBILLED_STATUSES else invoice.total_amount - invoice.paid_amount
+    return invoice.customer_id, invoice.paid_amount, outstanding
+
+
+def _latest_order_date(tz):
+    latest = SalesOrder.objects.filter(customer=OuterRef('pk')).order_by('-order_date').annotate(
+        day=TruncDate('order_date', tzinfo=tz)
+    ).values('day')[:1]
+    return Subquery(latest, output_field=DateField())
+
+
+def post_order_change(tenant, before, after):
+    """
+    Apply the difference between two states of a sales order, each given as
+    order_contribution() or None for "did not exist".
+    """
+    if before == after:
+        return
+    tz = tenant_timezone(tenant)
+    with transaction.atomic(savepoint=False):
+        if before is not None and after is not None and before[0] == after[0]:
+            # Same customer, moved date: the latest order may be another one now
+            Customer.objects.filter(pk=after[0]).update(last_order_date=_latest_order_date(tz))
+        else:
+            if before is not None:
+                Customer.objects.filter(pk=before[0]).update(
+                    total_orders=F('total_orders') - 1, last_order_date=_latest_order_date(tz)
+                )
+            if after is not None:
+                day = Value(local_date(after[1], tz), output_field=DateField())
+                Customer.objects.filter(pk=after[0]).update(
+                    total_orders=F('total_orders') + 1,
+                    last_order_date=Greatest(Coalesce('last_order_date', day), day),
+                )
+    invalidate_snapshots(tenant.pk, 'customers')
+
+
+def post_customer_deltas(tenant_id, deltas):
+    """
+    Apply {customer_id: (spent, outstanding)} changes. Rows are updated in
+    primary key order so concurrent writes touching several customers cannot
+    deadlock.
+    """
+    deltas = {customer_id: delta for customer_id, delta in deltas.items() if any(delta)}
+    if not deltas:
+        return
+    with transaction.atomic(savepoint=False):
+        for customer_id in sorted(deltas):
+            spent, outstanding = deltas[customer_id]
+            Customer.objects.filter(pk=customer_id).update(
+                total_spent=F('total_spent') + spent,
+                outstanding_balance=F('outstanding_balance') + outstanding,
+            )
+    invalidate_snapshots(tenant_id, 'customers')
+
+
+def post_invoice_change(tenant, before, after):
+    """
+    Apply the difference between two states of an invoice, each given as
+    invoice_contribution() or None for "did not exist".
+    """
+    deltas = defaultdict(lambda: (ZERO, ZERO))
+    if before is not None:
+        spent, outstanding = deltas[before[0]]
+        deltas[before[0]] = (spent - before[1], outstanding - before[2])
+    if after is not None:
+        spent, outstanding = deltas[after[0]]
+        deltas[after[0]] = (spent + after[1], outstanding + after[2])
+    post_customer_deltas(tenant.pk, deltas)
+
+
+def recompute_customer_totals(tenant):
+    """
+    Rebuild the summary of every customer of a tenant from two grouped
+    aggregates (orders and invoices, one row per customer each) and write
+    back only the customers that drifted. Returns how many changed.
+    """
+    orders = {
+        row['customer_id']: (row['count'], row['last_order'])
+        for row in SalesOrder.objects.filter(tenant=tenant).order_by().values('customer_id').annotate(
+            count=Count('pk'), last_order=Max(TruncDate('order_date', tzinfo=tenant_timezone(tenant))),
+        )
+    }
+    invoices = {
+        row['customer_id']: (row['spent'], row['outstanding'])
+        for row in Invoice.objects.filter(tenant=tenant).order_by().values('customer_id').annotate(
+            spent=Sum('paid_amount'),
+            outstanding=Sum('balance_due', filter=~Q(status__in=UNBILLED_STATUSES)),
+        )
+    }
+
+    changed = []
+    customers = Customer.objects.filter(tenant=tenant).only('pk', *SUMMARY_FIELDS).order_by()
+    for customer in customers.iterator(chunk_size=2000):
+        count, last_order = orders.get(customer.pk, (0, None))
+        spent, outstanding = invoices.get(customer.pk, (ZERO, ZERO))
+        # Quantized so backends that sum decimals in floating point (SQLite) compare exactly
+        expected = (count, last_order, Decimal(spent or 0).quantize(ZERO), Decimal(outstanding or 0).quantize(ZERO))
+        if expected != tuple(getattr(customer, field) for field in SUMMARY_FIELDS):
+            (customer.total_orders, customer.last_order_date,
+             customer.total_spent, customer.outstanding_balance) = expected
+            changed.append(customer)
+
+    if changed:
+        Customer.objects.bulk_update(changed, SUMMARY_FIELDS, batch_size=500)
+        invalidate_snapshots(tenant.pk, 'customers')
+    return len(changed)
@@ -0,0 +1,81 @@
+"""
+Invoicing sales orders in bulk.
+
+invoice_orders() turns orders into draft invoices without going through
+InvoiceSerializer: orders that already have an invoice are dropped with one
+anti-join, the order lines are read in one query and copied with
+bulk_create, and the invoice numbers come from a single reserved block.
+
+The bulk writes send no signals. New invoices are drafts, which neither
+daily rollups nor customer totals count, so only the sales dashboard
+snapshot needs dropping; sending the invoices later goes through save() as
+usual.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from tenants.sequences import reserve_document_numbers
+from tenants.snapshots import invalidate_snapshots
+
+from .models import Invoice, InvoiceItem, SalesOrder, SalesOrderItem
+
+# Orders the bulk endpoint and command invoice
+BILLABLE_ORDERS = ~Q(status__in=['draft', 'cancelled'])
+
+PAYMENT_TERMS = 'net_30'
+PAYMENT_DAYS = 30
+
+BATCH_SIZE = 500
+
+
+def uninvoiced(orders):
+    """Orders without any invoice (a LEFT JOIN anti-join)"""
+    return orders.filter(invoices__isnull=True)
+
+
+def invoice_orders(tenant, user, orders, limit=None, now=None):
+    """
+    Create one draft invoice per order in `orders` that has none yet, copying
+    its totals and lines, and return the invoices (ordered like the orders'
+    primary keys). At most `limit` orders are converted.
+    """
+    now = now or timezone.now()
+    with transaction.atomic():
+        # Through a subquery so list filters (joins, distinct) never reach the locking query
+        candidates = uninvoiced(
+            SalesOrder.objects.filter(tenant=tenant, pk__in=orders.order_by().values('pk'))
+        ).select_for_update(of=('self',)).order_by('pk')
+        locked = list(candidates.values_list('pk', flat=True)[:limit])
+        # Re-check after locking: a concurrent batch that held these orders
+        # has committed its invoices by now, and this query sees them
+        orders = list(uninvoiced(SalesOrder.objects.filter(pk__in=locked)).order_by('pk'))
+        if not orders:
+            return []
+
+        numbers = iter(reserve_document_numbers(tenant, 'invoice', len(orders)))
+        invoices = Invoice.objects.bulk_create([
+            Invoice(
+                tenant=tenant, invoice_number=next(numbers), sales_order=order, customer_id=order.customer_id,
+                invoice_date=now, due_date=now + timedelta(days=PAYMENT_DAYS), payment_terms=PAYMENT_TERMS,
+                subtotal=order.subtotal, tax_amount=order.tax_amount, discount_amount=order.discount_amount,
+                total_amount=order.total_amount, notes=order.notes, created_by=user,
+            )
+            for order in orders
+        ], batch_size=BATCH_SIZE)
+
+        invoice_ids = {invoice.sales_order_id: invoice.pk for invoice in invoices}
+        lines = SalesOrderItem.objects.filter(sales_order__in=invoice_ids).order_by('sales_order', 'pk')
+        InvoiceItem.objects.bulk_create((
+            InvoiceItem(
+                tenant=tenant, invoice_id=invoice_ids[line.sales_order_id], product_id=line.product_id,
+                quantity=line.quantity, unit_price=line.unit_price, discount_percent=line.discount_percent,
+                line_total=line.line_total, notes=line.notes,
+            )
+            for line in lines.iterator(chunk_size=2000)
+        ), batch_size=BATCH_SIZE)
+
+    invalidate_snapshots(tenant.pk, 'sales')
+    return invoices
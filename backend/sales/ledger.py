@@ -0,0 +1,114 @@
+"""
+Invoice payment ledger.
+
+Invoice.paid_amount is the running total of the invoice's completed
+payments. Posting a payment shifts it by that payment's contribution with an
+F() expression while the invoice row is locked (select_for_update), so each
+posting costs O(1) regardless of how many payments the invoice has and two
+concurrent payments can never overwrite each other. The status is derived
+from the locked, updated total in the same step. Draft and cancelled
+invoices keep their status whatever is paid against them.
+
+Marking an invoice paid (settle_invoice) records a completed payment for
+the remaining balance, so paid_amount always equals the invoice's
+completed payments.
+
+`manage.py reconcile_invoice_payments` recomputes the totals set-based to
+detect (and optionally repair) drift.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Invoice, Payment
+
+ZERO = Decimal('0.00')
+
+# Statuses the ledger moves invoices out of when payments are reversed
+PAYMENT_STATUSES = ('paid', 'partially_paid')
+
+# Statuses payments never change
+FIXED_STATUSES = ('draft', 'cancelled')
+
+
+def payment_contribution(payment):
+    """What a payment adds to its invoice's paid_amount"""
+    return payment.amount if payment.status == 'completed' else ZERO
+
+
+def payment_status(invoice, paid_amount):
+    """Invoice status implied by a new paid amount"""
+    if invoice.status in FIXED_STATUSES:
+        return invoice.status
+    if paid_amount >= invoice.total_amount and paid_amount > 0:
+        return 'paid'
+    if paid_amount > 0:
+        return 'partially_paid'
+    if invoice.status in PAYMENT_STATUSES or invoice.status == 'overdue':
+        return 'overdue' if invoice.is_overdue else 'sent'
+    return invoice.status
+
+
+def post_payment_deltas(deltas):
+    """
+    Apply {invoice_id: amount} changes to paid_amount and re-derive each
+    invoice's status. Rows are locked in primary key order so concurrent
+    postings touching several invoices cannot deadlock.
+    """
+    deltas = {invoice_id: delta for invoice_id, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    # Callers usually hold a transaction already; only the lock scope is needed here
+    with transaction.atomic(savepoint=False):
+        invoices = Invoice.objects.select_for_update().filter(pk__in=deltas.keys()).order_by('pk')
+        for invoice in invoices:
+            paid_amount = invoice.paid_amount + deltas[invoice.pk]
+            invoice.status = payment_status(invoice, paid_amount)
+            invoice.paid_amount = F('paid_amount') + deltas[invoice.pk]
+            invoice.save(update_fields=['paid_amount', 'status'])
+            invoice.paid_amount = paid_amount
+
+
+def post_payment_change(before, after):
+    """
+    Post the difference between two states of a payment, each given as
+    (invoice_id, contribution) or None for "did not exist".
+    """
+    deltas = defaultdict(lambda: ZERO)
+    if before is not None:
+        deltas[before[0]] -= before[1]
+    if after is not None:
+        deltas[after[0]] += after[1]
+    post_payment_deltas(deltas)
+
+
+def settle_invoice(invoice, user):
+    """
+    Record a completed payment for the invoice's remaining balance and post
+    it. Returns the payment, or None if nothing was left to pay.
+    """
+    with transaction.atomic():
+        invoice = Invoice.objects.select_for_update().get(pk=invoice.pk)
+        if invoice.status == 'draft':
+            # Paying a draft issues it, so the payment can move it to paid
+            invoice.status = 'sent'
+            invoice.save(update_fields=['status'])
+        balance = invoice.total_amount - invoice.paid_amount
+        if balance <= 0:
+            # Already covered by payments; only the status is behind
+            invoice.status = payment_status(invoice, invoice.paid_amount)
+            invoice.save(update_fields=['status'])
+            return None
+        
+        now = timezone.now()
+        payment = Payment.objects.create(
+            tenant_id=invoice.tenant_id, invoice=invoice, customer_id=invoice.customer_id,
+            payment_date=now, amount=balance, payment_method='other', status='completed',
+            notes='Recorded when the invoice was marked as paid', created_by=user, processed_at=now,
+        )
+        post_payment_change(None, (invoice.pk, payment_contribution(payment)))
+    return payment
@@ -0,0 +1,61 @@
+"""
+Create draft invoices for a tenant's billable sales orders that have none.
+
+    python manage.py invoice_sales_orders --tenant <slug> [--user <username>]
+        [--status confirmed ...] [--until YYYY-MM-DD] [--batch-size N]
+
+Orders are converted in batches of --batch-size (default
+INVOICE_BATCH_MAX), each in its own transaction with one reserved block of
+invoice numbers, so an interrupted run can simply be repeated.
+"""
+from datetime import datetime, time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sales.invoicing import BILLABLE_ORDERS, invoice_orders
+from sales.models import SalesOrder
+from tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Invoice every billable sales order of a tenant that has no invoice yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', required=True, dest='slug', metavar='SLUG')
+        parser.add_argument('--user', help='Username recorded as the invoices\' creator')
+        parser.add_argument('--status', action='append', dest='statuses',
+                            choices=[value for value, _ in SalesOrder.STATUS_CHOICES],
+                            help='Only orders in this status (repeatable)')
+        parser.add_argument('--until', help='Only orders dated on or before this day (YYYY-MM-DD)')
+        parser.add_argument('--batch-size', type=int, default=settings.INVOICE_BATCH_MAX)
+
+    def handle(self, *args, **options):
+        tenant = Tenant.objects.filter(slug=options['slug']).first()
+        if tenant is None:
+            raise CommandError(f"Unknown tenant: {options['slug']}")
+        user = None
+        if options['user']:
+            user = User.objects.filter(username=options['user']).first()
+            if user is None:
+                raise CommandError(f"Unknown user: {options['user']}")
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        orders = SalesOrder.objects.filter(BILLABLE_ORDERS, tenant=tenant)
+        if options['statuses']:
+            orders = orders.filter(status__in=options['statuses'])
+        if options['until']:
+            try:
+                until = datetime.strptime(options['until'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--until must be YYYY-MM-DD')
+            orders = orders.filter(order_date__lte=timezone.make_aware(datetime.combine(until, time.max)))
+
+        total = 0
+        while invoices := invoice_orders(tenant, user, orders, limit=options['batch_size']):
+            total += len(invoices)
+            self.stdout.write(f"{invoices[0].invoice_number} .. {invoices[-1].invoice_number}")
+        self.stdout.write(self.style.SUCCESS(f"{tenant.slug}: created {total} invoices"))
@@ -0,0 +1,34 @@
+"""
+Recompute the daily sales rollups from invoices, payments and customers.
+
+    python manage.py rebuild_sales_rollups [--tenant <slug> ...]
+
+Needed after writes that bypass model signals (bulk imports, seed_erp is
+handled already) and after a tenant changes its timezone.
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from sales.rollups import rebuild_rollups
+from tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Recompute daily sales rollups for all or selected tenants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', action='append', dest='slugs', metavar='SLUG',
+                            help='Only rebuild this tenant (repeatable)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('slug')
+        if options['slugs']:
+            tenants = tenants.filter(slug__in=options['slugs'])
+            missing = set(options['slugs']) - set(tenants.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f"Unknown tenants: {', '.join(sorted(missing))}")
+
+        for tenant in tenants:
+            with transaction.atomic():
+                days = rebuild_rollups(tenant)
+            self.stdout.write(f"{tenant.slug}: {days} days")
@@ -0,0 +1,36 @@
+"""
+Recompute Customer.total_orders, last_order_date, total_spent and
+outstanding_balance from the customers' orders and invoices.
+
+    python manage.py recompute_customer_totals [--tenant <slug> ...]
+
+Writes normally keep the totals current (sales.customer_totals); this is for
+writes that bypass model signals, such as bulk imports or
+reconcile_invoice_payments --fix (which runs it for the tenants it repairs).
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from sales.customer_totals import recompute_customer_totals
+from tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Recompute customer financial summaries for all or selected tenants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', action='append', dest='slugs', metavar='SLUG',
+                            help='Only recompute this tenant (repeatable)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('slug')
+        if options['slugs']:
+            tenants = tenants.filter(slug__in=options['slugs'])
+            missing = set(options['slugs']) - set(tenants.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f"Unknown tenants: {', '.join(sorted(missing))}")
+
+        for tenant in tenants:
+            with transaction.atomic():
+                changed = recompute_customer_totals(tenant)
+            self.stdout.write(f"{tenant.slug}: {changed} customers updated")
@@ -0,0 +1,91 @@
+"""
+Check Invoice.paid_amount against the invoices' completed payments.
+
+    python manage.py reconcile_invoice_payments [--tenant <slug> ...] [--fix]
+
+The expected totals come from one grouped subquery per run, so the check is
+set-based rather than a loop over invoices. Without --fix drifted invoices
+are only reported; with --fix their paid_amount and payment status are
+rewritten in a single UPDATE and the affected tenants' customer totals are
+recomputed. Draft and cancelled invoices keep their status, as they do
+when payments are posted.
+"""
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, DecimalField, F, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce, Round
+from django.db.models.lookups import GreaterThan
+from django.utils import timezone
+
+from sales.customer_totals import recompute_customer_totals
+from sales.ledger import FIXED_STATUSES
+from sales.models import Invoice, Payment
+from tenants.models import Tenant
+
+SAMPLE_SIZE = 20
+
+
+def completed_payments_total():
+    totals = Payment.objects.filter(
+        invoice=OuterRef('pk'), status='completed'
+    ).order_by().values('invoice').annotate(total=Sum('amount')).values('total')
+    money = DecimalField(max_digits=12, decimal_places=2)
+    # Rounded so backends that sum decimals in floating point (SQLite) compare exactly
+    return Round(Coalesce(Subquery(totals, output_field=money), Value(Decimal('0.00')), output_field=money), 2)
+
+
+class Command(BaseCommand):
+    help = 'Detect (and with --fix repair) invoices whose paid_amount disagrees with their payments'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', action='append', dest='slugs', metavar='SLUG',
+                            help='Only check this tenant (repeatable)')
+        parser.add_argument('--fix', action='store_true', help='Rewrite drifted invoices')
+
+    def handle(self, *args, **options):
+        invoices = Invoice.objects.all()
+        if options['slugs']:
+            tenant_ids = list(Tenant.objects.filter(slug__in=options['slugs']).values_list('pk', flat=True))
+            if len(tenant_ids) != len(set(options['slugs'])):
+                raise CommandError('Unknown tenant slug')
+            invoices = invoices.filter(tenant_id__in=tenant_ids)
+
+        drifted = invoices.annotate(expected=completed_payments_total()).exclude(paid_amount=F('expected'))
+        count = drifted.count()
+        for invoice in drifted.select_related('tenant').order_by('tenant__slug', 'invoice_number')[:SAMPLE_SIZE]:
+            self.stdout.write(
+                f"{invoice.tenant.slug} {invoice.invoice_number}: paid_amount {invoice.paid_amount}, "
+                f"payments {invoice.expected}"
+            )
+        if count > SAMPLE_SIZE:
+            self.stdout.write(f"... and {count - SAMPLE_SIZE} more")
+
+        if not count:
+            self.stdout.write(self.style.SUCCESS('All invoices reconcile'))
+            return
+        if not options['fix']:
+            self.stdout.write(self.style.WARNING(f"{count} invoices drifted; rerun with --fix to repair"))
+            return
+
+        expected = completed_payments_total()
+        with transaction.atomic():
+            tenant_ids = set(drifted.values_list('tenant_id', flat=True))
+            fixed = Invoice.objects.filter(pk__in=drifted.values('pk')).update(
+                paid_amount=expected,
+                status=Case(
+                    When(Q(status__in=FIXED_STATUSES), then=F('status')),
+                    When(Q(total_amount__gt=0, total_amount__lte=expected), then=Value('paid')),
+                    When(GreaterThan(expected, Value(0)), then=Value('partially_paid')),
+                    When(Q(status__in=['paid', 'partially_paid', 'overdue'], due_date__lt=timezone.now()),
+                         then=Value('overdue')),
+                    When(Q(status__in=['paid', 'partially_paid']), then=Value('sent')),
+                    default=F('status'),
+                ),
+                updated_at=timezone.now(),
+            )
+            # The UPDATE sends no signals
+            for tenant in Tenant.objects.filter(pk__in=tenant_ids):
+                recompute_customer_totals(tenant)
+        self.stdout.write(self.style.SUCCESS(f"Repaired {fixed} invoices"))
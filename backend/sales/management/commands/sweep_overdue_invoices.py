@@ -0,0 +1,40 @@
+"""
+Move sent and partially paid invoices past their due date to 'overdue'.
+
+    python manage.py sweep_overdue_invoices [--tenant <slug> ...]
+
+Meant to run on a schedule, e.g. hourly from cron:
+
+    0 * * * * cd /srv/backend && python manage.py sweep_overdue_invoices
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sales.overdue import sweep_overdue_invoices
+from tenants.models import Tenant
+
+
+class Command(BaseCommand):
+    help = 'Mark open invoices past their due date as overdue for all or selected tenants'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tenant', action='append', dest='slugs', metavar='SLUG',
+                            help='Only sweep this tenant (repeatable)')
+
+    def handle(self, *args, **options):
+        tenants = Tenant.objects.order_by('slug')
+        if options['slugs']:
+            tenants = tenants.filter(slug__in=options['slugs'])
+            missing = set(options['slugs']) - set(tenants.values_list('slug', flat=True))
+            if missing:
+                raise CommandError(f"Unknown tenants: {', '.join(sorted(missing))}")
+
+        # One cut-off for the whole run
+        now = timezone.now()
+        total = 0
+        for tenant in tenants:
+            swept = sweep_overdue_invoices(tenant, now)
+            total += swept
+            if swept:
+                self.stdout.write(f"{tenant.slug}: {swept} invoices overdue")
+        self.stdout.write(self.style.SUCCESS(f"Marked {total} invoices overdue"))
@@ -0,0 +1,21 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:11
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_customer_summary_indexes'),
+        ('sales', '0003_dailysalesrollup'),
+        ('tenants', '0003_documentsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['tenant', 'status', 'due_date'], name='sales_invoi_tenant__f879a0_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-17 03:26
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0003_customer_summary_indexes'),
+        ('sales', '0004_invoice_tenant_status_due_date'),
+        ('tenants', '0003_documentsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['tenant', 'created_at', 'id'], name='sales_invoi_tenant__0c4bb5_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['tenant', 'created_at', 'id'], name='sales_payme_tenant__6e7f2e_idx'),
+        ),
+    ]
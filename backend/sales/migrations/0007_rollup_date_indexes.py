@@ -0,0 +1,25 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0004_rollup_date_indexes'),
+        ('sales', '0006_invoice_balance_due'),
+        ('tenants', '0003_documentsequence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='invoice',
+            index=models.Index(fields=['tenant', 'invoice_date'], name='sales_invoi_tenant__a25ee9_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['tenant', 'payment_date'], name='sales_payme_tenant__76887e_idx'),
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.0.6 on 2026-10-17 04:31
+
+from django.db import migrations, models
+
+
+def rebuild_all_rollups(apps, schema_editor):
+    """
+    Fill the rollups for history written before they were maintained, so
+    later deltas start from the true totals. Uses the live rebuild (one
+    grouped query per source and tenant) rather than a frozen copy of it.
+    """
+    from sales.rollups import rebuild_rollups
+    from tenants.models import Tenant
+
+    for tenant in Tenant.objects.only('pk', 'timezone').iterator():
+        rebuild_rollups(tenant)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_rollup_date_indexes'),
+        ('customers', '0004_rollup_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='dailysalesrollup',
+            name='invoice_count',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='dailysalesrollup',
+            name='new_customers',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(rebuild_all_rollups, migrations.RunPython.noop),
+    ]
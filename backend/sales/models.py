@@ -1,12 +1,65 @@
 from django.db import models
 from django.contrib.auth.models import User
 from decimal import Decimal
+from types import SimpleNamespace
 from customers.models import Customer
 from inventory.models import Product
 from tenants.models import Tenant
-
-
-class SalesOrder(models.Model):
+from tenants.sequences import next_document_number
+
+
+def calculate_line_total(quantity, unit_price, discount_percent):
+    """Line total after discount, rounded the way the DecimalField stores it"""
+    discount_amount = (unit_price * quantity * discount_percent) / 100
+    return ((unit_price * quantity) - discount_amount).quantize(Decimal('0.01'))
+
+
+class LoadedStateMixin:
+    """
+    Remembers the values a row was loaded with (Django's from_db() recipe),
+    so the signal handlers in sales.signals can post what a save changed
+    without re-reading the row. Loading costs one tuple per instance;
+    nothing is compared unless the instance is saved.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded = (field_names, values)
+        return instance
+
+    def loaded_values(self, fields):
+        """
+        The given attnames as stored before this save (None for new rows).
+        Fields that were deferred when loading are read from the database.
+        """
+        if self._state.adding:
+            return None
+        loaded = dict(zip(*self._loaded)) if getattr(self, '_loaded', None) else {}
+        missing = [field for field in fields if field not in loaded]
+        if missing:
+            stored = type(self)._base_manager.filter(pk=self.pk).values(*missing).first()
+            if stored is None:
+                return None
+            loaded.update(stored)
+        return SimpleNamespace(**{field: loaded[field] for field in fields})
+
+    def remember_loaded(self, fields):
+        """Treat the current values of `fields` as what the database holds"""
+        loaded = dict(zip(*self._loaded)) if getattr(self, '_loaded', None) else {}
+        loaded.update((field, self.__dict__[field]) for field in fields if field in self.__dict__)
+        self._loaded = (tuple(loaded), tuple(loaded.values()))
+
+    def refresh_from_db(self, using=None, fields=None):
+        super().refresh_from_db(using=using, fields=fields)
+        if fields is None:
+            attnames = [field.attname for field in self._meta.concrete_fields]
+        else:
+            attnames = [self._meta.get_field(name).attname for name in fields]
+        self.remember_loaded(attnames)
+
+
+class SalesOrder(LoadedStateMixin, models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('confirmed', 'Confirmed'),
@@ -70,13 +123,7 @@ class SalesOrder(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.order_number:
-            # Generate order number
-            last_order = SalesOrder.objects.filter(tenant=self.tenant).order_by('-id').first()
-            if last_order:
-                last_num = int(last_order.order_number.split('-')[-1])
-                self.order_number = f"SO-{last_num + 1:06d}"
-            else:
-                self.order_number = "SO-000001"
+            self.order_number = next_document_number(self.tenant, 'sales_order')
         super().save(*args, **kwargs)
 
 
@@ -103,12 +150,11 @@ class SalesOrderItem(models.Model):
 
     def save(self, *args, **kwargs):
         # Calculate line total
-        discount_amount = (self.unit_price * self.quantity * self.discount_percent) / 100
-        self.line_total = (self.unit_price * self.quantity) - discount_amount
+        self.line_total = calculate_line_total(self.quantity, self.unit_price, self.discount_percent)
         super().save(*args, **kwargs)
 
 
-class Invoice(models.Model):
+class Invoice(LoadedStateMixin, models.Model):
     STATUS_CHOICES = [
         ('draft', 'Draft'),
         ('sent', 'Sent'),
@@ -149,6 +195,12 @@ class Invoice(models.Model):
     discount_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
     total_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
     paid_amount = models.DecimalField(max_digits=12, decimal_places=2, default=Decimal('0.00'))
+    # Stored column computed by the database, so lists can filter and sort by it
+    balance_due = models.GeneratedField(
+        expression=models.F('total_amount') - models.F('paid_amount'),
+        output_field=models.DecimalField(max_digits=12, decimal_places=2),
+        db_persist=True,
+    )
     
     # Additional information
     notes = models.TextField(blank=True, null=True)
@@ -170,15 +222,19 @@ class Invoice(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['invoice_date']),
             models.Index(fields=['due_date']),
+            # Daily rollup rebuilds and date-range reads
+            models.Index(fields=['tenant', 'invoice_date']),
+            # Overdue sweep, status filters and dashboard counts
+            models.Index(fields=['tenant', 'status', 'due_date']),
+            # Keyset pagination (tenants.pagination)
+            models.Index(fields=['tenant', 'created_at', 'id']),
+            # Collections lists sorted and filtered by outstanding balance
+            models.Index(fields=['tenant', 'balance_due']),
         ]
 
     def __str__(self):
         return f"{self.invoice_number} - {self.customer.name}"
 
-    @property
-    def balance_due(self):
-        return self.total_amount - self.paid_amount
-
     @property
     def is_overdue(self):
         from django.utils import timezone
@@ -186,14 +242,14 @@ class Invoice(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.invoice_number:
-            # Generate invoice number
-            last_invoice = Invoice.objects.filter(tenant=self.tenant).order_by('-id').first()
-            if last_invoice:
-                last_num = int(last_invoice.invoice_number.split('-')[-1])
-                self.invoice_number = f"INV-{last_num + 1:06d}"
-            else:
-                self.invoice_number = "INV-000001"
+            self.invoice_number = next_document_number(self.tenant, 'invoice')
         super().save(*args, **kwargs)
+        # Updates don't read generated columns back; mirror the database's value
+        # when both amounts are known, otherwise reload it on next access
+        if isinstance(self.total_amount, Decimal) and isinstance(self.paid_amount, Decimal):
+            self.balance_due = self.total_amount - self.paid_amount
+        else:
+            self.__dict__.pop('balance_due', None)
 
 
 class InvoiceItem(models.Model):
@@ -219,12 +275,11 @@ class InvoiceItem(models.Model):
 
     def save(self, *args, **kwargs):
         # Calculate line total
-        discount_amount = (self.unit_price * self.quantity * self.discount_percent) / 100
-        self.line_total = (self.unit_price * self.quantity) - discount_amount
+        self.line_total = calculate_line_total(self.quantity, self.unit_price, self.discount_percent)
         super().save(*args, **kwargs)
 
 
-class Payment(models.Model):
+class Payment(LoadedStateMixin, models.Model):
     PAYMENT_METHOD_CHOICES = [
         ('cash', 'Cash'),
         ('bank_transfer', 'Bank Transfer'),
@@ -277,6 +332,9 @@ class Payment(models.Model):
             models.Index(fields=['customer']),
             models.Index(fields=['payment_date']),
             models.Index(fields=['status']),
+            # Daily rollup rebuilds and date-range reads
+            models.Index(fields=['tenant', 'payment_date']),
+            models.Index(fields=['tenant', 'created_at', 'id']),
         ]
 
     def __str__(self):
@@ -284,11 +342,29 @@ class Payment(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.payment_number:
-            # Generate payment number
-            last_payment = Payment.objects.filter(tenant=self.tenant).order_by('-id').first()
-            if last_payment:
-                last_num = int(last_payment.payment_number.split('-')[-1])
-                self.payment_number = f"PAY-{last_num + 1:06d}"
-            else:
-                self.payment_number = "PAY-000001"
-        super().save(*args, **kwargs)
\ No newline at end of file
+            self.payment_number = next_document_number(self.tenant, 'payment')
+        super().save(*args, **kwargs)
+
+
+class DailySalesRollup(models.Model):
+    """
+    Per-tenant daily sales totals, bucketed by the tenant's local date.
+    Maintained by sales.rollups from invoice, payment and customer writes.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='daily_sales_rollups')
+    date = models.DateField()
+    
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    # Signed, so a decrement for a document the rollup never counted cannot fail
+    invoice_count = models.IntegerField(default=0)
+    paid_amount = models.DecimalField(max_digits=14, decimal_places=2, default=Decimal('0.00'))
+    new_customers = models.IntegerField(default=0)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['date']
+        unique_together = [['tenant', 'date']]
+
+    def __str__(self):
+        return f"{self.tenant_id} - {self.date}"
@@ -0,0 +1,42 @@
+"""
+Overdue invoice sweep.
+
+Invoices past their due date are persisted as status 'overdue' so list
+filters and dashboard counts are plain lookups on the (tenant, status,
+due_date) index instead of re-deriving overdue-ness from due_date on every
+read. `manage.py sweep_overdue_invoices` moves every open invoice whose due
+date has passed with one UPDATE per tenant; schedule it (cron) at least as
+often as due dates should be reflected, e.g. hourly. Until the next run,
+`overdue_q` also matches open invoices that have fallen due meanwhile, so
+reads never depend on the sweep having run.
+
+The sweep sends no signals. It touches nothing that rollups or customer
+totals read (both count sent and overdue invoices alike), bumps updated_at
+so cached PDFs re-render with the new status, and drops the tenant's sales
+dashboard snapshot.
+"""
+from django.db.models import F, Q
+from django.utils import timezone
+
+from tenants.snapshots import invalidate_snapshots
+
+from .models import Invoice
+
+# Statuses that become overdue once the due date passes
+OPEN_STATUSES = ('sent', 'partially_paid')
+
+
+def overdue_q(now=None):
+    """Invoices swept to overdue, plus open ones past due that the sweep has not reached yet"""
+    return Q(status='overdue') | Q(status__in=OPEN_STATUSES, due_date__lt=now or timezone.now())
+
+
+def sweep_overdue_invoices(tenant, now=None):
+    """Mark a tenant's open invoices past due as overdue; returns how many moved"""
+    now = now or timezone.now()
+    swept = Invoice.objects.filter(
+        tenant=tenant, status__in=OPEN_STATUSES, due_date__lt=now, paid_amount__lt=F('total_amount')
+    ).update(status='overdue', updated_at=now)
+    if swept:
+        invalidate_snapshots(tenant.pk, 'sales')
+    return swept
@@ -0,0 +1,181 @@
+"""
+Rendered invoice PDF store.
+
+Rendering an invoice through WeasyPrint is slow and memory hungry, while the
+same invoice is typically downloaded many times. Rendered files are kept on
+disk under INVOICE_PDF_CACHE_DIR/<tenant>/<invoice>/<version>.pdf, where the
+version hashes everything the template shows: the invoice, its items, the
+customer and the tenant branding. A stale file is therefore never served,
+and the signal handlers in sales.signals remove an invoice's files as soon as
+it changes so the directory does not fill up with old versions.
+
+Bulk exports render the missing PDFs in parallel on the workers and stream
+them into a ZIP one entry at a time. The response status is sent before the
+first entry, so a render failure part-way through is logged and the archive
+is closed cleanly with an EXPORT-ERROR.txt entry naming what is missing.
+"""
+from collections import deque
+from pathlib import Path
+import hashlib
+import io
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+
+from django.conf import settings
+from django.template.loader import get_template, render_to_string
+
+from .pdf_workers import PdfRenderError, render_pdf, stylesheet_path, submit_pdf, wait_for_pdf
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_NAME = 'invoice_template.html'
+
+# Header fields shown on the PDF that narrow saves (update_fields) change
+# without bumping updated_at
+_VERSIONED_FIELDS = ('status', 'subtotal', 'tax_amount', 'discount_amount', 'total_amount', 'paid_amount')
+
+
+def _cache_root():
+    return Path(settings.INVOICE_PDF_CACHE_DIR)
+
+
+def invoice_cache_dir(tenant_id, invoice_id=None):
+    path = _cache_root() / str(tenant_id)
+    return path / str(invoice_id) if invoice_id is not None else path
+
+
+def invoice_pdf_version(invoice, tenant):
+    """Hash of everything the rendered PDF depends on"""
+    parts = [invoice.updated_at.isoformat()]
+    parts += [str(getattr(invoice, field)) for field in _VERSIONED_FIELDS]
+    # Uses the prefetched items when the view loaded them
+    parts += [f'{item.pk}:{item.updated_at.isoformat()}' for item in invoice.items.all()]
+    parts.append(invoice.customer.updated_at.isoformat())
+    parts.append(tenant.updated_at.isoformat())
+    parts.append(str(os.stat(get_template(TEMPLATE_NAME).origin.name).st_mtime_ns))
+    parts.append(str(os.stat(stylesheet_path()).st_mtime_ns))
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:32]
+
+
+def render_invoice_html(invoice, tenant):
+    return render_to_string(TEMPLATE_NAME, {
+        'invoice': invoice,
+        'tenant': tenant,
+    })
+
+
+def render_invoice_pdf(invoice, tenant):
+    """Render an invoice to PDF bytes on the rendering workers"""
+    return render_pdf(render_invoice_html(invoice, tenant))
+
+
+def _pdf_path(invoice, tenant):
+    return invoice_cache_dir(tenant.pk, invoice.pk) / f'{invoice_pdf_version(invoice, tenant)}.pdf'
+
+
+def _store_pdf(path, pdf):
+    directory = path.parent
+    directory.mkdir(parents=True, exist_ok=True)
+    # Write under a temporary name and rename so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(pdf)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+    for stale in directory.glob('*.pdf'):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+def get_invoice_pdf(invoice, tenant):
+    """
+    Return the path of the invoice's rendered PDF, rendering and storing it
+    first if the current version is not on disk yet.
+    """
+    path = _pdf_path(invoice, tenant)
+    if path.exists():
+        return path
+    return _store_pdf(path, render_invoice_pdf(invoice, tenant))
+
+
+def iter_invoice_pdfs(invoices, tenant):
+    """
+    Yield (invoice, path) for each invoice in order. Missing PDFs are
+    rendered concurrently on the workers, keeping at most
+    PDF_RENDER_WORKERS jobs in flight so memory stays bounded.
+    """
+    window = max(settings.PDF_RENDER_WORKERS, 1)
+    pending = deque()
+    for invoice in invoices:
+        path = _pdf_path(invoice, tenant)
+        future = None
+        if not path.exists():
+            future = submit_pdf(render_invoice_html(invoice, tenant), wait=settings.PDF_RENDER_TIMEOUT)
+        pending.append((invoice, path, future))
+
+        while pending and (len(pending) > window or pending[0][2] is None or pending[0][2].done()):
+            yield _finish(*pending.popleft())
+
+    while pending:
+        yield _finish(*pending.popleft())
+
+
+def _finish(invoice, path, future):
+    if future is not None:
+        _store_pdf(path, wait_for_pdf(future))
+    return invoice, path
+
+
+class _ZipBuffer(io.RawIOBase):
+    """Write-only sink the ZIP is written into and drained from between entries"""
+
+    def __init__(self):
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_invoice_pdf_zip(invoices, tenant):
+    """Yield a ZIP archive of the invoices' PDFs chunk by chunk, one entry at a time"""
+    buffer = _ZipBuffer()
+    exported = 0
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_STORED) as archive:
+        try:
+            for invoice, path in iter_invoice_pdfs(invoices, tenant):
+                # PDFs are already compressed, so entries are stored as-is
+                archive.write(path, arcname=f'Invoice-{invoice.invoice_number}.pdf')
+                exported += 1
+                yield buffer.drain()
+        except (PdfRenderError, OSError) as e:
+            logger.exception(f"Invoice PDF export for tenant {tenant.pk} stopped after {exported} invoices")
+            archive.writestr('EXPORT-ERROR.txt', (
+                f"The export stopped early: {exported} invoice PDFs were added before one could not be rendered ({e}).\n"
+                "Invoices missing from this archive can be downloaded again with a narrower filter.\n"
+            ))
+    yield buffer.drain()
+
+
+def invalidate_invoice_pdf(tenant_id, invoice_id):
+    shutil.rmtree(invoice_cache_dir(tenant_id, invoice_id), ignore_errors=True)
+
+
+def invalidate_tenant_pdfs(tenant_id):
+    shutil.rmtree(invoice_cache_dir(tenant_id), ignore_errors=True)
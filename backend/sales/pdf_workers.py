@@ -0,0 +1,182 @@
+"""
+Warm PDF rendering workers.
+
+WeasyPrint is imported, its font configuration built and the invoice
+stylesheet parsed once per worker process; requests only hand over the
+rendered HTML and wait for the PDF bytes. Slow renders therefore run outside
+the API worker threads, and submissions are bounded: when every worker is
+busy and PDF_RENDER_QUEUE_SIZE jobs are already waiting, render_pdf fails
+fast with PdfQueueFull instead of piling up requests.
+
+PDF_RENDER_TIMEOUT bounds how long a request waits, not the render itself: a
+job that times out while still queued is cancelled, but one a worker has
+started runs to completion and keeps its worker and queue slot until then.
+Slots are therefore released only when a job's future finishes, so the
+queue bound always matches the work the pool really holds.
+
+With PDF_RENDER_WORKERS = 0 documents are rendered in the calling process,
+still reusing one parsed stylesheet per process.
+"""
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import threading
+
+from django.conf import settings
+from django.template.loader import get_template
+
+STYLESHEET_NAME = 'invoice_template.css'
+
+
+class PdfRenderError(Exception):
+    pass
+
+
+class PdfQueueFull(PdfRenderError):
+    pass
+
+
+class PdfRenderTimeout(PdfRenderError):
+    pass
+
+
+class Renderer:
+    """WeasyPrint with fonts and stylesheet loaded once"""
+
+    def __init__(self, stylesheet_path):
+        from weasyprint import CSS, HTML
+        from weasyprint.text.fonts import FontConfiguration
+
+        self._html = HTML
+        self.font_config = FontConfiguration()
+        self.stylesheets = [CSS(filename=stylesheet_path, font_config=self.font_config)]
+
+    def render(self, html):
+        return self._html(string=html).write_pdf(stylesheets=self.stylesheets, font_config=self.font_config)
+
+
+def stylesheet_path():
+    return get_template(STYLESHEET_NAME).origin.name
+
+
+# Worker side
+
+_worker_renderer = None
+
+
+def _init_worker(path):
+    global _worker_renderer
+    _worker_renderer = Renderer(path)
+    _worker_renderer.render('<html><body></body></html>')  # Load fonts before the first real job
+
+
+def _render_in_worker(html):
+    return _worker_renderer.render(html)
+
+
+# Web process side
+
+_lock = threading.Lock()
+_local_renderer = None
+_pool = None
+_slots = None
+
+
+def _get_local_renderer():
+    global _local_renderer
+    with _lock:
+        if _local_renderer is None:
+            _local_renderer = Renderer(stylesheet_path())
+        return _local_renderer
+
+
+def _get_pool():
+    global _pool, _slots
+    with _lock:
+        if _pool is None:
+            workers = settings.PDF_RENDER_WORKERS
+            # spawn: never fork a process that may be running request threads
+            _pool = ProcessPoolExecutor(
+                workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker,
+                initargs=(stylesheet_path(),),
+            )
+            _slots = threading.BoundedSemaphore(workers + settings.PDF_RENDER_QUEUE_SIZE)
+        return _pool, _slots
+
+
+def shutdown_pool():
+    """Stop the worker processes; the next render starts a fresh pool"""
+    global _pool, _slots
+    with _lock:
+        pool, _pool, _slots = _pool, None, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_failed(error):
+    failure = PdfRenderError(f"PDF rendering failed: {error}")
+    failure.__cause__ = error
+    return failure
+
+
+def submit_pdf(html, wait=0):
+    """
+    Queue an HTML document for rendering and return a Future of the PDF
+    bytes. Waits up to `wait` seconds for a free queue slot before raising
+    PdfQueueFull; a job keeps its slot until its worker finishes it.
+    Render failures surface as PdfRenderError from the future.
+    """
+    if not settings.PDF_RENDER_WORKERS:
+        future = Future()
+        try:
+            future.set_result(_get_local_renderer().render(html))
+        except Exception as e:
+            future.set_exception(_render_failed(e))
+        return future
+
+    pool, slots = _get_pool()
+    acquired = slots.acquire(timeout=wait) if wait else slots.acquire(blocking=False)
+    if not acquired:
+        raise PdfQueueFull('All PDF workers are busy')
+    try:
+        future = pool.submit(_render_in_worker, html)
+    except BaseException:
+        slots.release()
+        raise
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def wait_for_pdf(future, timeout=None):
+    """
+    PDF bytes of a submitted job, waiting at most `timeout` (default
+    PDF_RENDER_TIMEOUT) seconds. The timeout only stops the wait; a render
+    already running finishes on its worker (see the module docstring).
+    """
+    try:
+        return future.result(timeout=timeout if timeout is not None else settings.PDF_RENDER_TIMEOUT)
+    except FutureTimeoutError:
+        # Only succeeds for a job no worker has picked up yet
+        future.cancel()
+        raise PdfRenderTimeout('PDF rendering timed out')
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise PdfRenderError('A PDF worker exited unexpectedly')
+    except PdfRenderError:
+        raise
+    except Exception as e:
+        # Raised by WeasyPrint inside a worker
+        raise _render_failed(e)
+
+
+def render_pdf(html, timeout=None):
+    """
+    Render an HTML document to PDF bytes on the worker pool.
+
+    Raises PdfQueueFull when the pool is saturated and PdfRenderTimeout when
+    the render takes longer than `timeout` (default PDF_RENDER_TIMEOUT)
+    seconds to come back.
+    """
+    return wait_for_pdf(submit_pdf(html), timeout)
@@ -0,0 +1,220 @@
+"""
+Daily sales rollups and the time series read from them.
+
+DailySalesRollup holds one row per tenant and local calendar day (in
+Tenant.timezone) with invoiced revenue, invoice count, completed payment
+amount and new customers. Writes post deltas: the signal handlers in
+sales.signals compare what an invoice, payment or customer contributed
+before and after the write (the same contribution tracking as the
+customer totals) and shift the affected days' columns with F()
+expressions. Concurrent writes on the same day therefore add up instead
+of overwriting each other, and a write never scans the day's documents.
+Series queries then read one row per day and group by week/month in the
+database, independent of how many invoices the tenant has.
+
+Bulk writes that bypass signals (seed_erp, imports) and tenant timezone
+changes are reconciled with `manage.py rebuild_sales_rollups`.
+"""
+from datetime import timedelta
+from decimal import Decimal
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from django.db import transaction
+from django.db.models import Count, DecimalField, F, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncDate, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from customers.models import Customer
+
+from .models import DailySalesRollup, Invoice, Payment
+
+GRANULARITIES = ('day', 'week', 'month')
+
+# Invoices that are not owed yet or no longer owed, and count towards no revenue
+UNBILLED_STATUSES = ('draft', 'cancelled')
+REVENUE_FILTER = ~Q(status__in=UNBILLED_STATUSES)
+
+ZERO = Decimal('0.00')
+
+# source -> (model, date field, filter, {rollup column: aggregate})
+SOURCES = {
+    'invoices': (Invoice, 'invoice_date', REVENUE_FILTER, {
+        'revenue': Sum('total_amount'),
+        'invoice_count': Count('pk'),
+    }),
+    'payments': (Payment, 'payment_date', Q(status='completed'), {
+        'paid_amount': Sum('amount'),
+    }),
+    'customers': (Customer, 'created_at', Q(), {
+        'new_customers': Count('pk'),
+    }),
+}
+
+METRICS = ('revenue', 'invoice_count', 'paid_amount', 'new_customers')
+
+
+def tenant_timezone(tenant):
+    try:
+        return ZoneInfo(tenant.timezone or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo('UTC')
+
+
+def local_date(value, tz):
+    return value.astimezone(tz).date()
+
+
+# Fields each document's contribution is computed from
+INVOICE_ROLLUP_FIELDS = ('invoice_date', 'status', 'total_amount')
+PAYMENT_ROLLUP_FIELDS = ('payment_date', 'status', 'amount')
+
+
+def invoice_rollup(invoice):
+    """(moment, {column: value}) an invoice adds to its day, or None"""
+    if invoice.status in UNBILLED_STATUSES:
+        return None
+    return invoice.invoice_date, {'revenue': invoice.total_amount, 'invoice_count': 1}
+
+
+def payment_rollup(payment):
+    if payment.status != 'completed':
+        return None
+    return payment.payment_date, {'paid_amount': payment.amount}
+
+
+def customer_rollup(customer):
+    return customer.created_at, {'new_customers': 1}
+
+
+def _upsert(rows, columns):
+    DailySalesRollup.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['tenant', 'date'],
+        update_fields=[*columns, 'updated_at'],
+    )
+
+
+def _increment(tenant, day, deltas):
+    return DailySalesRollup.objects.filter(tenant=tenant, date=day).update(
+        **{column: F(column) + delta for column, delta in deltas.items()}, updated_at=timezone.now()
+    )
+
+
+def post_rollup_deltas(tenant, deltas, create=True):
+    """
+    Apply {local date: {column: delta}} changes. Missing days are created
+    unless create=False (deletes, which may be part of the tenant's own
+    cascade). Days are updated in date order so concurrent writes touching
+    several days cannot deadlock.
+    """
+    with transaction.atomic(savepoint=False):
+        for day in sorted(deltas):
+            columns = {column: delta for column, delta in deltas[day].items() if delta}
+            if not columns or _increment(tenant, day, columns) or not create:
+                continue
+            # Add an empty day (a no-op if a concurrent write just did) and shift it
+            DailySalesRollup.objects.bulk_create([DailySalesRollup(tenant=tenant, date=day)], ignore_conflicts=True)
+            _increment(tenant, day, columns)
+
+
+def post_rollup_change(tenant, before, after):
+    """
+    Apply the difference between two contributions of a document, each
+    given as invoice_rollup()/payment_rollup()/customer_rollup() or None.
+    """
+    if before == after:
+        return
+    tz = tenant_timezone(tenant)
+    deltas = {}
+    for contribution, sign in ((before, -1), (after, 1)):
+        if contribution is None:
+            continue
+        moment, values = contribution
+        day = deltas.setdefault(local_date(moment, tz), {})
+        for column, value in values.items():
+            day[column] = day.get(column, 0) + sign * value
+    post_rollup_deltas(tenant, deltas, create=after is not None)
+
+
+def rebuild_rollups(tenant):
+    """Recompute every rollup row of a tenant, one grouped query per source"""
+    tz = tenant_timezone(tenant)
+    days = {}
+    for source, (model, date_field, source_filter, aggregates) in SOURCES.items():
+        grouped = model.objects.filter(source_filter, tenant=tenant).annotate(
+            day=TruncDate(date_field, tzinfo=tz)
+        ).order_by().values('day').annotate(**aggregates)
+        for row in grouped:
+            totals = days.setdefault(row['day'], dict.fromkeys(METRICS, 0))
+            totals.update({column: row[column] or 0 for column in aggregates})
+
+    DailySalesRollup.objects.filter(tenant=tenant).exclude(date__in=days.keys()).delete()
+    _upsert([DailySalesRollup(tenant=tenant, date=day, **totals) for day, totals in days.items()], METRICS)
+    return len(days)
+
+
+def _period_start(day, granularity):
+    if granularity == 'week':
+        return day - timedelta(days=day.weekday())
+    if granularity == 'month':
+        return day.replace(day=1)
+    return day
+
+
+def _next_period(start, granularity):
+    if granularity == 'week':
+        return start + timedelta(days=7)
+    if granularity == 'month':
+        return (start + timedelta(days=32)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+def default_range(tenant, granularity):
+    """Last 30 days, 12 weeks or 12 months up to today in the tenant's timezone"""
+    end = local_date(timezone.now(), tenant_timezone(tenant))
+    if granularity == 'month':
+        start = end.replace(day=1)
+        for _ in range(11):
+            start = (start - timedelta(days=1)).replace(day=1)
+        return start, end
+    if granularity == 'week':
+        return _period_start(end, 'week') - timedelta(weeks=11), end
+    return end - timedelta(days=29), end
+
+
+def sales_series(tenant, granularity, start, end):
+    """
+    Totals per day/week/month between two local dates (inclusive), with empty
+    periods filled in with zeros.
+    """
+    queryset = DailySalesRollup.objects.filter(tenant=tenant, date__gte=start, date__lte=end)
+    if granularity == 'week':
+        queryset = queryset.annotate(period=TruncWeek('date'))
+    elif granularity == 'month':
+        queryset = queryset.annotate(period=TruncMonth('date'))
+    else:
+        queryset = queryset.annotate(period=F('date'))
+
+    money = DecimalField(max_digits=14, decimal_places=2)
+    rows = queryset.order_by().values('period').annotate(
+        revenue=Coalesce(Sum('revenue'), Value(ZERO), output_field=money),
+        invoice_count=Coalesce(Sum('invoice_count'), 0),
+        paid_amount=Coalesce(Sum('paid_amount'), Value(ZERO), output_field=money),
+        new_customers=Coalesce(Sum('new_customers'), 0),
+    )
+    totals = {row['period']: row for row in rows}
+
+    series = []
+    period = _period_start(start, granularity)
+    while period <= end:
+        row = totals.get(period, {})
+        series.append({
+            'period': period,
+            'revenue': row.get('revenue', ZERO),
+            'invoice_count': row.get('invoice_count', 0),
+            'paid_amount': row.get('paid_amount', ZERO),
+            'new_customers': row.get('new_customers', 0),
+        })
+        period = _next_period(period, granularity)
+    return series
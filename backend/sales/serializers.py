@@ -1,12 +1,114 @@
 from rest_framework import serializers
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from django.utils import timezone
 from decimal import Decimal
-from .models import SalesOrder, SalesOrderItem, Invoice, InvoiceItem, Payment
+from .models import SalesOrder, SalesOrderItem, Invoice, InvoiceItem, Payment, calculate_line_total
+from .ledger import payment_contribution, post_payment_change
+from .rollups import GRANULARITIES
+from .stock import RESERVED_STATUSES
+from customers.models import Customer
 from customers.serializers import CustomerListSerializer
+from inventory.models import Product
 from inventory.serializers import ProductListSerializer
+from tenants.eager_loading import CountField
+
+
+def _identity_map(context, model):
+    """
+    Request-scoped {pk: instance} map for a model, so every nested serializer
+    handling the same request shares one set of resolved rows. Missing pks are
+    remembered as None.
+    """
+    request = context.get('request')
+    holder = getattr(request, '_request', request)
+    if holder is None:
+        maps = context.setdefault('_identity_maps', {})
+    else:
+        if not hasattr(holder, '_identity_maps'):
+            holder._identity_maps = {}
+        maps = holder._identity_maps
+    return maps.setdefault(model, {})
+
+
+class TenantPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField limited to the request tenant's rows that resolves
+    through the request identity map. LineItemListSerializer fills the map with
+    a single IN query for all lines before any line is validated.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        return queryset.filter(tenant=getattr(request, 'tenant', None))
+
+    def _to_pk(self, data):
+        if isinstance(data, bool):
+            raise TypeError
+        return self.get_queryset().model._meta.pk.to_python(data)
+
+    def prefetch(self, values):
+        """Resolve many pks with one query into the identity map"""
+        objects = _identity_map(self.context, self.get_queryset().model)
+        pks = set()
+        for value in values:
+            try:
+                pk = self._to_pk(value)
+            except (TypeError, ValueError, DjangoValidationError):
+                continue
+            if pk not in objects:
+                pks.add(pk)
+        if not pks:
+            return
+        found = {obj.pk: obj for obj in self.get_queryset().filter(pk__in=pks)}
+        for pk in pks:
+            objects[pk] = found.get(pk)
+
+    def to_internal_value(self, data):
+        try:
+            pk = self._to_pk(data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        except DjangoValidationError:
+            self.fail('does_not_exist', pk_value=data)
+        
+        objects = _identity_map(self.context, self.get_queryset().model)
+        if pk not in objects:
+            self.prefetch([pk])
+        if objects[pk] is None:
+            self.fail('does_not_exist', pk_value=data)
+        return objects[pk]
+
+
+class LineItemListSerializer(serializers.ListSerializer):
+    """
+    Batches related-pk lookups for every line before validating them, and
+    serves the lines a LineItemsWriteMixin save just wrote (`written_items`)
+    instead of re-reading them.
+    """
+
+    def get_attribute(self, instance):
+        written = getattr(instance, 'written_items', None)
+        if written is not None:
+            return written
+        return super().get_attribute(instance)
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            for name, field in self.child.fields.items():
+                if isinstance(field, TenantPrimaryKeyRelatedField) and not field.read_only:
+                    field.prefetch(
+                        item[name] for item in data
+                        if isinstance(item, dict) and item.get(name) is not None
+                    )
+        return super().to_internal_value(data)
 
 
 class SalesOrderItemSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    product = TenantPrimaryKeyRelatedField(queryset=Product.objects.all())
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_sku = serializers.CharField(source='product.sku', read_only=True)
     
@@ -17,77 +119,225 @@ class SalesOrderItemSerializer(serializers.ModelSerializer):
             'quantity', 'unit_price', 'discount_percent', 'line_total', 'notes'
         ]
         read_only_fields = ['line_total']
+        list_serializer_class = LineItemListSerializer
 
 
-class SalesOrderSerializer(serializers.ModelSerializer):
-    items = SalesOrderItemSerializer(many=True, required=False)
-    customer_name = serializers.CharField(source='customer.name', read_only=True)
-    customer_email = serializers.CharField(source='customer.email', read_only=True)
-    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
-    assigned_to_name = serializers.CharField(source='assigned_to.get_full_name', read_only=True)
-    
-    class Meta:
-        model = SalesOrder
-        fields = [
-            'id', 'order_number', 'reference', 'customer', 'customer_name', 'customer_email',
-            'order_date', 'expected_delivery_date', 'status', 'priority',
-            'subtotal', 'tax_amount', 'discount_amount', 'total_amount',
-            'notes', 'internal_notes', 'created_by', 'created_by_name',
-            'assigned_to', 'assigned_to_name', 'created_at', 'updated_at', 'items'
-        ]
-        read_only_fields = ['order_number', 'subtotal', 'total_amount', 'created_by', 'created_at', 'updated_at']
+class LineItemsWriteMixin:
+    """
+    Shared create/update for documents with nested line items (orders, invoices).
+
+    By default line totals and header totals are computed in memory, items are
+    inserted with one bulk_create and the header is written once, all inside a
+    single transaction. bulk_create skips Model.save() and post_save signals,
+    so callers that rely on them can pass `bulk_item_writes=False` in the
+    serializer context to get the original per-row path.
+
+    Documents in one of `locked_statuses` keep their lines' products and
+    quantities (a confirmed order's stock is reserved for exactly those).
+    """
+    item_model = None
+    item_parent_field = None
+    bulk_item_writes = True
+    locked_statuses = ()
+    LOCKED_ITEM_FIELDS = ('product', 'quantity')
+
+    def _reject_locked_lines(self, instance):
+        if instance.status in self.locked_statuses:
+            raise serializers.ValidationError({
+                'items': [f'Products and quantities cannot be changed on a {instance.status} document.']
+            })
+
+    def _use_bulk_item_writes(self):
+        return self.context.get('bulk_item_writes', self.bulk_item_writes)
+
+    def to_representation(self, instance):
+        # Load items with their products together rather than one product per line
+        # (a no-op when the view prefetched them or the save just wrote them)
+        if getattr(instance, 'written_items', None) is None:
+            prefetch_related_objects(
+                [instance], Prefetch('items', queryset=self.item_model.objects.select_related('product'))
+            )
+        return super().to_representation(instance)
 
     def create(self, validated_data):
         request = self.context.get('request')
-        validated_data['tenant'] = request.user.tenant_membership.tenant
+        validated_data['tenant'] = request.tenant
         validated_data['created_by'] = request.user
         
         items_data = validated_data.pop('items', [])
-        sales_order = SalesOrder.objects.create(**validated_data)
         
-        # Create order items
-        for item_data in items_data:
-            item_data['tenant'] = sales_order.tenant
-            SalesOrderItem.objects.create(sales_order=sales_order, **item_data)
+        if not self._use_bulk_item_writes():
+            instance = self.Meta.model.objects.create(**validated_data)
+            self._cache_items(instance, self._create_items_per_row(instance, items_data))
+            self._calculate_totals(instance)
+            return instance
         
-        # Recalculate totals
-        self._calculate_totals(sales_order)
-        return sales_order
+        with transaction.atomic():
+            instance = self.Meta.model(**validated_data)
+            items = self._build_items(instance, items_data)
+            self._set_totals(instance, items)
+            instance.save()
+            self._bulk_create_items(instance, items)
+        return instance
 
     def update(self, instance, validated_data):
         items_data = validated_data.pop('items', None)
         
-        # Update order fields
+        # Update document fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
         
-        # Update items if provided
-        if items_data is not None:
-            # Remove existing items
-            instance.items.all().delete()
-            
-            # Create new items
-            for item_data in items_data:
-                item_data['tenant'] = instance.tenant
-                SalesOrderItem.objects.create(sales_order=instance, **item_data)
+        if not self._use_bulk_item_writes():
+            instance.save()
+            if items_data is not None:
+                self._reject_locked_lines(instance)
+                instance.items.all().delete()
+                self._cache_items(instance, self._create_items_per_row(instance, items_data))
+            self._calculate_totals(instance)
+            return instance
         
-        # Recalculate totals
-        self._calculate_totals(instance)
+        with transaction.atomic():
+            if items_data is not None:
+                items = self._sync_items(instance, items_data)
+                self._set_totals(instance, items)
+            else:
+                instance.total_amount = instance.subtotal + instance.tax_amount - instance.discount_amount
+            instance.save()
         return instance
 
-    def _calculate_totals(self, sales_order):
-        items = sales_order.items.all()
+    def _sync_items(self, instance, items_data):
+        """
+        Diff submitted lines against the stored ones by item id: lines with an
+        id are updated only if something changed, lines without one are
+        created, and stored lines that were not submitted are deleted.
+        Returns the document's resulting items.
+        """
+        parent_filter = {self.item_parent_field: instance}
+        existing = {
+            item.id: item
+            for item in self.item_model.objects.filter(**parent_filter).select_related('product')
+        }
+        kept, to_update, to_create = [], [], []
+        update_fields = {'line_total', 'updated_at'}
+        now = timezone.now()
+        
+        for item_data in items_data:
+            item_id = item_data.pop('id', None)
+            if item_id is None:
+                to_create.extend(self._build_items(instance, [item_data]))
+                continue
+            
+            item = existing.pop(item_id, None)
+            if item is None:
+                raise serializers.ValidationError({
+                    'items': [f'Item {item_id} does not belong to this document.']
+                })
+            
+            changed = set()
+            for attr, value in item_data.items():
+                field = item._meta.get_field(attr)
+                current = getattr(item, field.attname)
+                new_value = value.pk if field.is_relation and value is not None else value
+                if current != new_value:
+                    setattr(item, attr, value)
+                    changed.add(attr)
+            if changed & set(self.LOCKED_ITEM_FIELDS):
+                self._reject_locked_lines(instance)
+            if changed:
+                item.line_total = calculate_line_total(item.quantity, item.unit_price, item.discount_percent)
+                item.updated_at = now
+                update_fields.update(changed)
+                to_update.append(item)
+            kept.append(item)
+        
+        if existing or to_create:
+            self._reject_locked_lines(instance)
+        if existing:
+            self.item_model.objects.filter(id__in=existing.keys()).delete()
+        if to_update:
+            self.item_model.objects.bulk_update(to_update, sorted(update_fields))
+        if to_create:
+            for item in to_create:
+                setattr(item, self.item_parent_field, instance)
+            self.item_model.objects.bulk_create(to_create)
+        
+        items = kept + to_create
+        self._cache_items(instance, items)
+        return items
+
+    def _build_items(self, instance, items_data):
+        items = []
+        for item_data in items_data:
+            item_data.pop('id', None)
+            item = self.item_model(tenant_id=instance.tenant_id, **item_data)
+            item.line_total = calculate_line_total(item.quantity, item.unit_price, item.discount_percent)
+            items.append(item)
+        return items
+
+    def _set_totals(self, instance, items):
+        subtotal = sum((item.line_total for item in items), Decimal('0.00'))
+        instance.subtotal = subtotal
+        instance.total_amount = subtotal + instance.tax_amount - instance.discount_amount
+
+    def _bulk_create_items(self, instance, items):
+        for item in items:
+            setattr(item, self.item_parent_field, instance)
+        self.item_model.objects.bulk_create(items)
+        self._cache_items(instance, items)
+
+    def _cache_items(self, instance, items):
+        """Serve the response from the rows just written instead of re-querying them"""
+        instance.written_items = sorted(items, key=lambda item: item.id)
+
+    def _create_items_per_row(self, instance, items_data):
+        items = []
+        for item_data in items_data:
+            item_data.pop('id', None)
+            item_data['tenant'] = instance.tenant
+            items.append(self.item_model.objects.create(**{self.item_parent_field: instance}, **item_data))
+        return items
+
+    def _calculate_totals(self, instance):
+        # Query the table directly: instance.items may hold a stale prefetch
+        items = self.item_model.objects.filter(**{self.item_parent_field: instance})
         subtotal = sum(item.line_total for item in items)
         
-        sales_order.subtotal = subtotal
-        sales_order.total_amount = subtotal + sales_order.tax_amount - sales_order.discount_amount
-        sales_order.save(update_fields=['subtotal', 'total_amount'])
+        instance.subtotal = subtotal
+        instance.total_amount = subtotal + instance.tax_amount - instance.discount_amount
+        instance.save(update_fields=['subtotal', 'total_amount'])
+
+
+class SalesOrderSerializer(LineItemsWriteMixin, serializers.ModelSerializer):
+    items = SalesOrderItemSerializer(many=True, required=False)
+    customer_name = serializers.CharField(source='customer.name', read_only=True)
+    customer_email = serializers.CharField(source='customer.email', read_only=True)
+    created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
+    assigned_to_name = serializers.CharField(source='assigned_to.get_full_name', read_only=True)
+    
+    class Meta:
+        model = SalesOrder
+        fields = [
+            'id', 'order_number', 'reference', 'customer', 'customer_name', 'customer_email',
+            'order_date', 'expected_delivery_date', 'status', 'priority',
+            'subtotal', 'tax_amount', 'discount_amount', 'total_amount',
+            'notes', 'internal_notes', 'created_by', 'created_by_name',
+            'assigned_to', 'assigned_to_name', 'created_at', 'updated_at', 'items'
+        ]
+        # Status only moves through the confirm/cancel actions, which reserve and release stock
+        read_only_fields = [
+            'order_number', 'status', 'subtotal', 'total_amount', 'created_by', 'created_at', 'updated_at'
+        ]
+        select_related = ['customer', 'created_by', 'assigned_to']
+        prefetch_related = ['items__product']
+
+    item_model = SalesOrderItem
+    item_parent_field = 'sales_order'
+    locked_statuses = RESERVED_STATUSES
 
 
 class SalesOrderListSerializer(serializers.ModelSerializer):
     customer_name = serializers.CharField(source='customer.name', read_only=True)
-    items_count = serializers.SerializerMethodField()
+    items_count = CountField('items')
     
     class Meta:
         model = SalesOrder
@@ -95,12 +345,12 @@ class SalesOrderListSerializer(serializers.ModelSerializer):
             'id', 'order_number', 'customer_name', 'order_date',
             'status', 'priority', 'total_amount', 'items_count', 'created_at'
         ]
-
-    def get_items_count(self, obj):
-        return obj.items.count()
+        select_related = ['customer']
 
 
 class InvoiceItemSerializer(serializers.ModelSerializer):
+    id = serializers.IntegerField(required=False)
+    product = TenantPrimaryKeyRelatedField(queryset=Product.objects.all())
     product_name = serializers.CharField(source='product.name', read_only=True)
     product_sku = serializers.CharField(source='product.sku', read_only=True)
     
@@ -111,9 +361,10 @@ class InvoiceItemSerializer(serializers.ModelSerializer):
             'quantity', 'unit_price', 'discount_percent', 'line_total', 'notes'
         ]
         read_only_fields = ['line_total']
+        list_serializer_class = LineItemListSerializer
 
 
-class InvoiceSerializer(serializers.ModelSerializer):
+class InvoiceSerializer(LineItemsWriteMixin, serializers.ModelSerializer):
     items = InvoiceItemSerializer(many=True, required=False)
     customer_name = serializers.CharField(source='customer.name', read_only=True)
     customer_email = serializers.CharField(source='customer.email', read_only=True)
@@ -136,53 +387,11 @@ class InvoiceSerializer(serializers.ModelSerializer):
             'invoice_number', 'subtotal', 'total_amount', 'balance_due', 'is_overdue',
             'created_by', 'sent_at', 'created_at', 'updated_at'
         ]
+        select_related = ['customer', 'sales_order', 'created_by']
+        prefetch_related = ['items__product']
 
-    def create(self, validated_data):
-        request = self.context.get('request')
-        validated_data['tenant'] = request.user.tenant_membership.tenant
-        validated_data['created_by'] = request.user
-        
-        items_data = validated_data.pop('items', [])
-        invoice = Invoice.objects.create(**validated_data)
-        
-        # Create invoice items
-        for item_data in items_data:
-            item_data['tenant'] = invoice.tenant
-            InvoiceItem.objects.create(invoice=invoice, **item_data)
-        
-        # Recalculate totals
-        self._calculate_totals(invoice)
-        return invoice
-
-    def update(self, instance, validated_data):
-        items_data = validated_data.pop('items', None)
-        
-        # Update invoice fields
-        for attr, value in validated_data.items():
-            setattr(instance, attr, value)
-        instance.save()
-        
-        # Update items if provided
-        if items_data is not None:
-            # Remove existing items
-            instance.items.all().delete()
-            
-            # Create new items
-            for item_data in items_data:
-                item_data['tenant'] = instance.tenant
-                InvoiceItem.objects.create(invoice=instance, **item_data)
-        
-        # Recalculate totals
-        self._calculate_totals(instance)
-        return instance
-
-    def _calculate_totals(self, invoice):
-        items = invoice.items.all()
-        subtotal = sum(item.line_total for item in items)
-        
-        invoice.subtotal = subtotal
-        invoice.total_amount = subtotal + invoice.tax_amount - invoice.discount_amount
-        invoice.save(update_fields=['subtotal', 'total_amount'])
+    item_model = InvoiceItem
+    item_parent_field = 'invoice'
 
 
 class InvoiceListSerializer(serializers.ModelSerializer):
@@ -196,9 +405,12 @@ class InvoiceListSerializer(serializers.ModelSerializer):
             'id', 'invoice_number', 'customer_name', 'invoice_date', 'due_date',
             'status', 'total_amount', 'paid_amount', 'balance_due', 'is_overdue'
         ]
+        select_related = ['customer']
 
 
 class PaymentSerializer(serializers.ModelSerializer):
+    invoice = TenantPrimaryKeyRelatedField(queryset=Invoice.objects.all())
+    customer = TenantPrimaryKeyRelatedField(queryset=Customer.objects.all())
     invoice_number = serializers.CharField(source='invoice.invoice_number', read_only=True)
     customer_name = serializers.CharField(source='customer.name', read_only=True)
     created_by_name = serializers.CharField(source='created_by.get_full_name', read_only=True)
@@ -212,51 +424,35 @@ class PaymentSerializer(serializers.ModelSerializer):
             'created_by', 'created_by_name', 'processed_at', 'created_at', 'updated_at'
         ]
         read_only_fields = ['payment_number', 'created_by', 'processed_at', 'created_at', 'updated_at']
+        select_related = ['invoice', 'customer', 'created_by']
 
     def create(self, validated_data):
         request = self.context.get('request')
-        validated_data['tenant'] = request.user.tenant_membership.tenant
+        validated_data['tenant'] = request.tenant
         validated_data['created_by'] = request.user
         
-        payment = Payment.objects.create(**validated_data)
-        
-        # Update invoice paid amount
-        self._update_invoice_payment_status(payment.invoice)
+        with transaction.atomic():
+            payment = Payment.objects.create(**validated_data)
+            
+            # Post the payment to its invoice's paid amount
+            post_payment_change(None, (payment.invoice_id, payment_contribution(payment)))
         
         return payment
 
     def update(self, instance, validated_data):
-        old_invoice = instance.invoice
-        old_amount = instance.amount
+        before = (instance.invoice_id, payment_contribution(instance))
         
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
-        instance.save()
         
-        # Update invoice payment status for both old and new invoice (if changed)
-        self._update_invoice_payment_status(old_invoice)
-        if instance.invoice != old_invoice:
-            self._update_invoice_payment_status(instance.invoice)
+        with transaction.atomic():
+            instance.save()
+            
+            # Move the contribution between invoices or adjust it in place
+            post_payment_change(before, (instance.invoice_id, payment_contribution(instance)))
         
         return instance
 
-    def _update_invoice_payment_status(self, invoice):
-        """Update invoice payment status and paid amount"""
-        total_paid = sum(
-            payment.amount for payment in invoice.payments.filter(status='completed')
-        )
-        invoice.paid_amount = total_paid
-        
-        # Update status based on payment
-        if total_paid >= invoice.total_amount:
-            invoice.status = 'paid'
-        elif total_paid > 0:
-            invoice.status = 'partially_paid'
-        elif invoice.is_overdue:
-            invoice.status = 'overdue'
-        
-        invoice.save(update_fields=['paid_amount', 'status'])
-
 
 class SalesStatsSerializer(serializers.Serializer):
     total_orders = serializers.IntegerField()
@@ -265,4 +461,56 @@ class SalesStatsSerializer(serializers.Serializer):
     pending_orders = serializers.IntegerField()
     overdue_invoices = serializers.IntegerField()
     recent_orders = SalesOrderListSerializer(many=True)
-    recent_invoices = InvoiceListSerializer(many=True)
\ No newline at end of file
+    recent_invoices = InvoiceListSerializer(many=True)
+
+
+class SalesAnalyticsQuerySerializer(serializers.Serializer):
+    """Query parameters of the sales analytics endpoint (dates are tenant-local)"""
+    MAX_PERIODS = 366
+    PERIOD_DAYS = {'day': 1, 'week': 7, 'month': 28}
+
+    granularity = serializers.ChoiceField(choices=GRANULARITIES, default='day')
+    start_date = serializers.DateField(required=False)
+    end_date = serializers.DateField(required=False)
+
+    def validate(self, attrs):
+        start_date, end_date = attrs.get('start_date'), attrs.get('end_date')
+        if bool(start_date) != bool(end_date):
+            raise serializers.ValidationError('start_date and end_date must be given together.')
+        if start_date:
+            if start_date > end_date:
+                raise serializers.ValidationError('start_date must not be after end_date.')
+            periods = (end_date - start_date).days // self.PERIOD_DAYS[attrs['granularity']] + 1
+            if periods > self.MAX_PERIODS:
+                raise serializers.ValidationError(
+                    f'At most {self.MAX_PERIODS} periods can be requested; use a coarser granularity.'
+                )
+        return attrs
+
+
+class SalesSeriesPointSerializer(serializers.Serializer):
+    period = serializers.DateField()
+    revenue = serializers.DecimalField(max_digits=14, decimal_places=2)
+    invoice_count = serializers.IntegerField()
+    paid_amount = serializers.DecimalField(max_digits=14, decimal_places=2)
+    new_customers = serializers.IntegerField()
+
+
+class AgingQuerySerializer(serializers.Serializer):
+    """Query parameters of the receivables aging endpoint (as_of is tenant-local, default today)"""
+    as_of = serializers.DateField(required=False)
+
+
+class AgingBucketsSerializer(serializers.Serializer):
+    current = serializers.DecimalField(max_digits=14, decimal_places=2)
+    days_1_30 = serializers.DecimalField(max_digits=14, decimal_places=2)
+    days_31_60 = serializers.DecimalField(max_digits=14, decimal_places=2)
+    days_61_90 = serializers.DecimalField(max_digits=14, decimal_places=2)
+    days_over_90 = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total = serializers.DecimalField(max_digits=14, decimal_places=2)
+    invoice_count = serializers.IntegerField()
+
+
+class CustomerAgingSerializer(AgingBucketsSerializer):
+    customer = serializers.UUIDField(source='customer_id')
+    customer_name = serializers.CharField(source='customer__name')
@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from customers.models import Customer
+from tenants.models import Tenant
+from tenants.snapshots import invalidate_snapshots
+
+from .customer_totals import (
+    INVOICE_FIELDS, ORDER_FIELDS, invoice_contribution, order_contribution, post_invoice_change, post_order_change
+)
+from .models import Invoice, InvoiceItem, Payment, SalesOrder
+from .pdf import invalidate_invoice_pdf, invalidate_tenant_pdfs
+from .rollups import (
+    INVOICE_ROLLUP_FIELDS, PAYMENT_ROLLUP_FIELDS, customer_rollup, invoice_rollup, payment_rollup, post_rollup_change
+)
+
+
+@receiver([post_save, post_delete], sender=Invoice)
+def invalidate_invoice(sender, instance, **kwargs):
+    invalidate_invoice_pdf(instance.tenant_id, instance.pk)
+
+
+@receiver([post_save, post_delete], sender=InvoiceItem)
+def invalidate_invoice_item(sender, instance, **kwargs):
+    invalidate_invoice_pdf(instance.tenant_id, instance.invoice_id)
+
+
+@receiver(post_save, sender=Tenant)
+def invalidate_branding(sender, instance, **kwargs):
+    """Name, address and logo appear on every invoice"""
+    invalidate_tenant_pdfs(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=SalesOrder)
+@receiver([post_save, post_delete], sender=Invoice)
+@receiver([post_save, post_delete], sender=Payment)
+def invalidate_sales_stats(sender, instance, **kwargs):
+    invalidate_snapshots(instance.tenant_id, 'sales')
+
+
+@receiver(post_save, sender=Customer)
+def post_new_customer(sender, instance, created, **kwargs):
+    if created:
+        post_rollup_change(instance.tenant, None, customer_rollup(instance))
+
+
+@receiver(post_delete, sender=Customer)
+def post_deleted_customer(sender, instance, **kwargs):
+    post_rollup_change(instance.tenant, customer_rollup(instance), None)
+
+
+# model -> [(fields read, contribution, apply(tenant, before, after))]
+TRACKED_TOTALS = {
+    SalesOrder: [(ORDER_FIELDS, order_contribution, post_order_change)],
+    Invoice: [
+        (INVOICE_FIELDS, invoice_contribution, post_invoice_change),
+        (INVOICE_ROLLUP_FIELDS, invoice_rollup, post_rollup_change),
+    ],
+    Payment: [(PAYMENT_ROLLUP_FIELDS, payment_rollup, post_rollup_change)],
+}
+TRACKED_FIELDS = {
+    sender: tuple(sorted({field for fields, _, _ in totals for field in fields}))
+    for sender, totals in TRACKED_TOTALS.items()
+}
+
+
+@receiver(pre_save, sender=SalesOrder)
+@receiver(pre_save, sender=Invoice)
+@receiver(pre_save, sender=Payment)
+def capture_stored_state(sender, instance, **kwargs):
+    """What the row holds before this save, from the values it was loaded with"""
+    instance._stored_state = instance.loaded_values(TRACKED_FIELDS[sender])
+
+
+@receiver(post_save, sender=SalesOrder)
+@receiver(post_save, sender=Invoice)
+@receiver(post_save, sender=Payment)
+def post_tracked_totals(sender, instance, created, update_fields, **kwargs):
+    fields = TRACKED_FIELDS[sender]
+    if update_fields is not None:
+        written = {sender._meta.get_field(name).attname for name in update_fields}
+        fields = tuple(field for field in fields if field in written)
+    # The ledger saves paid_amount as an F() expression; read the result back
+    expressions = [field for field in fields if hasattr(instance.__dict__.get(field), 'resolve_expression')]
+    if expressions:
+        instance.refresh_from_db(fields=expressions)
+
+    before = None if created else instance._stored_state
+    if before is None:
+        after = instance
+    else:
+        # Fields left out of update_fields keep their stored values
+        after = SimpleNamespace(**vars(before))
+        for field in fields:
+            setattr(after, field, getattr(instance, field))
+    for _, contribution, apply in TRACKED_TOTALS[sender]:
+        old = None if before is None else contribution(before)
+        new = contribution(after)
+        if old != new:
+            apply(instance.tenant, old, new)
+    instance.remember_loaded(fields)
+
+
+@receiver(post_delete, sender=SalesOrder)
+@receiver(post_delete, sender=Invoice)
+@receiver(post_delete, sender=Payment)
+def post_deleted_totals(sender, instance, **kwargs):
+    # A cascade from the tenant deletes these rows before the tenant row itself,
+    # and removing a document never creates rollup or customer rows
+    for _, contribution, apply in TRACKED_TOTALS[sender]:
+        apply(instance.tenant, contribution(instance), None)
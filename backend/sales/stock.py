@@ -0,0 +1,106 @@
+"""
+Stock reservation for sales orders.
+
+Confirming an order takes its quantities out of stock and cancelling a
+confirmed order puts back what was taken. Both lock every product involved
+with one select_for_update ordered by primary key, so concurrent orders
+sharing products always lock them in the same order and cannot deadlock.
+Quantities are checked and applied in memory, then written with one
+bulk_create of StockMovement rows and one bulk_update of the products: a
+constant number of queries per order, however many lines it has.
+
+Movements are linked to their order (StockMovement.sales_order) and carry
+its number as reference_number for display; a reversal restores the net of
+the order's linked movements, so manual movements that quote the order
+number are never undone with it.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.utils import timezone
+
+from inventory.models import Product, StockMovement
+from tenants.snapshots import invalidate_snapshots
+
+# Order statuses whose quantities are out of stock
+RESERVED_STATUSES = ('confirmed', 'partially_delivered', 'delivered')
+
+
+class StockError(Exception):
+    """An order's lines cannot be taken out of stock"""
+
+    def __init__(self, message, shortages=None):
+        super().__init__(message)
+        self.shortages = shortages or []
+
+
+def _lock_products(tenant, product_ids):
+    return Product.objects.select_for_update().filter(
+        tenant=tenant, pk__in=product_ids, track_inventory=True
+    ).order_by('pk')
+
+
+def _apply(order, user, products, changes, movement_type, notes):
+    """Write one movement per product and the new stock levels"""
+    now = timezone.now()
+    movements = []
+    for product in products:
+        quantity = changes[product.pk]
+        movements.append(StockMovement(
+            tenant_id=order.tenant_id, product=product, movement_type=movement_type, quantity=quantity,
+            previous_stock=product.current_stock, new_stock=product.current_stock + quantity,
+            reference_number=order.order_number, sales_order=order, notes=notes, created_by=user,
+        ))
+        product.current_stock += quantity
+        product.updated_at = now
+        product.update_stock_status()
+    if movements:
+        StockMovement.objects.bulk_create(movements)
+        Product.objects.bulk_update(products, ['current_stock', 'stock_status', 'updated_at'])
+        invalidate_snapshots(order.tenant_id, 'inventory')
+    return movements
+
+
+def reserve_order_stock(order, user):
+    """
+    Take an order's quantities out of stock. Raises StockError (and writes
+    nothing) if a tracked product has too little stock or a fractional
+    quantity. Call inside a transaction.
+    """
+    needed = defaultdict(lambda: Decimal('0'))
+    for product_id, quantity in order.items.values_list('product_id', 'quantity'):
+        needed[product_id] += quantity
+
+    products = list(_lock_products(order.tenant_id, needed.keys()))
+    shortages = []
+    for product in products:
+        quantity = needed[product.pk]
+        if quantity != quantity.to_integral_value():
+            raise StockError(f'{product.name}: stocked quantities must be whole numbers')
+        if product.current_stock < quantity:
+            shortages.append({
+                'product': str(product.pk), 'name': product.name,
+                'requested': int(quantity), 'available': product.current_stock,
+            })
+    if shortages:
+        raise StockError('Insufficient stock', shortages)
+
+    changes = {product.pk: -int(needed[product.pk]) for product in products}
+    return _apply(order, user, products, changes, 'sale', f'Sales order {order.order_number} confirmed')
+
+
+def release_order_stock(order, user):
+    """Return everything an order's movements took out of stock. Call inside a transaction."""
+    taken = dict(
+        StockMovement.objects.filter(
+            sales_order=order, movement_type__in=['sale', 'return']
+        ).order_by().values('product').annotate(net=Sum('quantity')).values_list('product', 'net')
+    )
+    taken = {product_id: net for product_id, net in taken.items() if net}
+    if not taken:
+        return []
+
+    products = list(_lock_products(order.tenant_id, taken.keys()))
+    changes = {product.pk: -taken[product.pk] for product in products}
+    return _apply(order, user, products, changes, 'return', f'Sales order {order.order_number} cancelled')
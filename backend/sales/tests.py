@@ -1,3 +1,779 @@
-from django.test import TestCase
+from concurrent.futures import Future
+from datetime import datetime, timezone as dt_timezone
+import csv
+from decimal import Decimal
+from pathlib import Path
+import io
+from types import SimpleNamespace
+from unittest import mock, skipIf
+import tempfile
+import zipfile
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from customers.models import Customer
+from inventory.models import Product, StockMovement
+from tenants.testing import (
+    ITEMS_PER_DOCUMENT, Endpoint, QueryBudgetMixin, TenantAPITestCase, cold_snapshot, make_customer,
+    make_payment, make_sales_order,
+)
+
+from . import pdf_workers
+from .customer_totals import recompute_customer_totals
+from .ledger import post_payment_change
+from .models import DailySalesRollup, Invoice, SalesOrder
+from .overdue import sweep_overdue_invoices
+from .rollups import local_date, rebuild_rollups, tenant_timezone
+from .serializers import SalesOrderSerializer
+
+try:
+    import weasyprint
+except (ImportError, OSError):  # OSError: pango/cairo missing
+    weasyprint = None
+
+LINES_PER_ORDER = 50
+
+
+def _document_body(case, date_field):
+    products = case.products()
+    return {
+        'customer': str(case.first(Customer).pk),
+        date_field: timezone.now().isoformat(),
+        'items': [
+            {'product': str(products[i % len(products)].pk), 'quantity': '2', 'unit_price': '10.00'}
+            for i in range(LINES_PER_ORDER)
+        ],
+    }
+
+
+def _invoice_body(case):
+    body = _document_body(case, 'invoice_date')
+    body['due_date'] = timezone.now().isoformat()
+    return body
+
+
+def _item_patch(case, document):
+    return {'kwargs': {'pk': document.pk, 'item_id': document.items.order_by('pk').first().pk},
+            'data': {'quantity': str(case.serial())}}
+
+
+def _stocked_order(case):
+    order = case.fresh_order()
+    Product.objects.filter(pk__in=order.items.values('product')).update(current_stock=1000)
+    return {'kwargs': {'pk': order.pk}}
+
+
+def _confirmed_order(case):
+    kwargs = _stocked_order(case)
+    case.client.post(reverse('salesorder-confirm', kwargs=kwargs['kwargs']))
+    return kwargs
+
+
+def _uninvoiced_order(case):
+    case.fresh_order(status='confirmed')
+    return {}
+
+
+def _new_pending_payment(case):
+    invoice = case.fresh_invoice()
+    return {'kwargs': {'pk': make_payment(case.tenant, case.user, invoice, invoice.total_amount, status='pending').pk}}
+
+
+class TemporaryPdfCacheMixin:
+    """Keep rendered PDFs in a per-class temporary directory and render in-process"""
+
+    @classmethod
+    def setUpClass(cls):
+        pdf_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(pdf_dir.cleanup)
+        cls.pdf_cache_dir = Path(pdf_dir.name)
+        override = override_settings(INVOICE_PDF_CACHE_DIR=pdf_dir.name, PDF_RENDER_WORKERS=0)
+        override.enable()
+        cls.addClassCleanup(override.disable)
+        super().setUpClass()
+
+
+class SalesQueryBudgetTests(TemporaryPdfCacheMixin, QueryBudgetMixin, TenantAPITestCase):
+    endpoints = [
+        Endpoint('salesorder-list', 2),
+        Endpoint('salesorder-export', 1),
+        Endpoint('salesorder-list', 8, method='post', status=201,
+                 build=lambda case: {'data': _document_body(case, 'order_date')}),
+        Endpoint('salesorder-detail', 14, method='put',
+                 build=lambda case: {'kwargs': {'pk': case.fresh_order().pk},
+                                     'data': _document_body(case, 'order_date')}),
+        Endpoint('salesorder-confirm', 8, method='post', build=_stocked_order),
+        Endpoint('salesorder-cancel', 8, method='post', build=_confirmed_order),
+        Endpoint('salesorder-create-invoice', 13, method='post', status=201,
+                 build=lambda case: {'kwargs': {'pk': case.fresh_order(status='confirmed').pk}}),
+        Endpoint('salesorder-create-invoices', 9, method='post', status=201, build=_uninvoiced_order),
+        Endpoint('salesorder-update-item', 5, method='patch', build=lambda case: _item_patch(case, case.fresh_order())),
+        Endpoint('invoice-list', 2),
+        Endpoint('invoice-export', 1),
+        Endpoint('invoice-list', 1, name='cursor', build=lambda case: {'data': {'cursor': ''}}),
+        Endpoint('invoice-list', 1, name='overdue', build=lambda case: {'data': {'overdue': 'true'}}),
+        Endpoint('invoice-list', 2, name='balance',
+                 build=lambda case: {'data': {'balance_due_min': '0.01', 'ordering': '-balance_due'}}),
+        Endpoint('invoice-list', 9, method='post', status=201, build=lambda case: {'data': _invoice_body(case)}),
+        Endpoint('invoice-download-pdf', 3, build=lambda case: {'kwargs': {'pk': case.first(Invoice).pk}}),
+        # The export reads invoices 100 at a time, so budget it for one customer's invoices
+        Endpoint('invoice-download-pdfs', 4,
+                 build=lambda case: {'data': {'status': 'sent', 'customer': str(case.first(Invoice).customer_id)}}),
+        Endpoint('invoice-mark-paid', 15, method='post', build=lambda case: {'kwargs': {'pk': case.fresh_invoice().pk}}),
+        Endpoint('invoice-payments', 4, build=lambda case: {'kwargs': {'pk': case.first(Invoice).pk}}),
+        Endpoint('invoice-update-item', 9, method='patch', build=lambda case: _item_patch(case, case.first(Invoice))),
+        Endpoint('payment-list', 2),
+        Endpoint('payment-export', 1),
+        Endpoint('payment-list', 1, name='cursor', build=lambda case: {'data': {'cursor': ''}}),
+        Endpoint('payment-list', 8, method='post', status=201,
+                 build=lambda case: {'data': {
+                     'invoice': case.first(Invoice).pk, 'customer': str(case.first(Invoice).customer_id),
+                     'payment_date': timezone.now().isoformat(), 'amount': '1.00', 'payment_method': 'cash',
+                 }}),
+        Endpoint('payment-process', 15, method='post', build=_new_pending_payment),
+        Endpoint('sales-stats-list', 0),
+        Endpoint('sales-stats-list', 4, name='cold', build=cold_snapshot('sales')),
+        Endpoint('sales-analytics-list', 1),
+        Endpoint('sales-analytics-list', 1, name='month', build=lambda case: {'data': {'granularity': 'month'}}),
+        Endpoint('sales-aging-list', 0),
+        Endpoint('sales-aging-list', 3, name='cold', build=cold_snapshot('sales')),
+    ]
+
+
+class InvoicePdfCacheTests(TemporaryPdfCacheMixin, TenantAPITestCase):
+    def download(self, invoice):
+        response = self.client.get(reverse('invoice-download-pdf', kwargs={'pk': invoice.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        return b''.join(response.streaming_content)
+
+    def cached_files(self, invoice):
+        return list((self.pdf_cache_dir / str(self.tenant.pk) / str(invoice.pk)).glob('*.pdf'))
+
+    def test_repeat_download_served_from_disk(self):
+        invoice = self.fresh_invoice()
+        with mock.patch('sales.pdf.render_invoice_pdf', return_value=b'%PDF-1.4 cached') as render:
+            self.assertEqual(self.download(invoice), b'%PDF-1.4 cached')
+            self.assertEqual(self.download(invoice), b'%PDF-1.4 cached')
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(len(self.cached_files(invoice)), 1)
+
+    def test_changes_produce_a_new_version(self):
+        invoice = self.fresh_invoice()
+        with mock.patch('sales.pdf.render_invoice_pdf', return_value=b'%PDF-1.4') as render:
+            self.download(invoice)
+
+            item = invoice.items.first()
+            item.quantity += 1
+            item.save()
+            self.assertEqual(self.cached_files(invoice), [])
+            self.download(invoice)
+
+            # Narrow saves that leave updated_at untouched still change the version
+            Invoice.objects.filter(pk=invoice.pk).update(status='paid')
+            self.download(invoice)
+
+            self.tenant.name = 'Renamed Org'
+            self.tenant.save()
+            self.download(invoice)
+        self.assertEqual(render.call_count, 4)
+        self.assertEqual(len(self.cached_files(invoice)), 1)
+
+    def test_saturated_renderer_returns_503(self):
+        invoice = self.fresh_invoice()
+        with mock.patch('sales.pdf.render_pdf', side_effect=pdf_workers.PdfQueueFull):
+            response = self.client.get(reverse('invoice-download-pdf', kwargs={'pk': invoice.pk}))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], '5')
+
+    def test_bulk_export_streams_a_zip_of_matching_invoices(self):
+        draft = self.fresh_invoice(status='draft')
+        sent = Invoice.objects.filter(tenant=self.tenant, status='sent')
+        response = self.client.get(reverse('invoice-download-pdfs'), {'status': 'sent'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/zip')
+        with zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content))) as archive:
+            names = archive.namelist()
+            self.assertTrue(all(archive.read(name).startswith(b'%PDF') for name in names))
+        self.assertEqual(sorted(names), sorted(f'Invoice-{number}.pdf' for number in sent.values_list('invoice_number', flat=True)))
+        self.assertNotIn(f'Invoice-{draft.invoice_number}.pdf', names)
+
+    def test_bulk_export_ends_cleanly_when_a_render_fails(self):
+        self.fresh_invoice()
+        rendered = Future()
+        rendered.set_result(b'%PDF-1.4')
+        failed = Future()
+        failed.set_exception(pdf_workers.PdfRenderError('A PDF worker exited unexpectedly'))
+        with mock.patch('sales.pdf.submit_pdf', side_effect=[rendered, failed]), self.assertLogs('sales.pdf', 'ERROR'):
+            response = self.client.get(reverse('invoice-download-pdfs'), {'status': 'sent'})
+            content = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertEqual(len(archive.namelist()), 2)
+            self.assertIn(b'1 invoice PDFs were added', archive.read('EXPORT-ERROR.txt'))
+
+    def test_bulk_export_ends_cleanly_when_the_local_renderer_raises(self):
+        self.fresh_invoice()
+        renderer = SimpleNamespace(render=mock.Mock(side_effect=ValueError('Unsupported stylesheet')))
+        with mock.patch('sales.pdf_workers._get_local_renderer', return_value=renderer), self.assertLogs('sales.pdf', 'ERROR'):
+            response = self.client.get(reverse('invoice-download-pdfs'), {'status': 'sent'})
+            content = b''.join(response.streaming_content)
+        with zipfile.ZipFile(io.BytesIO(content)) as archive:
+            self.assertIn('EXPORT-ERROR.txt', archive.namelist())
+
+    def test_bulk_export_without_matches(self):
+        response = self.client.get(reverse('invoice-download-pdfs'), {'status': 'cancelled'})
+        self.assertEqual(response.status_code, 404)
+
+
+class SalesStatsSnapshotTests(TenantAPITestCase):
+    def test_writes_refresh_the_snapshot(self):
+        url = reverse('sales-stats-list')
+        total_orders = self.client.get(url).data['total_orders']
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).data['total_orders'], total_orders)
+        self.fresh_order()
+        self.assertEqual(self.client.get(url).data['total_orders'], total_orders + 1)
+
+    def test_cache_outage_computes_uncached(self):
+        url = reverse('sales-stats-list')
+        total_orders = self.client.get(url).data['total_orders']
+        with mock.patch('tenants.snapshots.cache') as broken, self.assertLogs('tenants.snapshots', 'WARNING'):
+            broken.get.side_effect = broken.set.side_effect = broken.incr.side_effect = ConnectionError('down')
+            self.fresh_order()
+            self.assertEqual(self.client.get(url).data['total_orders'], total_orders + 1)
+
+
+class BatchInvoicingTests(TenantAPITestCase):
+    def test_invoices_billable_orders_once(self):
+        customer = self.first(Customer)
+        confirmed = [self.fresh_order(status='confirmed') for _ in range(3)]
+        draft = self.fresh_order()
+        url = reverse('salesorder-create-invoices') + f'?customer={customer.pk}'
+        
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        invoices = Invoice.objects.filter(sales_order__in=confirmed + [draft]).order_by('invoice_number')
+        self.assertEqual([invoice.sales_order_id for invoice in invoices], [order.pk for order in confirmed])
+        self.assertGreaterEqual(response.data['created'], len(confirmed))
+        numbers = [int(invoice.invoice_number.rsplit('-', 1)[1]) for invoice in invoices]
+        self.assertEqual(numbers, list(range(numbers[0], numbers[0] + len(confirmed))))
+        for invoice in invoices:
+            order = invoice.sales_order
+            self.assertEqual((invoice.status, invoice.customer_id, invoice.total_amount),
+                             ('draft', order.customer_id, order.total_amount))
+            self.assertEqual(list(invoice.items.values_list('product_id', 'quantity', 'line_total')),
+                             list(order.items.values_list('product_id', 'quantity', 'line_total')))
+        
+        # Already invoiced orders are skipped
+        response = self.client.post(url)
+        self.assertEqual((response.status_code, response.data['created']), (200, 0))
+        response = self.client.post(reverse('salesorder-create-invoice', kwargs={'pk': confirmed[0].pk}))
+        self.assertEqual(response.status_code, 400)
+
+    def test_command_invoices_in_batches(self):
+        orders = [self.fresh_order(status='confirmed') for _ in range(3)]
+        out = io.StringIO()
+        call_command('invoice_sales_orders', '--tenant', self.tenant.slug, '--status', 'confirmed',
+                     '--batch-size', '2', stdout=out)
+        self.assertIn('created', out.getvalue())
+        self.assertEqual(Invoice.objects.filter(sales_order__in=orders).count(), 3)
+        self.assertFalse(SalesOrder.objects.filter(tenant=self.tenant, status='confirmed', invoices__isnull=True).exists())
+
+
+class StockReservationTests(TenantAPITestCase):
+    seed_count = ITEMS_PER_DOCUMENT  # Orders with several lines
+
+    def stocked_order(self, products, stock=100):
+        Product.objects.filter(pk__in=[product.pk for product in products]).update(current_stock=stock)
+        return make_sales_order(self.tenant, self.user, self.first(Customer), products)
+
+    def stock(self, order):
+        return dict(Product.objects.filter(pk__in=order.items.values('product')).values_list('pk', 'current_stock'))
+
+    def test_confirm_takes_stock_and_cancel_returns_it(self):
+        order = self.stocked_order(self.products())
+        expected = {item.product_id: 100 - int(item.quantity) for item in order.items.all()}
+        
+        response = self.client.post(reverse('salesorder-confirm', kwargs={'pk': order.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.stock(order), expected)
+        movements = order.stock_movements.filter(movement_type='sale')
+        self.assertEqual(movements.count(), len(expected))
+        
+        self.assertEqual(self.client.post(reverse('salesorder-cancel', kwargs={'pk': order.pk})).status_code, 200)
+        self.assertEqual(set(self.stock(order).values()), {100})
+        self.assertEqual(
+            order.stock_movements.filter(movement_type='return').count(),
+            len(expected)
+        )
+
+    def test_insufficient_stock_rejects_whole_order(self):
+        products = self.products()
+        order = self.stocked_order(products)
+        Product.objects.filter(pk=products[-1].pk).update(current_stock=0)
+        
+        response = self.client.post(reverse('salesorder-confirm', kwargs={'pk': order.pk}))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([shortage['product'] for shortage in response.data['shortages']], [str(products[-1].pk)])
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'draft')
+        self.assertFalse(order.stock_movements.exists())
+        self.assertEqual(self.stock(order)[products[0].pk], 100)
+
+    def test_queries_do_not_grow_with_lines(self):
+        products = self.products()
+        self.client.get(reverse('salesorder-list'))  # Authenticate outside the measurement
+        counts = []
+        for lines in (products[:1], products):
+            order = self.stocked_order(lines)
+            with CaptureQueriesContext(connection) as queries:
+                self.client.post(reverse('salesorder-confirm', kwargs={'pk': order.pk}))
+            counts.append(len(queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_status_changes_only_through_actions(self):
+        order = self.stocked_order(self.products())
+        self.client.post(reverse('salesorder-confirm', kwargs={'pk': order.pk}))
+        self.client.patch(reverse('salesorder-detail', kwargs={'pk': order.pk}), {'status': 'cancelled'}, format='json')
+        order.refresh_from_db()
+        self.assertEqual(order.status, 'confirmed')
+
+    def test_reserved_lines_are_locked(self):
+        order = self.stocked_order(self.products())
+        self.client.post(reverse('salesorder-confirm', kwargs={'pk': order.pk}))
+        item = order.items.order_by('pk').first()
+        lines = [
+            {'id': line.pk, 'product': str(line.product_id), 'quantity': str(line.quantity),
+             'unit_price': str(line.unit_price), 'notes': 'Gift wrap'}
+            for line in order.items.order_by('pk')
+        ]
+        url = reverse('salesorder-detail', kwargs={'pk': order.pk})
+        self.assertEqual(self.client.patch(url, {'items': lines}, format='json').status_code, 200)
+        
+        lines[0]['quantity'] = str(item.quantity + 1)
+        self.assertEqual(self.client.patch(url, {'items': lines}, format='json').status_code, 400)
+        self.assertEqual(self.client.patch(url, {'items': lines[1:]}, format='json').status_code, 400)
+        item_url = reverse('salesorder-update-item', kwargs={'pk': order.pk, 'item_id': item.pk})
+        self.assertEqual(self.client.patch(item_url, {'quantity': '9'}, format='json').status_code, 400)
+        self.assertEqual(self.client.patch(item_url, {'notes': 'Fragile'}, format='json').status_code, 200)
+
+    def test_release_ignores_manual_movements_quoting_the_order(self):
+        order = self.stocked_order(self.products()[:1])
+        self.client.post(reverse('salesorder-confirm', kwargs={'pk': order.pk}))
+        product = order.items.get().product
+        StockMovement.objects.create(tenant=self.tenant, product=product, movement_type='sale', quantity=-5,
+                                     previous_stock=0, new_stock=0, reference_number=order.order_number,
+                                     created_by=self.user)
+        self.client.post(reverse('salesorder-cancel', kwargs={'pk': order.pk}))
+        self.assertEqual(self.stock(order), {product.pk: 100})
+
+
+class LineItemWriteTests(TenantAPITestCase):
+    def test_responses_list_the_written_items(self):
+        request = SimpleNamespace(tenant=self.tenant, user=self.user)
+        product = str(self.products()[0].pk)
+        for bulk in (True, False):
+            order = self.fresh_order()
+            kept = order.items.order_by('pk').first()
+            serializer = SalesOrderSerializer(order, data={'items': [
+                {'id': kept.pk, 'product': product, 'quantity': '3', 'unit_price': '10.00'},
+                {'product': product, 'quantity': '1', 'unit_price': '5.00'},
+            ]}, partial=True, context={'request': request, 'bulk_item_writes': bulk})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            
+            with CaptureQueriesContext(connection) as queries:
+                items = serializer.data['items']
+            self.assertEqual(len(queries), 0)
+            stored = list(order.items.order_by('pk').values_list('pk', 'line_total'))
+            self.assertEqual([(item['id'], Decimal(item['line_total'])) for item in items], stored)
+
+
+class CsvExportTests(TenantAPITestCase):
+    def export(self, route, params=None):
+        response = self.client.get(reverse(route), params)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        return list(csv.reader(io.StringIO(b''.join(response.streaming_content).decode())))
+
+    def test_exports_use_list_filters(self):
+        invoice = self.fresh_invoice(status='draft')
+        Invoice.objects.filter(pk=invoice.pk).update(reference='=HYPERLINK("x")')
+        header, *rows = self.export('invoice-export', {'status': 'draft'})
+        
+        self.assertEqual(header[:4], ['Invoice number', 'Reference', 'Sales order', 'Customer'])
+        self.assertEqual(len(rows), Invoice.objects.filter(tenant=self.tenant, status='draft').count())
+        row = next(row for row in rows if row[0] == invoice.invoice_number)
+        self.assertEqual(row[1:4], ['\'=HYPERLINK("x")', invoice.sales_order.order_number, invoice.customer.name])
+
+    def test_exports_every_row(self):
+        _, *rows = self.export('salesorder-export')
+        self.assertEqual(len(rows), SalesOrder.objects.filter(tenant=self.tenant).count())
+        _, *rows = self.export('payment-export', {'search': 'no such payment'})
+        self.assertEqual(rows, [])
+
+
+class ReceivablesAgingTests(TenantAPITestCase):
+    def test_buckets_outstanding_balances_by_days_past_due(self):
+        customer = make_customer(self.tenant, self.user, self.serial())
+        as_of = datetime(2030, 6, 30).date()
+        midnight = datetime(2030, 6, 30, tzinfo=tenant_timezone(self.tenant))
+        # (due date, total, paid, status)
+        invoices = [
+            (midnight, Decimal('9000000000.00'), Decimal('0.00'), 'sent'),
+            (midnight - timezone.timedelta(hours=1), Decimal('80.00'), Decimal('30.00'), 'partially_paid'),
+            (midnight - timezone.timedelta(days=31), Decimal('10.00'), Decimal('0.00'), 'overdue'),
+            (midnight - timezone.timedelta(days=200), Decimal('5.00'), Decimal('0.00'), 'overdue'),
+            (midnight - timezone.timedelta(days=200), Decimal('7.00'), Decimal('7.00'), 'paid'),
+            (midnight - timezone.timedelta(days=200), Decimal('9.00'), Decimal('0.00'), 'draft'),
+        ]
+        for due_date, total, paid, status in invoices:
+            Invoice.objects.filter(pk=self.fresh_invoice().pk).update(
+                customer=customer, due_date=due_date, total_amount=total, paid_amount=paid, status=status
+            )
+        
+        response = self.client.get(reverse('sales-aging-list'), {'as_of': as_of.isoformat(), 'page_size': 200})
+        self.assertEqual(response.status_code, 200)
+        first, *rest = response.data['results']
+        self.assertEqual(first['customer'], str(customer.pk))
+        self.assertEqual(
+            {bucket: Decimal(first[bucket]) for bucket in ['current', 'days_1_30', 'days_31_60', 'days_61_90',
+                                                            'days_over_90', 'total']},
+            {'current': Decimal('9000000000.00'), 'days_1_30': Decimal('50.00'), 'days_31_60': Decimal('10.00'),
+             'days_61_90': Decimal('0.00'), 'days_over_90': Decimal('5.00'), 'total': Decimal('9000000065.00')},
+        )
+        self.assertEqual(first['invoice_count'], 4)
+        self.assertEqual(Decimal(response.data['totals']['total']),
+                         sum(Decimal(row['total']) for row in response.data['results']))
+        # Largest exposure first
+        totals = [Decimal(row['total']) for row in rest]
+        self.assertEqual(totals, sorted(totals, reverse=True))
+
+    def test_rejects_invalid_dates(self):
+        self.assertEqual(self.client.get(reverse('sales-aging-list'), {'as_of': 'soon'}).status_code, 400)
+
+    def test_cached_pages_link_to_the_requesting_host(self):
+        for _ in range(2):
+            Invoice.objects.filter(pk=self.fresh_invoice().pk).update(
+                customer=make_customer(self.tenant, self.user, self.serial())
+            )
+        params = {'page_size': 1, 'page': 2}
+        first = self.client.get(reverse('sales-aging-list'), params)
+        cached = self.client.get(reverse('sales-aging-list'), params, HTTP_HOST='localhost')
+        self.assertEqual(cached.data['results'], first.data['results'])
+        self.assertTrue(first.data['next'].startswith('http://testserver/'))
+        self.assertTrue(cached.data['next'].startswith('http://localhost/'))
+        self.assertNotIn('page=', cached.data['previous'])
+
+
+class InvoiceBalanceTests(TenantAPITestCase):
+    def test_lists_filter_and_sort_by_balance_due(self):
+        invoice = self.fresh_invoice()
+        Invoice.objects.filter(pk=invoice.pk).update(total_amount=Decimal('9000000000.00'), paid_amount=Decimal('1.00'))
+        
+        response = self.client.get(reverse('invoice-list'), {'balance_due_min': '1000', 'ordering': '-balance_due'})
+        balances = [Decimal(str(row['balance_due'])) for row in response.data['results']]
+        self.assertEqual(response.data['results'][0]['id'], invoice.pk)
+        self.assertEqual(balances[0], Decimal('8999999999.00'))
+        self.assertEqual(balances, sorted(balances, reverse=True))
+        self.assertTrue(all(balance >= 1000 for balance in balances))
+
+    def test_balance_due_follows_saves(self):
+        invoice = self.fresh_invoice()
+        invoice.paid_amount = invoice.total_amount - Decimal('2.50')
+        invoice.save()
+        with self.assertNumQueries(0):
+            self.assertEqual(invoice.balance_due, Decimal('2.50'))
+        post_payment_change(None, (invoice.pk, Decimal('2.50')))
+        invoice.refresh_from_db()
+        self.assertEqual(invoice.balance_due, Decimal('0.00'))
+
+
+class OverdueSweepTests(TenantAPITestCase):
+    def test_sweep_marks_open_invoices_past_due(self):
+        past_due = self.fresh_invoice()
+        Invoice.objects.filter(pk=past_due.pk).update(due_date=timezone.now() - timezone.timedelta(days=1))
+        current = self.fresh_invoice()
+        draft = self.fresh_invoice(status='draft')
+        Invoice.objects.filter(pk=draft.pk).update(due_date=timezone.now() - timezone.timedelta(days=1))
+        
+        def overdue_ids():
+            listed = self.client.get(reverse('invoice-list'), {'overdue': 'true', 'page_size': 1000}).data['results']
+            return {invoice['id'] for invoice in listed}
+        
+        # Reads count it as overdue before any sweep has run
+        before = overdue_ids()
+        self.assertIn(past_due.pk, before)
+        self.assertFalse({current.pk, draft.pk} & before)
+        overdue_before = self.client.get(reverse('sales-stats-list')).data['overdue_invoices']
+        
+        out = io.StringIO()
+        call_command('sweep_overdue_invoices', '--tenant', self.tenant.slug, stdout=out)
+        self.assertIn('invoices overdue', out.getvalue())
+        statuses = dict(Invoice.objects.filter(pk__in=[past_due.pk, current.pk, draft.pk]).values_list('pk', 'status'))
+        self.assertEqual(statuses, {past_due.pk: 'overdue', current.pk: 'sent', draft.pk: 'draft'})
+        
+        self.assertEqual(overdue_ids(), before)
+        self.assertEqual(self.client.get(reverse('sales-stats-list')).data['overdue_invoices'], overdue_before)
+        # Nothing left to sweep
+        self.assertEqual(sweep_overdue_invoices(self.tenant), 0)
+
+
+class SalesRollupTests(TenantAPITestCase):
+    def monthly_revenue(self):
+        response = self.client.get(reverse('sales-analytics-list'),
+                                   {'granularity': 'month', 'start_date': '2020-01-01', 'end_date': '2020-02-29'})
+        self.assertEqual(response.status_code, 200)
+        return [Decimal(point['revenue']) for point in response.data['series']]
+
+    def test_series_follow_invoice_writes_in_tenant_timezone(self):
+        self.tenant.timezone = 'Asia/Karachi'
+        self.tenant.save()
+        invoice = self.fresh_invoice()
+        
+        # 21:00 UTC on Jan 31 is already Feb 1 in Karachi (UTC+5)
+        invoice.invoice_date = datetime(2020, 1, 31, 21, 0, tzinfo=dt_timezone.utc)
+        invoice.save()
+        self.assertEqual(self.monthly_revenue(), [Decimal('0.00'), invoice.total_amount])
+        
+        invoice.invoice_date = datetime(2020, 1, 15, tzinfo=dt_timezone.utc)
+        invoice.save()
+        self.assertEqual(self.monthly_revenue(), [invoice.total_amount, Decimal('0.00')])
+        
+        invoice.delete()
+        self.assertEqual(self.monthly_revenue(), [Decimal('0.00'), Decimal('0.00')])
+
+    def rollups(self):
+        rows = DailySalesRollup.objects.filter(tenant=self.tenant).order_by('date').values_list(
+            'date', 'revenue', 'invoice_count', 'paid_amount', 'new_customers'
+        )
+        return [row for row in rows if any(row[1:])]
+
+    def test_deltas_agree_with_a_rebuild(self):
+        rebuild_rollups(self.tenant)
+        invoice = self.fresh_invoice()
+        make_customer(self.tenant, self.user, self.serial())
+        payment = make_payment(self.tenant, self.user, invoice, Decimal('3.00'))
+        payment.payment_date -= timezone.timedelta(days=3)
+        payment.save()
+        invoice.invoice_date -= timezone.timedelta(days=2)
+        invoice.save()
+        draft = self.fresh_invoice(status='draft')
+        draft.status = 'sent'
+        draft.save(update_fields=['status'])
+        self.fresh_invoice().delete()
+        
+        maintained = self.rollups()
+        rebuild_rollups(self.tenant)
+        self.assertEqual(maintained, self.rollups())
+
+    def test_removing_uncounted_history_does_not_fail(self):
+        # Documents from before the rollups existed were never added to their day
+        invoice = self.fresh_invoice()
+        DailySalesRollup.objects.filter(tenant=self.tenant).update(invoice_count=0, new_customers=0)
+        invoice.delete()
+        self.assertTrue(DailySalesRollup.objects.filter(tenant=self.tenant, invoice_count=-1).exists())
+        rebuild_rollups(self.tenant)
+        self.assertFalse(DailySalesRollup.objects.filter(tenant=self.tenant, invoice_count__lt=0).exists())
+
+    def test_rejects_oversized_ranges(self):
+        response = self.client.get(reverse('sales-analytics-list'),
+                                   {'granularity': 'day', 'start_date': '2020-01-01', 'end_date': '2022-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+
+class PaymentLedgerTests(TenantAPITestCase):
+    neighbour = True
+
+    def invoice_state(self, invoice):
+        invoice.refresh_from_db()
+        return invoice.paid_amount, invoice.status
+
+    def test_payments_post_deltas_to_the_invoice(self):
+        invoice = self.fresh_invoice()
+        total = invoice.total_amount
+        
+        response = self.client.post(reverse('payment-list'), {
+            'invoice': invoice.pk, 'customer': str(invoice.customer_id), 'payment_date': timezone.now().isoformat(),
+            'amount': '1.00', 'payment_method': 'cash', 'status': 'completed',
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.invoice_state(invoice), (Decimal('1.00'), 'partially_paid'))
+        
+        payment_url = reverse('payment-detail', kwargs={'pk': response.data['id']})
+        self.client.patch(payment_url, {'amount': str(total)}, format='json')
+        self.assertEqual(self.invoice_state(invoice), (total, 'paid'))
+        
+        pending = make_payment(self.tenant, self.user, invoice, Decimal('5.00'), status='pending')
+        self.assertEqual(self.invoice_state(invoice), (total, 'paid'))
+        self.client.post(reverse('payment-process', kwargs={'pk': pending.pk}))
+        self.assertEqual(self.invoice_state(invoice), (total + 5, 'paid'))
+        # Processing twice must not post twice
+        self.assertEqual(self.client.post(reverse('payment-process', kwargs={'pk': pending.pk})).status_code, 400)
+        
+        self.client.delete(reverse('payment-detail', kwargs={'pk': pending.pk}))
+        self.client.delete(payment_url)
+        self.assertEqual(self.invoice_state(invoice), (Decimal('0.00'), 'sent'))
+
+    def pay(self, invoice, **fields):
+        return self.client.post(reverse('payment-list'), {
+            'invoice': invoice.pk, 'customer': str(invoice.customer_id), 'payment_date': timezone.now().isoformat(),
+            'amount': '1.00', 'payment_method': 'cash', 'status': 'completed', **fields,
+        }, format='json')
+
+    def test_mark_paid_records_a_payment(self):
+        invoice = self.fresh_invoice()
+        self.pay(invoice)
+        response = self.client.post(reverse('invoice-mark-paid', kwargs={'pk': invoice.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.invoice_state(invoice), (invoice.total_amount, 'paid'))
+        self.assertEqual(invoice.payments.filter(status='completed').count(), 2)
+        
+        out = io.StringIO()
+        call_command('reconcile_invoice_payments', stdout=out)
+        self.assertNotIn(invoice.invoice_number, out.getvalue())
+        
+        draft = self.fresh_invoice(status='draft')
+        response = self.client.post(reverse('invoice-mark-paid', kwargs={'pk': draft.pk}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.invoice_state(draft), (draft.total_amount, 'paid'))
+
+    def test_payments_leave_draft_and_cancelled_status(self):
+        for status in ('draft', 'cancelled'):
+            invoice = self.fresh_invoice(status=status)
+            self.pay(invoice, amount=str(invoice.total_amount))
+            self.assertEqual(self.invoice_state(invoice), (invoice.total_amount, status))
+
+    def test_payments_only_reference_own_tenant_invoices(self):
+        foreign = Invoice.objects.exclude(tenant=self.tenant).order_by('pk').first()
+        response = self.pay(foreign, customer=str(self.first(Customer).pk))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('invoice', response.data)
+
+    def test_reconcile_detects_and_repairs_drift(self):
+        invoice = self.fresh_invoice()
+        Invoice.objects.filter(pk=invoice.pk).update(paid_amount=Decimal('3.00'))
+        
+        out = io.StringIO()
+        call_command('reconcile_invoice_payments', stdout=out)
+        self.assertIn(invoice.invoice_number, out.getvalue())
+        self.assertEqual(self.invoice_state(invoice)[0], Decimal('3.00'))
+        
+        call_command('reconcile_invoice_payments', '--fix', stdout=io.StringIO())
+        self.assertEqual(self.invoice_state(invoice), (Decimal('0.00'), invoice.status))
+        out = io.StringIO()
+        call_command('reconcile_invoice_payments', stdout=out)
+        self.assertIn('All invoices reconcile', out.getvalue())
+
+
+class CustomerTotalsTests(TenantAPITestCase):
+    def summary(self, customer):
+        customer.refresh_from_db()
+        return customer.total_orders, customer.last_order_date, customer.total_spent, customer.outstanding_balance
+
+    def assertInStep(self):
+        """The incrementally maintained totals agree with a full recompute"""
+        self.assertEqual(recompute_customer_totals(self.tenant), 0)
+
+    def test_writes_keep_totals_current(self):
+        self.assertInStep()
+        customer = self.first(Customer)
+        orders, _, spent, outstanding = self.summary(customer)
+        invoice = self.fresh_invoice()
+        today = local_date(timezone.now(), tenant_timezone(self.tenant))
+        self.assertEqual(self.summary(customer), (orders + 1, today, spent,
+                                                  outstanding + invoice.total_amount))
+        orders, outstanding = orders + 1, outstanding + invoice.total_amount
+        self.assertInStep()
+        
+        self.client.post(reverse('payment-list'), {
+            'invoice': invoice.pk, 'customer': str(customer.pk), 'payment_date': timezone.now().isoformat(),
+            'amount': '1.00', 'payment_method': 'cash', 'status': 'completed',
+        }, format='json')
+        self.assertEqual(self.summary(customer)[2:], (spent + 1, outstanding - 1))
+        self.assertInStep()
+        
+        item = invoice.items.order_by('pk').first()
+        response = self.client.patch(
+            reverse('invoice-update-item', kwargs={'pk': invoice.pk, 'item_id': item.pk}),
+            {'quantity': str(item.quantity + 1)}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.summary(customer)[3], outstanding - 1 + item.unit_price)
+        self.assertInStep()
+        
+        self.client.post(reverse('invoice-mark-paid', kwargs={'pk': invoice.pk}))
+        self.assertInStep()
+        invoice.refresh_from_db()
+        invoice.delete()
+        invoice.sales_order.delete()
+        self.assertEqual(self.summary(customer)[0], orders - 1)
+        self.assertInStep()
+
+    def test_saves_post_against_the_stored_row(self):
+        # Amounts deferred when loading are read back before the save
+        invoice = Invoice.objects.only('pk', 'tenant', 'status').get(pk=self.fresh_invoice().pk)
+        invoice.status = 'cancelled'
+        invoice.save(update_fields=['status'])
+        self.assertInStep()
+        invoice.status = 'sent'
+        invoice.save()
+        self.assertInStep()
+
+    def test_last_order_date_uses_tenant_timezone(self):
+        self.tenant.timezone = 'Asia/Karachi'
+        self.tenant.save()
+        order = self.fresh_order()
+        order.order_date = datetime(2040, 1, 31, 21, 0, tzinfo=dt_timezone.utc)
+        order.save()
+        self.assertEqual(self.summary(order.customer)[1], datetime(2040, 2, 1).date())
+        self.assertInStep()
+        order.delete()
+        self.assertInStep()
+
+    def test_recompute_command_repairs_drift(self):
+        customer = self.fresh_invoice().customer
+        expected = self.summary(customer)
+        Customer.objects.filter(tenant=self.tenant).update(
+            total_orders=0, total_spent=0, outstanding_balance=0, last_order_date=None
+        )
+        
+        out = io.StringIO()
+        call_command('recompute_customer_totals', '--tenant', self.tenant.slug, stdout=out)
+        self.assertIn(self.tenant.slug, out.getvalue())
+        self.assertEqual(self.summary(customer), expected)
+
+
+@skipIf(weasyprint is None, 'WeasyPrint or its system libraries are not installed')
+@override_settings(PDF_RENDER_WORKERS=1, PDF_RENDER_QUEUE_SIZE=0)
+class PdfWorkerPoolTests(SimpleTestCase):
+    def setUp(self):
+        self.addCleanup(pdf_workers.shutdown_pool)
+
+    def test_renders_on_worker(self):
+        pdf = pdf_workers.render_pdf('<html><body>Invoice</body></html>')
+        self.assertTrue(pdf.startswith(b'%PDF'))
+
+    def test_rejects_when_saturated(self):
+        _, slots = pdf_workers._get_pool()
+        slots.acquire()
+        try:
+            with self.assertRaises(pdf_workers.PdfQueueFull):
+                pdf_workers.render_pdf('<html><body>Invoice</body></html>')
+        finally:
+            slots.release()
+
+    def test_timed_out_render_keeps_its_slot_until_done(self):
+        html = '<html><body>Invoice</body></html>'
+        future = pdf_workers.submit_pdf(html)
+        with self.assertRaises(pdf_workers.PdfRenderTimeout):
+            pdf_workers.wait_for_pdf(future, timeout=0.001)
+        if not future.done():
+            with self.assertRaises(pdf_workers.PdfQueueFull):
+                pdf_workers.submit_pdf(html)
+        # Freed once the worker finishes the abandoned job
+        self.assertTrue(pdf_workers.wait_for_pdf(pdf_workers.submit_pdf(html, wait=60)).startswith(b'%PDF'))
@@ -1,12 +1,14 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import SalesOrderViewSet, InvoiceViewSet, PaymentViewSet, SalesStatsViewSet
+from .views import SalesOrderViewSet, InvoiceViewSet, PaymentViewSet, SalesStatsViewSet, SalesAnalyticsViewSet, ReceivablesAgingViewSet
 
 router = DefaultRouter()
 router.register(r'orders', SalesOrderViewSet, basename='salesorder')
 router.register(r'invoices', InvoiceViewSet, basename='invoice')
 router.register(r'payments', PaymentViewSet, basename='payment')
 router.register(r'stats', SalesStatsViewSet, basename='sales-stats')
+router.register(r'analytics', SalesAnalyticsViewSet, basename='sales-analytics')
+router.register(r'aging', ReceivablesAgingViewSet, basename='sales-aging')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -2,21 +2,91 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from django.utils import timezone
-from django.db.models import Q, Sum, Count
+from django.db import transaction
+from django.db.models import Q, Sum, Count, F
+from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 import django_filters
-from django.http import HttpResponse
-from django.template.loader import render_to_string
-from weasyprint import HTML
-import io
+from django.conf import settings
+from django.http import FileResponse, StreamingHttpResponse
 
+from tenants.eager_loading import EagerLoadingMixin, apply_eager_loading
+from tenants.exports import CsvExportMixin
+from tenants.pagination import KeysetPagination, PageNumberPagination
+from tenants.snapshots import get_snapshot, invalidate_snapshots
+from .aging import customer_aging, tenant_aging
+from .customer_totals import UNBILLED_STATUSES, ZERO, post_customer_deltas
+from .invoicing import BILLABLE_ORDERS, invoice_orders, uninvoiced
+from .ledger import payment_contribution, post_payment_change, settle_invoice
 from .models import SalesOrder, Invoice, Payment
+from .overdue import overdue_q
+from .pdf import get_invoice_pdf, stream_invoice_pdf_zip
+from .pdf_workers import PdfQueueFull, PdfRenderError, PdfRenderTimeout
+from .rollups import default_range, local_date, post_rollup_deltas, sales_series, tenant_timezone
 from .serializers import (
-    SalesOrderSerializer, SalesOrderListSerializer,
-    InvoiceSerializer, InvoiceListSerializer,
-    PaymentSerializer, SalesStatsSerializer
+    SalesOrderSerializer, SalesOrderListSerializer, SalesOrderItemSerializer,
+    InvoiceSerializer, InvoiceListSerializer, InvoiceItemSerializer,
+    PaymentSerializer, SalesStatsSerializer, SalesAnalyticsQuerySerializer, SalesSeriesPointSerializer,
+    AgingQuerySerializer, AgingBucketsSerializer, CustomerAgingSerializer
 )
+from .stock import RESERVED_STATUSES, StockError, release_order_stock, reserve_order_stock
+
+
+class LineItemPatchMixin:
+    """
+    Line-level PATCH (`<document>/<pk>/items/<item_id>/`): updates a single item
+    row and shifts the document's subtotal/total by that line's delta instead
+    of rewriting every line.
+    """
+    item_serializer_class = None
+
+    @action(detail=True, methods=['patch'], url_path=r'items/(?P<item_id>\d+)')
+    def update_item(self, request, pk=None, item_id=None):
+        """Update one line item"""
+        document_serializer = self.serializer_class
+        item_model = document_serializer.item_model
+        parent_field = document_serializer.item_parent_field
+        
+        with transaction.atomic():
+            item = get_object_or_404(
+                item_model.objects.select_for_update(of=('self',)).select_related('product', parent_field),
+                id=item_id,
+                tenant=request.tenant,
+                **{f'{parent_field}_id': pk}
+            )
+            previous_total = item.line_total
+            
+            serializer = self.item_serializer_class(
+                item, data=request.data, partial=True, context=self.get_serializer_context()
+            )
+            serializer.is_valid(raise_exception=True)
+            serializer.validated_data.pop('id', None)
+            document = getattr(item, parent_field)
+            if document.status in document_serializer.locked_statuses and any(
+                field in serializer.validated_data and serializer.validated_data[field] != getattr(item, field)
+                for field in document_serializer.LOCKED_ITEM_FIELDS
+            ):
+                return Response(
+                    {'error': f'Products and quantities cannot be changed on a {document.status} document'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            serializer.save()
+            
+            delta = item.line_total - previous_total
+            if delta:
+                document_serializer.Meta.model.objects.filter(pk=pk, tenant=request.tenant).update(
+                    subtotal=F('subtotal') + delta,
+                    total_amount=F('total_amount') + delta,
+                    updated_at=timezone.now()
+                )
+                self.totals_changed(pk, delta)
+        
+        return Response(serializer.data)
+
+    def totals_changed(self, pk, delta):
+        """Refresh data derived from a document's totals after the update() above, which sends no signals"""
 
 
 class SalesOrderFilter(django_filters.FilterSet):
@@ -33,19 +103,25 @@ class SalesOrderFilter(django_filters.FilterSet):
         fields = ['status', 'priority', 'customer']
 
 
-class SalesOrderViewSet(viewsets.ModelViewSet):
+class SalesOrderViewSet(CsvExportMixin, EagerLoadingMixin, LineItemPatchMixin, viewsets.ModelViewSet):
     serializer_class = SalesOrderSerializer
+    item_serializer_class = SalesOrderItemSerializer
     permission_classes = [permissions.IsAuthenticated]
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = SalesOrderFilter
     search_fields = ['order_number', 'reference', 'customer__name', 'notes']
     ordering_fields = ['order_date', 'total_amount', 'created_at', 'updated_at']
     ordering = ['-created_at']
+    export_name = 'sales-orders'
+    export_columns = [
+        ('Order number', 'order_number'), ('Reference', 'reference'), ('Customer', 'customer__name'),
+        ('Order date', 'order_date'), ('Expected delivery', 'expected_delivery_date'), ('Status', 'status'),
+        ('Priority', 'priority'), ('Subtotal', 'subtotal'), ('Tax', 'tax_amount'), ('Discount', 'discount_amount'),
+        ('Total', 'total_amount'), ('Created by', 'created_by__username'), ('Created at', 'created_at'),
+    ]
 
     def get_queryset(self):
-        return SalesOrder.objects.filter(
-            tenant=self.request.user.tenant_membership.tenant
-        ).select_related('customer', 'created_by', 'assigned_to').prefetch_related('items__product')
+        return SalesOrder.objects.filter(tenant=self.request.tenant)
 
     def get_serializer_class(self):
         if self.action == 'list':
@@ -55,72 +131,69 @@ class SalesOrderViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['post'])
     def confirm(self, request, pk=None):
         """Confirm a sales order"""
-        order = self.get_object()
-        if order.status == 'draft':
+        with transaction.atomic():
+            # Locked so concurrent requests cannot reserve the stock twice
+            order = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            if order.status != 'draft':
+                return Response(
+                    {'error': 'Only draft orders can be confirmed'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                reserve_order_stock(order, request.user)
+            except StockError as e:
+                return Response(
+                    {'error': str(e), 'shortages': e.shortages},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
             order.status = 'confirmed'
             order.save(update_fields=['status'])
-            return Response({'message': 'Sales order confirmed successfully'})
-        return Response(
-            {'error': 'Only draft orders can be confirmed'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        return Response({'message': 'Sales order confirmed successfully'})
 
     @action(detail=True, methods=['post'])
     def cancel(self, request, pk=None):
         """Cancel a sales order"""
-        order = self.get_object()
-        if order.status not in ['delivered', 'cancelled']:
+        with transaction.atomic():
+            order = get_object_or_404(self.get_queryset().select_for_update(), pk=pk)
+            if order.status in ['delivered', 'cancelled']:
+                return Response(
+                    {'error': 'Cannot cancel delivered or already cancelled orders'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if order.status in RESERVED_STATUSES:
+                release_order_stock(order, request.user)
             order.status = 'cancelled'
             order.save(update_fields=['status'])
-            return Response({'message': 'Sales order cancelled successfully'})
-        return Response(
-            {'error': 'Cannot cancel delivered or already cancelled orders'},
-            status=status.HTTP_400_BAD_REQUEST
-        )
+        return Response({'message': 'Sales order cancelled successfully'})
 
     @action(detail=True, methods=['post'])
     def create_invoice(self, request, pk=None):
         """Create invoice from sales order"""
         order = self.get_object()
-        
-        # Check if invoice already exists
-        if order.invoices.exists():
+        invoices = invoice_orders(request.tenant, request.user, SalesOrder.objects.filter(pk=order.pk))
+        if not invoices:
             return Response(
                 {'error': 'Invoice already exists for this order'},
                 status=status.HTTP_400_BAD_REQUEST
             )
+        return Response(InvoiceSerializer(invoices[0]).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['post'])
+    def create_invoices(self, request):
+        """Create draft invoices for every billable, uninvoiced order matching the list filters"""
+        orders = self.filter_queryset(self.get_queryset()).filter(BILLABLE_ORDERS)
+        count = uninvoiced(orders).count()
+        if count > settings.INVOICE_BATCH_MAX:
+            return Response(
+                {'error': f'At most {settings.INVOICE_BATCH_MAX} orders can be invoiced at once; narrow the filters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        # Create invoice
-        invoice_data = {
-            'sales_order': order.id,
-            'customer': order.customer.id,
-            'invoice_date': timezone.now(),
-            'due_date': timezone.now() + timezone.timedelta(days=30),
-            'payment_terms': 'net_30',
-            'subtotal': order.subtotal,
-            'tax_amount': order.tax_amount,
-            'discount_amount': order.discount_amount,
-            'total_amount': order.total_amount,
-            'notes': order.notes,
-            'items': []
-        }
-        
-        # Copy items from order to invoice
-        for item in order.items.all():
-            invoice_data['items'].append({
-                'product': item.product.id,
-                'quantity': item.quantity,
-                'unit_price': item.unit_price,
-                'discount_percent': item.discount_percent,
-                'notes': item.notes
-            })
-        
-        serializer = InvoiceSerializer(data=invoice_data, context={'request': request})
-        if serializer.is_valid():
-            invoice = serializer.save()
-            return Response(InvoiceSerializer(invoice).data, status=status.HTTP_201_CREATED)
-        
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        invoices = invoice_orders(request.tenant, request.user, orders) if count else []
+        return Response(
+            {'message': f'{len(invoices)} invoices created', 'created': len(invoices)},
+            status=status.HTTP_201_CREATED if invoices else status.HTTP_200_OK
+        )
 
 
 class InvoiceFilter(django_filters.FilterSet):
@@ -131,6 +204,8 @@ class InvoiceFilter(django_filters.FilterSet):
     invoice_date_to = django_filters.DateTimeFilter(field_name='invoice_date', lookup_expr='lte')
     due_date_from = django_filters.DateTimeFilter(field_name='due_date', lookup_expr='gte')
     due_date_to = django_filters.DateTimeFilter(field_name='due_date', lookup_expr='lte')
+    balance_due_min = django_filters.NumberFilter(field_name='balance_due', lookup_expr='gte')
+    balance_due_max = django_filters.NumberFilter(field_name='balance_due', lookup_expr='lte')
     overdue = django_filters.BooleanFilter(method='filter_overdue')
 
     class Meta:
@@ -139,29 +214,48 @@ class InvoiceFilter(django_filters.FilterSet):
 
     def filter_overdue(self, queryset, name, value):
         if value:
-            return queryset.filter(due_date__lt=timezone.now(), status__in=['sent', 'partially_paid'])
+            return queryset.filter(overdue_q())
         return queryset
 
 
-class InvoiceViewSet(viewsets.ModelViewSet):
+class InvoiceViewSet(CsvExportMixin, EagerLoadingMixin, LineItemPatchMixin, viewsets.ModelViewSet):
     serializer_class = InvoiceSerializer
+    item_serializer_class = InvoiceItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     filterset_class = InvoiceFilter
     search_fields = ['invoice_number', 'reference', 'customer__name', 'notes']
-    ordering_fields = ['invoice_date', 'due_date', 'total_amount', 'created_at']
+    ordering_fields = ['invoice_date', 'due_date', 'total_amount', 'balance_due', 'created_at']
     ordering = ['-created_at']
+    export_name = 'invoices'
+    export_columns = [
+        ('Invoice number', 'invoice_number'), ('Reference', 'reference'), ('Sales order', 'sales_order__order_number'),
+        ('Customer', 'customer__name'), ('Invoice date', 'invoice_date'), ('Due date', 'due_date'),
+        ('Payment terms', 'payment_terms'), ('Status', 'status'), ('Subtotal', 'subtotal'), ('Tax', 'tax_amount'),
+        ('Discount', 'discount_amount'), ('Total', 'total_amount'), ('Paid', 'paid_amount'),
+        ('Sent at', 'sent_at'), ('Created at', 'created_at'),
+    ]
 
     def get_queryset(self):
-        return Invoice.objects.filter(
-            tenant=self.request.user.tenant_membership.tenant
-        ).select_related('customer', 'sales_order', 'created_by').prefetch_related('items__product')
+        return Invoice.objects.filter(tenant=self.request.tenant)
 
     def get_serializer_class(self):
         if self.action == 'list':
             return InvoiceListSerializer
         return InvoiceSerializer
 
+    def totals_changed(self, pk, delta):
+        tenant = self.request.tenant
+        invoice_date, customer_id, invoice_status = Invoice.objects.filter(pk=pk).values_list(
+            'invoice_date', 'customer_id', 'status'
+        ).get()
+        if invoice_status not in UNBILLED_STATUSES:
+            day = local_date(invoice_date, tenant_timezone(tenant))
+            post_rollup_deltas(tenant, {day: {'revenue': delta}})
+            post_customer_deltas(tenant.pk, {customer_id: (ZERO, delta)})
+        invalidate_snapshots(tenant.pk, 'sales')
+
     @action(detail=True, methods=['post'])
     def send(self, request, pk=None):
         """Mark invoice as sent"""
@@ -181,9 +275,8 @@ class InvoiceViewSet(viewsets.ModelViewSet):
         """Mark invoice as fully paid"""
         invoice = self.get_object()
         if invoice.status not in ['paid', 'cancelled']:
-            invoice.status = 'paid'
-            invoice.paid_amount = invoice.total_amount
-            invoice.save(update_fields=['status', 'paid_amount'])
+            # Records a payment for the balance so the ledger stays reconciled
+            settle_invoice(invoice, request.user)
             return Response({'message': 'Invoice marked as paid'})
         return Response(
             {'error': 'Cannot mark paid/cancelled invoices as paid'},
@@ -194,62 +287,97 @@ class InvoiceViewSet(viewsets.ModelViewSet):
     def payments(self, request, pk=None):
         """Get payments for this invoice"""
         invoice = self.get_object()
-        payments = invoice.payments.all()
+        payments = apply_eager_loading(invoice.payments.all(), PaymentSerializer)
         serializer = PaymentSerializer(payments, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    def download_pdfs(self, request):
+        """Download every invoice matching the list filters as a ZIP of PDFs"""
+        invoices = self.filter_queryset(self.get_queryset())
+        count = invoices.count()
+        if not count:
+            return Response({'error': 'No invoices match these filters'}, status=status.HTTP_404_NOT_FOUND)
+        if count > settings.INVOICE_PDF_EXPORT_MAX:
+            return Response(
+                {'error': f'At most {settings.INVOICE_PDF_EXPORT_MAX} invoices can be exported at once; narrow the filters'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        response = StreamingHttpResponse(
+            stream_invoice_pdf_zip(invoices.iterator(chunk_size=100), request.tenant),
+            content_type='application/zip'
+        )
+        response['Content-Disposition'] = f'attachment; filename="Invoices-{timezone.now():%Y%m%d}.zip"'
+        return response
+
     @action(detail=True, methods=['get'])
     def download_pdf(self, request, pk=None):
         """Download invoice as PDF"""
         invoice = self.get_object()
-        tenant = request.user.tenant_membership.tenant
-        
-        # Render the HTML template
-        html_content = render_to_string('invoice_template.html', {
-            'invoice': invoice,
-            'tenant': tenant,
-        })
-        
-        # Create PDF from HTML
-        html = HTML(string=html_content)
-        pdf_file = io.BytesIO()
-        html.write_pdf(target=pdf_file)
-        pdf_file.seek(0)
-        
-        # Prepare response
-        response = HttpResponse(pdf_file.read(), content_type='application/pdf')
-        response['Content-Disposition'] = f'attachment; filename="Invoice-{invoice.invoice_number}.pdf"'
-        
-        return response
+        try:
+            pdf_path = get_invoice_pdf(invoice, request.tenant)
+        except PdfQueueFull:
+            return Response(
+                {'error': 'PDF rendering is busy, please try again shortly'},
+                status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                headers={'Retry-After': '5'}
+            )
+        except PdfRenderTimeout:
+            return Response(
+                {'error': 'PDF rendering timed out'},
+                status=status.HTTP_504_GATEWAY_TIMEOUT
+            )
+        except PdfRenderError as e:
+            return Response({'error': str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        return FileResponse(
+            open(pdf_path, 'rb'),
+            as_attachment=True,
+            filename=f'Invoice-{invoice.invoice_number}.pdf',
+            content_type='application/pdf'
+        )
 
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(CsvExportMixin, EagerLoadingMixin, viewsets.ModelViewSet):
     serializer_class = PaymentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = KeysetPagination
     filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
     search_fields = ['payment_number', 'reference', 'transaction_id', 'customer__name']
     ordering_fields = ['payment_date', 'amount', 'created_at']
     ordering = ['-created_at']
+    export_name = 'payments'
+    export_columns = [
+        ('Payment number', 'payment_number'), ('Reference', 'reference'), ('Invoice', 'invoice__invoice_number'),
+        ('Customer', 'customer__name'), ('Payment date', 'payment_date'), ('Amount', 'amount'),
+        ('Method', 'payment_method'), ('Status', 'status'), ('Transaction ID', 'transaction_id'),
+        ('Processed at', 'processed_at'), ('Created at', 'created_at'),
+    ]
 
     def get_queryset(self):
-        return Payment.objects.filter(
-            tenant=self.request.user.tenant_membership.tenant
-        ).select_related('invoice', 'customer', 'created_by')
+        return Payment.objects.filter(tenant=self.request.tenant)
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            post_payment_change((instance.invoice_id, payment_contribution(instance)), None)
+            instance.delete()
 
     @action(detail=True, methods=['post'])
     def process(self, request, pk=None):
         """Mark payment as processed/completed"""
         payment = self.get_object()
-        if payment.status == 'pending':
-            payment.status = 'completed'
-            payment.processed_at = timezone.now()
-            payment.save(update_fields=['status', 'processed_at'])
-            
-            # Update invoice payment status
-            serializer = PaymentSerializer(payment)
-            serializer._update_invoice_payment_status(payment.invoice)
-            
-            return Response({'message': 'Payment processed successfully'})
+        with transaction.atomic():
+            # Re-read under a lock so concurrent requests cannot post the same payment twice
+            payment = Payment.objects.select_for_update().get(pk=payment.pk)
+            if payment.status == 'pending':
+                payment.status = 'completed'
+                payment.processed_at = timezone.now()
+                payment.save(update_fields=['status', 'processed_at'])
+                
+                # Post the payment to its invoice's paid amount
+                post_payment_change(None, (payment.invoice_id, payment_contribution(payment)))
+                
+                return Response({'message': 'Payment processed successfully'})
         return Response(
             {'error': 'Only pending payments can be processed'},
             status=status.HTTP_400_BAD_REQUEST
@@ -261,40 +389,99 @@ class SalesStatsViewSet(viewsets.ViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def list(self, request):
-        tenant = request.user.tenant_membership.tenant
-        
-        # Get statistics
-        total_orders = SalesOrder.objects.filter(tenant=tenant).count()
-        total_invoices = Invoice.objects.filter(tenant=tenant).count()
-        total_revenue = Invoice.objects.filter(
-            tenant=tenant, 
-            status='paid'
-        ).aggregate(total=Sum('total_amount'))['total'] or 0
-        
-        pending_orders = SalesOrder.objects.filter(
-            tenant=tenant, 
-            status__in=['draft', 'confirmed']
-        ).count()
-        
-        overdue_invoices = Invoice.objects.filter(
-            tenant=tenant,
-            due_date__lt=timezone.now(),
-            status__in=['sent', 'partially_paid']
-        ).count()
+        tenant = request.tenant
+        return Response(get_snapshot(tenant, 'sales', lambda: self._compute(tenant)))
+
+    def _compute(self, tenant):
+        # One conditional aggregation per table
+        order_stats = SalesOrder.objects.filter(tenant=tenant).aggregate(
+            total_orders=Count('pk'),
+            pending_orders=Count('pk', filter=Q(status__in=['draft', 'confirmed'])),
+        )
+        invoice_stats = Invoice.objects.filter(tenant=tenant).aggregate(
+            total_invoices=Count('pk'),
+            total_revenue=Sum('total_amount', filter=Q(status='paid')),
+            overdue_invoices=Count('pk', filter=overdue_q()),
+        )
         
         # Get recent data
-        recent_orders = SalesOrder.objects.filter(tenant=tenant)[:5]
-        recent_invoices = Invoice.objects.filter(tenant=tenant)[:5]
+        recent_orders = apply_eager_loading(SalesOrder.objects.filter(tenant=tenant), SalesOrderListSerializer)[:5]
+        recent_invoices = apply_eager_loading(Invoice.objects.filter(tenant=tenant), InvoiceListSerializer)[:5]
         
         data = {
-            'total_orders': total_orders,
-            'total_invoices': total_invoices,
-            'total_revenue': total_revenue,
-            'pending_orders': pending_orders,
-            'overdue_invoices': overdue_invoices,
+            **order_stats,
+            **invoice_stats,
+            'total_revenue': invoice_stats['total_revenue'] or 0,
             'recent_orders': recent_orders,
             'recent_invoices': recent_invoices,
         }
         
         serializer = SalesStatsSerializer(data)
-        return Response(serializer.data)
\ No newline at end of file
+        return serializer.data
+
+
+class SalesAnalyticsViewSet(viewsets.ViewSet):
+    """Revenue, invoice, payment and new-customer totals per day/week/month"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        tenant = request.tenant
+        query = SalesAnalyticsQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        granularity = query.validated_data['granularity']
+        start_date = query.validated_data.get('start_date')
+        end_date = query.validated_data.get('end_date')
+        if not start_date:
+            start_date, end_date = default_range(tenant, granularity)
+        
+        series = sales_series(tenant, granularity, start_date, end_date)
+        return Response({
+            'granularity': granularity,
+            'timezone': str(tenant_timezone(tenant)),
+            'start_date': start_date,
+            'end_date': end_date,
+            'series': SalesSeriesPointSerializer(series, many=True).data,
+        })
+
+
+class ReceivablesAgingViewSet(viewsets.ViewSet):
+    """Outstanding invoice balances per customer by days past due, largest exposure first"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def list(self, request):
+        tenant = request.tenant
+        query = AgingQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        as_of = query.validated_data.get('as_of') or local_date(timezone.now(), tenant_timezone(tenant))
+        params = {**request.query_params.dict(), 'report': 'aging', 'as_of': as_of}
+        report = get_snapshot(tenant, 'sales', lambda: self._compute(request, tenant, as_of), params)
+        # Links are absolute, so they are built for this request rather than cached
+        page, pages = report['page'], report['pages']
+        return Response({
+            'as_of': report['as_of'],
+            'timezone': report['timezone'],
+            'totals': report['totals'],
+            'count': report['count'],
+            'next': self._page_link(request, page + 1) if page < pages else None,
+            'previous': self._page_link(request, page - 1) if page > 1 else None,
+            'results': report['results'],
+        })
+
+    def _page_link(self, request, number):
+        url = request.build_absolute_uri()
+        if number == 1:
+            return remove_query_param(url, PageNumberPagination.page_query_param)
+        return replace_query_param(url, PageNumberPagination.page_query_param, number)
+
+    def _compute(self, request, tenant, as_of):
+        paginator = PageNumberPagination()
+        rows = paginator.paginate_queryset(customer_aging(tenant, as_of), request, view=self)
+        return {
+            'as_of': as_of,
+            'timezone': str(tenant_timezone(tenant)),
+            'totals': AgingBucketsSerializer(tenant_aging(tenant, as_of)).data,
+            'count': paginator.page.paginator.count,
+            'page': paginator.page.number,
+            'pages': paginator.page.paginator.num_pages,
+            'results': CustomerAgingSerializer(rows, many=True).data,
+        }
@@ -1,3 +1,10 @@
 from django.contrib import admin
+from .models import DocumentSequence
 
-# Register your models here.
+
+@admin.register(DocumentSequence)
+class DocumentSequenceAdmin(admin.ModelAdmin):
+    list_display = ['tenant', 'name', 'format', 'next_value', 'updated_at']
+    list_filter = ['name']
+    search_fields = ['tenant__name', 'name']
+    readonly_fields = ['updated_at']
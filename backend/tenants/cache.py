@@ -0,0 +1,223 @@
+"""
+Tenant context cache.
+
+Resolving a user's organization means walking `owned_tenant` and
+`tenant_membership` on every request. The result rarely changes, so it is kept
+as an immutable snapshot in a small per-process LRU (short TTL) backed by the
+configured Django cache (longer TTL). Signals in `tenants.signals` invalidate
+both layers whenever a Tenant or TenantUser is written.
+
+Invalidation can only clear the LRU of the process that handles the write, so
+every local entry records the user's generation token from the shared cache.
+A local hit is served only while that token is unchanged; invalidating a user
+replaces the token, which retires the entry in every other worker on its next
+lookup. Checking the token is one small cache read instead of fetching and
+unpickling the whole snapshot.
+"""
+from collections import OrderedDict
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import models
+
+from .models import Tenant, TenantUser
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'tenant_ctx'
+GENERATION_KEY_PREFIX = 'tenant_ctx_gen'
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class TenantContext:
+    """
+    Immutable snapshot of the organization and role resolved for one user.
+    `tenant_state` holds the tenant's concrete field values so a Tenant
+    instance can be rebuilt without touching the database.
+    """
+    __slots__ = ('user_id', 'tenant_id', 'role', 'tenant_state')
+
+    def __init__(self, user_id, tenant_id=None, role=None, tenant_state=()):
+        object.__setattr__(self, 'user_id', user_id)
+        object.__setattr__(self, 'tenant_id', tenant_id)
+        object.__setattr__(self, 'role', role)
+        object.__setattr__(self, 'tenant_state', tuple(tenant_state))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('TenantContext is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError('TenantContext is immutable')
+
+    def __reduce__(self):
+        return (TenantContext, (self.user_id, self.tenant_id, self.role, self.tenant_state))
+
+    def __repr__(self):
+        return f"TenantContext(user_id={self.user_id}, tenant_id={self.tenant_id}, role={self.role!r})"
+
+    @property
+    def has_tenant(self):
+        return self.tenant_id is not None
+
+    @classmethod
+    def from_tenant(cls, user_id, tenant, role):
+        state = []
+        for field in Tenant._meta.concrete_fields:
+            value = field.value_from_object(tenant)
+            if isinstance(field, models.FileField):
+                value = value.name if value else ''
+            state.append((field.attname, value))
+        return cls(user_id, tenant.pk, role, state)
+
+    def build_tenant(self):
+        """Rebuild a Tenant instance from the snapshot (no query)"""
+        if not self.has_tenant:
+            return None
+        field_names, values = zip(*self.tenant_state)
+        return Tenant.from_db('default', list(field_names), list(values))
+
+
+class ResolvedTenantUser:
+    """Request-level view of the user's membership (owner or invited member)"""
+    __slots__ = ('user', 'tenant', 'role', 'is_active')
+
+    def __init__(self, user, tenant, role):
+        self.user = user
+        self.tenant = tenant
+        self.role = role
+        self.is_active = True
+
+
+class _LocalLRU:
+    """Thread-safe per-process LRU with a per-entry TTL"""
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+_local = _LocalLRU(
+    max_entries=_setting('TENANT_CONTEXT_LOCAL_MAX_ENTRIES', 2048),
+    ttl=_setting('TENANT_CONTEXT_LOCAL_TTL', 30),
+)
+
+
+def _cache_key(user_id):
+    return f"{CACHE_KEY_PREFIX}:{user_id}"
+
+
+def _generation_key(user_id):
+    return f"{GENERATION_KEY_PREFIX}:{user_id}"
+
+
+def _generation(user_id):
+    """Current generation token for a user ('' until first invalidated)"""
+    return cache.get(_generation_key(user_id), '')
+
+
+def _resolve_from_db(user_id):
+    """Cold path: at most two queries, mirroring the original owner/member rules"""
+    tenant = Tenant.objects.filter(admin_id=user_id).first()
+    if tenant is not None:
+        return TenantContext.from_tenant(user_id, tenant, 'admin')
+
+    membership = TenantUser.objects.select_related('tenant').filter(user_id=user_id).first()
+    if membership and membership.is_active and membership.tenant.is_active:
+        return TenantContext.from_tenant(user_id, membership.tenant, membership.role)
+
+    return TenantContext(user_id)
+
+
+def get_tenant_context(user_id):
+    """Return the cached TenantContext for a user, resolving it on a miss"""
+    key = _cache_key(user_id)
+    try:
+        generation = _generation(user_id)
+    except Exception as e:
+        logger.warning(f"Tenant context cache unavailable: {e}")
+        generation = None
+
+    entry = _local.get(key)
+    if entry is not None:
+        # Without the shared cache there is nothing to compare against, so the
+        # local TTL is the only bound on staleness.
+        if generation is None or entry[0] == generation:
+            return entry[1]
+        _local.delete(key)
+
+    context = None
+    if generation is not None:
+        try:
+            context = cache.get(key)
+        except Exception as e:
+            logger.warning(f"Tenant context cache unavailable: {e}")
+
+    if context is None:
+        context = _resolve_from_db(user_id)
+        try:
+            cache.set(key, context, _setting('TENANT_CONTEXT_CACHE_TTL', 300))
+        except Exception as e:
+            logger.warning(f"Tenant context cache unavailable: {e}")
+
+    _local.set(key, (generation, context))
+    return context
+
+
+def invalidate_tenant_context(*user_ids):
+    """
+    Drop cached contexts for the given users from both cache layers and bump
+    their generation so other processes discard their local copies too.
+    """
+    user_ids = [user_id for user_id in user_ids if user_id is not None]
+    if not user_ids:
+        return
+    keys = [_cache_key(user_id) for user_id in user_ids]
+    for key in keys:
+        _local.delete(key)
+    token = uuid.uuid4().hex
+    try:
+        cache.set_many({_generation_key(user_id): token for user_id in user_ids}, None)
+        cache.delete_many(keys)
+    except Exception as e:
+        logger.warning(f"Tenant context cache unavailable: {e}")
+
+
+def clear_local_tenant_contexts():
+    """Flush this process's LRU (used by tests)"""
+    _local.clear()
@@ -0,0 +1,71 @@
+"""
+Declarative eager loading for serializers.
+
+A serializer lists the related rows it reads in `Meta.select_related` /
+`Meta.prefetch_related` and declares per-row counts with CountField. Views
+using EagerLoadingMixin apply all of it to their queryset, so a page costs a
+fixed number of queries regardless of its size.
+"""
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from rest_framework import serializers
+
+
+class CountField(serializers.ReadOnlyField):
+    """
+    Number of related rows (optionally filtered), read from a correlated
+    subquery annotation when the view applied one and counted on the
+    instance otherwise (e.g. right after a create).
+    """
+
+    def __init__(self, relation, filter=None, **kwargs):
+        self.relation = relation
+        self.count_filter = filter or {}
+        super().__init__(**kwargs)
+
+    def get_annotation(self, model):
+        rel = model._meta.get_field(self.relation)
+        fk_name = rel.field.name
+        counts = rel.related_model._base_manager.filter(
+            **{fk_name: OuterRef('pk')}, **self.count_filter
+        ).order_by().values(fk_name).annotate(count=Count('pk')).values('count')
+        return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+    def get_attribute(self, instance):
+        if self.field_name in instance.__dict__:
+            return instance.__dict__[self.field_name]
+        return getattr(instance, self.relation).filter(**self.count_filter).count()
+
+
+def apply_eager_loading(queryset, serializer_class):
+    """Apply a serializer's declared select/prefetch/count needs to a queryset"""
+    if serializer_class is None or queryset.query.combinator:
+        return queryset
+
+    meta = getattr(serializer_class, 'Meta', None)
+    select_related = getattr(meta, 'select_related', ())
+    prefetch_related = getattr(meta, 'prefetch_related', ())
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+
+    annotations = {
+        name: field.get_annotation(queryset.model)
+        for name, field in serializer_class._declared_fields.items()
+        if isinstance(field, CountField)
+    }
+    if annotations:
+        queryset = queryset.annotate(**annotations)
+    return queryset
+
+
+class EagerLoadingMixin:
+    """
+    View mixin applying the active serializer's eager loading declarations
+    to every queryset the view lists or looks objects up in.
+    """
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        return apply_eager_loading(queryset, self.get_serializer_class())
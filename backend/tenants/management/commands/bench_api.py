@@ -0,0 +1,235 @@
+"""
+In-process API load benchmark.
+
+    python manage.py seed_erp --tenants 5
+    python manage.py bench_api --concurrency 8 --requests 500
+
+Requests go through the full Django stack (TenantMiddleware, DRF
+authentication, filters, pagination, serializers) via the test client, as
+the admins of tenants generated by seed_erp. Scenarios are interleaved into
+one mixed workload and spread over a thread or process pool; the report
+gives throughput plus p50/p95/p99 latency and queries per request for each
+scenario. A scenario's throughput counts its requests over its own window,
+from its first request starting to its last one finishing. Write scenarios
+(order creation) add rows to the database.
+"""
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import multiprocessing
+import random
+import statistics
+import threading
+import time
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from authentication.tokens import issue_tokens
+from customers.models import Customer
+from inventory.models import Product
+from sales.models import Invoice
+from tenants.models import Tenant
+
+ORDER_LINES = 50
+
+
+# Scenarios: each issues one request and returns the response
+
+def browse_products(client, fixture, rng):
+    term = rng.choice(['Product 1', 'Product 2', 'Product 3', 'PRO'])
+    return client.get('/api/inventory/products/', {'search': term})
+
+
+def list_orders(client, fixture, rng):
+    return client.get('/api/sales/orders/', {'status': rng.choice(['confirmed', 'delivered']), 'ordering': '-order_date'})
+
+
+def create_order(client, fixture, rng):
+    body = {
+        'customer': str(rng.choice(fixture['customers'])),
+        'order_date': timezone.now().isoformat(),
+        'items': [
+            {'product': str(product), 'quantity': rng.randint(1, 10), 'unit_price': '10.00'}
+            for product in rng.choices(fixture['products'], k=ORDER_LINES)
+        ],
+    }
+    return client.post('/api/sales/orders/', body, content_type='application/json')
+
+
+def download_invoice_pdf(client, fixture, rng):
+    return client.get(f"/api/sales/invoices/{rng.choice(fixture['invoices'])}/download_pdf/")
+
+
+def dashboard_stats(client, fixture, rng):
+    return client.get(rng.choice(['/api/sales/stats/', '/api/inventory/products/stats/', '/api/customers/stats/']))
+
+
+SCENARIOS = {
+    'browse': browse_products,
+    'orders': list_orders,
+    'create_order': create_order,
+    'invoice_pdf': download_invoice_pdf,
+    'dashboard': dashboard_stats,
+}
+
+EXPECTED_STATUS = {'create_order': 201}
+
+
+# Worker side (runs in pool threads or processes)
+
+_worker = threading.local()
+
+
+def _init_process():
+    django.setup()
+    connections.close_all()  # Never share the parent's connection after fork
+
+
+def _host():
+    return next((host.lstrip('.') for host in settings.ALLOWED_HOSTS if '*' not in host), 'localhost')
+
+
+def _fixture(tenant_id):
+    """Ids a tenant's scenarios pick from, loaded once per worker"""
+    fixtures = getattr(_worker, 'fixtures', None)
+    if fixtures is None:
+        fixtures = _worker.fixtures = {}
+    if tenant_id not in fixtures:
+        fixtures[tenant_id] = {
+            'products': list(Product.objects.filter(tenant_id=tenant_id, is_active=True).values_list('pk', flat=True)[:500]),
+            'customers': list(Customer.objects.filter(tenant_id=tenant_id).values_list('pk', flat=True)[:500]),
+            'invoices': list(Invoice.objects.filter(tenant_id=tenant_id).values_list('pk', flat=True)[:500]),
+        }
+    return fixtures[tenant_id]
+
+
+def run_request(task):
+    """Execute one (scenario, tenant, credentials, seed) task; returns a sample dict"""
+    scenario, tenant_id, authorization, seed = task
+    client = Client(raise_request_exception=False, HTTP_AUTHORIZATION=authorization, HTTP_HOST=_host())
+    fixture = _fixture(tenant_id)
+    rng = random.Random(seed)
+
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        # Wall-clock stamps are comparable across worker processes
+        started_at = time.time()
+        start = time.perf_counter()
+        response = SCENARIOS[scenario](client, fixture, rng)
+        elapsed = time.perf_counter() - start
+
+    return {
+        'scenario': scenario,
+        'started_at': started_at,
+        'finished_at': started_at + elapsed,
+        'ms': elapsed * 1000,
+        'queries': queries,
+        'ok': response.status_code == EXPECTED_STATUS.get(scenario, 200),
+    }
+
+
+def summarize(samples):
+    wall_seconds = max(sample['finished_at'] for sample in samples) - min(sample['started_at'] for sample in samples)
+    latencies = sorted(sample['ms'] for sample in samples)
+    cuts = statistics.quantiles(latencies, n=100, method='inclusive') if len(latencies) > 1 else latencies * 99
+    return {
+        'requests': len(samples),
+        'errors': sum(not sample['ok'] for sample in samples),
+        'throughput_rps': round(len(samples) / wall_seconds, 1) if wall_seconds else 0.0,
+        'p50_ms': round(cuts[49], 2),
+        'p95_ms': round(cuts[94], 2),
+        'p99_ms': round(cuts[98], 2),
+        'max_ms': round(latencies[-1], 2),
+        'queries_per_request': round(statistics.mean(sample['queries'] for sample in samples), 1),
+    }
+
+
+class Command(BaseCommand):
+    help = 'Drive a mixed API workload in-process and report latency percentiles'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                            help=f"Comma-separated subset of: {', '.join(SCENARIOS)}")
+        parser.add_argument('--requests', type=int, default=200, help='Requests per scenario')
+        parser.add_argument('--warmup', type=int, default=10, help='Unmeasured requests per scenario')
+        parser.add_argument('--concurrency', type=int, default=4)
+        parser.add_argument('--mode', choices=['thread', 'process'], default='thread')
+        parser.add_argument('--prefix', default='seed', help='Tenant prefix used with seed_erp')
+        parser.add_argument('--token-type', choices=['token', 'jwt'], default='token')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--json', dest='json_path', help='Also write the report to this JSON file')
+
+    def handle(self, *args, **options):
+        scenarios = [name.strip() for name in options['scenarios'].split(',') if name.strip()]
+        unknown = set(scenarios) - set(SCENARIOS)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+        tenants = list(Tenant.objects.filter(slug__startswith=f"{options['prefix']}-").select_related('admin'))
+        if not tenants:
+            raise CommandError(f"No tenants with prefix '{options['prefix']}'; run seed_erp first")
+        if settings.DEBUG:
+            self.stderr.write(self.style.WARNING('DEBUG is on; timings include query logging overhead'))
+
+        credentials = [(tenant.pk, self._authorization(tenant.admin, options['token_type'])) for tenant in tenants]
+        rng = random.Random(options['seed'])
+
+        def tasks(per_scenario):
+            batch = [
+                (scenario, *rng.choice(credentials), rng.getrandbits(32))
+                for scenario in scenarios for _ in range(per_scenario)
+            ]
+            rng.shuffle(batch)
+            return batch
+
+        if options['mode'] == 'process':
+            connections.close_all()
+            pool = ProcessPoolExecutor(options['concurrency'], mp_context=multiprocessing.get_context(),
+                                       initializer=_init_process)
+        else:
+            pool = ThreadPoolExecutor(options['concurrency'])
+
+        with pool:
+            list(pool.map(run_request, tasks(options['warmup'])))
+            samples = list(pool.map(run_request, tasks(options['requests']), chunksize=1))
+
+        report = {
+            'config': {key: options[key] for key in ('requests', 'concurrency', 'mode', 'token_type', 'seed')},
+            'tenants': len(tenants),
+            'total': summarize(samples),
+            'scenarios': {
+                scenario: summarize([sample for sample in samples if sample['scenario'] == scenario])
+                for scenario in scenarios
+            },
+        }
+        self._print(report)
+        if options['json_path']:
+            with open(options['json_path'], 'w') as f:
+                json.dump(report, f, indent=2)
+                f.write('\n')
+
+    def _authorization(self, user, token_type):
+        if token_type == 'jwt':
+            return f"Bearer {issue_tokens(user)['access']}"
+        return f"Token {Token.objects.get_or_create(user=user)[0].key}"
+
+    def _print(self, report):
+        header = f"{'scenario':<14}{'reqs':>7}{'errors':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}"
+        self.stdout.write(header)
+        rows = list(report['scenarios'].items()) + [('total', report['total'])]
+        for name, stats in rows:
+            self.stdout.write(
+                f"{name:<14}{stats['requests']:>7}{stats['errors']:>8}{stats['throughput_rps']:>9}"
+                f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['queries_per_request']:>9}"
+            )
@@ -1,8 +1,8 @@
 from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
 from django.utils.deprecation import MiddlewareMixin
 from django.contrib.auth.models import AnonymousUser
-from .models import Tenant, TenantUser
+from authentication.authentication import resolve_request_token, resolve_request_jwt
+from .cache import get_tenant_context, ResolvedTenantUser
 import logging
 
 logger = logging.getLogger(__name__)
@@ -34,40 +34,21 @@ class TenantMiddleware(MiddlewareMixin):
         tenant = None
         tenant_user = None
         
-        # Try to authenticate user manually if not already authenticated (for API Token auth)
+        # Try to authenticate user manually if not already authenticated (for API Token/JWT auth).
+        # The result is memoized on the request and reused by the DRF authentication classes.
         if not hasattr(request, 'user') or isinstance(request.user, AnonymousUser) or not request.user.is_authenticated:
-            auth_header = request.META.get('HTTP_AUTHORIZATION')
-            if auth_header and auth_header.startswith('Token '):
-                from rest_framework.authtoken.models import Token
-                token_key = auth_header.split(' ')[1]
-                try:
-                    token = Token.objects.select_related('user').get(key=token_key)
-                    request.user = token.user
-                except Token.DoesNotExist:
-                    pass  # Invalid token, keep user as anonymous
+            resolved = resolve_request_token(request) or resolve_request_jwt(request)
+            if resolved is not None:
+                request.user = resolved[0]
         
         # Only resolve tenant if user is authenticated
         if request.user and not isinstance(request.user, AnonymousUser) and request.user.is_authenticated:
             try:
-                # Check if user owns a tenant
-                if hasattr(request.user, 'owned_tenant'):
-                    tenant = request.user.owned_tenant
-                    # Create a pseudo TenantUser object for consistency
-                    class AdminTenantUser:
-                        def __init__(self, user, tenant):
-                            self.user = user
-                            self.tenant = tenant
-                            self.role = 'admin'
-                            self.is_active = True
-                    tenant_user = AdminTenantUser(request.user, tenant)
-                
-                # Check if user is a member of a tenant
-                elif hasattr(request.user, 'tenant_membership'):
-                    tenant_membership = request.user.tenant_membership
-                    if tenant_membership.is_active and tenant_membership.tenant.is_active:
-                        tenant = tenant_membership.tenant
-                        tenant_user = tenant_membership
-                
+                # Never from the token's claims: membership changes and removals must apply at once
+                context = get_tenant_context(request.user.pk)
+                if context.has_tenant:
+                    tenant = context.build_tenant()
+                    tenant_user = ResolvedTenantUser(request.user, tenant, context.role)
             except Exception as e:
                 logger.error(f"Error getting user's tenant: {e}")
         
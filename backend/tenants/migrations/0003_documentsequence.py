@@ -0,0 +1,29 @@
+# Generated by Django 5.0.6 on 2026-10-17 02:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tenants', '0002_alter_tenant_currency'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DocumentSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('next_value', models.BigIntegerField(default=1)),
+                ('format', models.CharField(max_length=100)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('tenant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='document_sequences', to='tenants.tenant')),
+            ],
+            options={
+                'ordering': ['tenant', 'name'],
+                'unique_together': {('tenant', 'name')},
+            },
+        ),
+    ]
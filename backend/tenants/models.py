@@ -104,4 +104,24 @@ class TenantInvitation(models.Model):
         ordering = ['-created_at']
     
     def __str__(self):
-        return f"Invite {self.email} to {self.tenant.name}"
\ No newline at end of file
+        return f"Invite {self.email} to {self.tenant.name}"
+
+
+class DocumentSequence(models.Model):
+    """
+    Per-tenant counter behind generated document numbers (orders, invoices,
+    payments, customer codes). Allocated through tenants.sequences.
+    """
+    tenant = models.ForeignKey(Tenant, on_delete=models.CASCADE, related_name='document_sequences')
+    name = models.CharField(max_length=50)
+    next_value = models.BigIntegerField(default=1)
+    # str.format() pattern; available fields: number, tenant_prefix, year
+    format = models.CharField(max_length=100)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        unique_together = ('tenant', 'name')
+        ordering = ['tenant', 'name']
+    
+    def __str__(self):
+        return f"{self.tenant.name} - {self.name} ({self.next_value})"
@@ -0,0 +1,129 @@
+"""
+List pagination.
+
+PageNumberPagination is the project default: page numbers, with a client
+selectable `page_size` capped at MAX_PAGE_SIZE. It counts the whole result
+and skips rows with OFFSET, so deep pages of large tables get slow.
+
+KeysetPagination is opted into by views over large, append-mostly tables.
+Requests that pass `cursor` (empty for the first page) are paged by
+(created_at, id) instead: each page continues strictly after the last row
+of the previous one using the composite index, so any page costs the same
+and rows inserted meanwhile never shift or repeat entries. Results are
+newest first, overriding any `ordering` parameter, and there is no exact
+count; `estimate_count=true` adds the planner's row estimate on PostgreSQL
+(an exact count elsewhere). Requests without `cursor` keep page numbers.
+"""
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework import pagination
+from rest_framework.exceptions import NotFound
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    page_size_query_param = 'page_size'
+
+    @property
+    def max_page_size(self):
+        return settings.MAX_PAGE_SIZE
+
+
+def estimate_count(queryset):
+    """Planner row estimate on PostgreSQL, an exact count elsewhere"""
+    if connections[queryset.db].vendor == 'postgresql':
+        plan = json.loads(queryset.order_by().explain(format='json'))
+        return plan[0]['Plan']['Plan Rows']
+    return queryset.count()
+
+
+class KeysetPagination(PageNumberPagination):
+    cursor_query_param = 'cursor'
+    count_query_param = 'estimate_count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        position, backwards = self.decode_cursor(request)
+
+        if self.count_query_param in request.query_params and \
+                request.query_params[self.count_query_param].lower() in ('1', 'true'):
+            self.estimated_count = estimate_count(queryset)
+        else:
+            self.estimated_count = None
+
+        if position is not None:
+            created_at, pk = position
+            try:
+                pk = queryset.model._meta.pk.to_python(pk)
+            except ValidationError:
+                raise NotFound(self.invalid_cursor_message)
+            if backwards:
+                queryset = queryset.filter(Q(created_at__gt=created_at) | Q(created_at=created_at, pk__gt=pk))
+            else:
+                queryset = queryset.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, pk__lt=pk))
+        ordering = ('created_at', 'pk') if backwards else ('-created_at', '-pk')
+
+        # One extra row tells whether another page follows
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if backwards:
+            rows.reverse()
+
+        # Walking backwards, the page we came from is newer; walking forwards, older
+        more_newer = has_more if backwards else position is not None
+        more_older = True if backwards else has_more
+        self.next_position = self.row_position(rows[-1]) if rows and more_older else None
+        self.previous_position = self.row_position(rows[0]) if rows and more_newer else None
+        return rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        response = {
+            'next': self.encode_cursor(self.next_position, backwards=False),
+            'previous': self.encode_cursor(self.previous_position, backwards=True),
+        }
+        if self.estimated_count is not None:
+            response['estimated_count'] = self.estimated_count
+        response['results'] = data
+        return Response(response)
+
+    def row_position(self, row):
+        return row.created_at, row.pk
+
+    def encode_cursor(self, position, backwards):
+        if position is None:
+            return None
+        created_at, pk = position
+        token = json.dumps([created_at.isoformat(), str(pk), int(backwards)])
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, base64.urlsafe_b64encode(token.encode()).decode())
+
+    def decode_cursor(self, request):
+        """(position, backwards) of the requested cursor; position is None for the first page"""
+        token = request.query_params[self.cursor_query_param]
+        if not token:
+            return None, False
+        try:
+            created_at, pk, backwards = json.loads(base64.urlsafe_b64decode(token.encode()))
+            created_at = parse_datetime(created_at)
+        except (binascii.Error, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return (created_at, pk), bool(backwards)
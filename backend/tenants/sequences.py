@@ -0,0 +1,134 @@
+"""
+Per-tenant document number allocation.
+
+Numbers come from a DocumentSequence row per (tenant, sequence name) that is
+advanced atomically, so concurrent writers never read the same "last" number.
+Callers that need many numbers at once (imports, batch invoicing) reserve a
+whole block in a single round trip and format numbers locally (hi/lo).
+"""
+from django.apps import apps
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+import re
+
+from .models import DocumentSequence
+
+# name -> (model, number field, default format)
+SEQUENCES = {
+    'sales_order': ('sales.SalesOrder', 'order_number', 'SO-{number:06d}'),
+    'invoice': ('sales.Invoice', 'invoice_number', 'INV-{number:06d}'),
+    'payment': ('sales.Payment', 'payment_number', 'PAY-{number:06d}'),
+    'customer': ('customers.Customer', 'customer_code', 'CUST-{tenant_prefix}-{number:04d}'),
+}
+
+_TRAILING_DIGITS = re.compile(r'(\d+)$')
+
+
+class SequenceBlock:
+    """A reserved, contiguous range of numbers [start, stop) for one sequence"""
+    __slots__ = ('start', 'stop', '_format', '_fields')
+
+    def __init__(self, tenant, start, stop, format):
+        self.start = start
+        self.stop = stop
+        self._format = format
+        self._fields = {'year': timezone.now().year}
+        if '{tenant_prefix' in format:
+            self._fields['tenant_prefix'] = tenant.name[:3].upper()
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self):
+        for number in range(self.start, self.stop):
+            yield self.format(number)
+
+    def format(self, number):
+        return self._format.format(number=number, **self._fields)
+
+
+def _initial_value(tenant, name):
+    """
+    First number for a sequence created after documents already exist:
+    one past the highest numeric suffix in use for this tenant.
+    """
+    model_label, field, _ = SEQUENCES[name]
+    model = apps.get_model(model_label)
+    highest = 0
+    for value in model.objects.filter(tenant=tenant).values_list(field, flat=True).iterator():
+        match = _TRAILING_DIGITS.search(value or '')
+        if match:
+            highest = max(highest, int(match.group(1)))
+    return highest + 1
+
+
+def _ensure_sequence(tenant, name):
+    try:
+        with transaction.atomic():
+            DocumentSequence.objects.create(
+                tenant=tenant,
+                name=name,
+                next_value=_initial_value(tenant, name),
+                format=SEQUENCES[name][2],
+            )
+    except IntegrityError:
+        pass  # Created concurrently
+
+
+def _supports_update_returning():
+    if connection.vendor == 'postgresql':
+        return True
+    if connection.vendor == 'sqlite':
+        return connection.Database.sqlite_version_info >= (3, 35, 0)
+    return False
+
+
+def _advance(tenant, name, count):
+    """Advance the counter by `count`; returns (first value, format) or None"""
+    if _supports_update_returning():
+        table = DocumentSequence._meta.db_table
+        tenant_id = DocumentSequence._meta.get_field('tenant').get_db_prep_value(tenant.pk, connection)
+        updated_at = DocumentSequence._meta.get_field('updated_at').get_db_prep_value(timezone.now(), connection)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET next_value = next_value + %s, updated_at = %s '
+                f'WHERE tenant_id = %s AND name = %s RETURNING next_value, format',
+                [count, updated_at, tenant_id, name],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        return row[0] - count, row[1]
+
+    with transaction.atomic():
+        sequence = DocumentSequence.objects.select_for_update().filter(tenant=tenant, name=name).first()
+        if sequence is None:
+            return None
+        DocumentSequence.objects.filter(pk=sequence.pk).update(next_value=F('next_value') + count)
+        return sequence.next_value, sequence.format
+
+
+def reserve_document_numbers(tenant, name, count):
+    """
+    Atomically reserve `count` consecutive numbers from a tenant's sequence
+    and return them as a SequenceBlock.
+    """
+    if name not in SEQUENCES:
+        raise ValueError(f"Unknown document sequence: {name}")
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    advanced = _advance(tenant, name, count)
+    if advanced is None:
+        _ensure_sequence(tenant, name)
+        advanced = _advance(tenant, name, count)
+
+    start, format = advanced
+    return SequenceBlock(tenant, start, start + count, format)
+
+
+def next_document_number(tenant, name):
+    """Allocate and format a single document number"""
+    block = reserve_document_numbers(tenant, name, 1)
+    return block.format(block.start)
@@ -31,6 +31,7 @@ class TenantUserSerializer(serializers.ModelSerializer):
     class Meta:
         model = TenantUser
         fields = ['id', 'user', 'tenant_name', 'role', 'is_active', 'joined_at']
+        select_related = ['user', 'tenant']
 
 
 class TenantInvitationSerializer(serializers.ModelSerializer):
@@ -0,0 +1,17 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .cache import invalidate_tenant_context
+from .models import Tenant, TenantUser
+
+
+@receiver([post_save, post_delete], sender=Tenant)
+def invalidate_tenant_members(sender, instance, **kwargs):
+    """Any change to an organization invalidates its admin and every member"""
+    member_ids = list(TenantUser.objects.filter(tenant_id=instance.pk).values_list('user_id', flat=True))
+    invalidate_tenant_context(instance.admin_id, *member_ids)
+
+
+@receiver([post_save, post_delete], sender=TenantUser)
+def invalidate_tenant_user(sender, instance, **kwargs):
+    invalidate_tenant_context(instance.user_id)
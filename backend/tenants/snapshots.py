@@ -0,0 +1,78 @@
+"""
+Per-tenant dashboard snapshots.
+
+Dashboard statistics are read far more often than the data behind them
+changes. Each stats endpoint stores its serialized response in the Django
+cache under the tenant, a section name ('sales', 'inventory', 'customers')
+and the request parameters, for DASHBOARD_STATS_CACHE_TTL seconds. Writes
+invalidate a section by bumping its version number, which orphans every
+parameter variant at once; the short TTL bounds staleness for writes that
+bypass signals (queryset.update(), bulk_create()).
+
+A cache outage never fails a request: reads fall back to computing the
+snapshot and failed invalidations are logged.
+"""
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+CACHE_KEY_PREFIX = 'stats'
+
+
+def _version_key(tenant_id, section):
+    return f"{CACHE_KEY_PREFIX}:{tenant_id}:{section}:version"
+
+
+def _snapshot_key(tenant_id, section, version, params):
+    digest = hashlib.md5(json.dumps(params or {}, sort_keys=True, default=str).encode()).hexdigest()
+    return f"{CACHE_KEY_PREFIX}:{tenant_id}:{section}:{version}:{digest}"
+
+
+def get_snapshot(tenant, section, compute, params=None):
+    """
+    Return the cached snapshot for (tenant, section, params), calling
+    `compute()` and storing its result on a miss.
+    """
+    ttl = settings.DASHBOARD_STATS_CACHE_TTL
+    if not ttl:
+        return compute()
+
+    try:
+        version = cache.get(_version_key(tenant.pk, section), 0)
+        key = _snapshot_key(tenant.pk, section, version, params)
+        data = cache.get(key)
+    except Exception as e:
+        logger.warning(f"Dashboard snapshot cache unavailable: {e}")
+        return compute()
+
+    if data is None:
+        data = compute()
+        try:
+            cache.set(key, data, ttl)
+        except Exception as e:
+            logger.warning(f"Dashboard snapshot cache unavailable: {e}")
+    return data
+
+
+def _bump_version(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        # No version yet; create one that outlives the snapshots it guards,
+        # or bump the one a concurrent invalidation created in the meantime
+        if not cache.add(key, 1, None):
+            cache.incr(key)
+
+
+def invalidate_snapshots(tenant_id, *sections):
+    """Drop every cached snapshot of the given sections for a tenant"""
+    for section in sections:
+        try:
+            _bump_version(_version_key(tenant_id, section))
+        except Exception as e:
+            logger.warning(f"Dashboard snapshot cache unavailable: {e}")
@@ -0,0 +1,360 @@
+"""
+Test fixtures and the query-count / latency regression harness.
+
+TenantAPITestCase gives behaviour tests an authenticated tenant owner, a
+small seeded data set and row helpers. Each app's `tests.py` lists the
+endpoints whose query patterns were optimized as Endpoint budgets on a
+QueryBudgetMixin suite. The harness seeds the tenant at a small scale,
+measures every endpoint, grows the data set to QUERY_BUDGET_SCALE rows of
+every entity (hundreds, so any per-row query dwarfs the fixed cost),
+measures again and fails if the query count moved or exceeds the budget. When PERF_BASELINE_PATH is set,
+wall-clock medians at the large scale are merged into that JSON file so
+timing regressions show up as diffs.
+"""
+from datetime import timedelta
+from decimal import Decimal
+import json
+import os
+import statistics
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APITestCase
+
+from customers.models import Customer, CustomerCategory, CustomerContact, CustomerInteraction
+from inventory.models import Category, Product, ProductSupplier, StockMovement, Supplier
+from sales.models import Invoice, InvoiceItem, Payment, SalesOrder, SalesOrderItem, calculate_line_total
+
+from .cache import clear_local_tenant_contexts
+from .models import Tenant, TenantUser
+from .snapshots import invalidate_snapshots
+
+PASSWORD = 'perf-pass-123'
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'perf-tests',
+    }
+}
+
+ITEMS_PER_DOCUMENT = 3
+
+
+class Endpoint:
+    """
+    One request exercised by a QueryBudgetMixin suite. `build(case)` returns
+    the request's pieces as a dict with optional `kwargs` (URL kwargs),
+    `data` (body, or query string for GET) and `headers`; it runs before
+    queries are captured, so it may create whatever rows the call consumes.
+    """
+    __slots__ = ('route', 'budget', 'method', 'status', 'build', 'name')
+
+    def __init__(self, route, budget, method='get', status=200, build=None, name=None):
+        self.route = route
+        self.budget = budget
+        self.method = method
+        self.status = status
+        self.build = build
+        self.name = name
+
+    @property
+    def label(self):
+        label = f"{self.method.upper()} {self.route}"
+        return f"{label} [{self.name}]" if self.name else label
+
+
+# Fixture factories (shared by seed_tenant and endpoint builders)
+
+def make_user(tag):
+    return User.objects.create_user(username=tag, email=f'{tag}@example.com', password=PASSWORD,
+                                    first_name='Perf', last_name=tag)
+
+
+def make_category(tenant, user, n):
+    return Category.objects.create(tenant=tenant, name=f'Category {n}', created_by=user)
+
+
+def make_product(tenant, user, n, category=None):
+    return Product.objects.create(
+        tenant=tenant,
+        name=f'Product {n}',
+        sku=f'SKU-{n:05d}',
+        category=category,
+        cost_price=Decimal('40.00') + n,
+        selling_price=Decimal('55.00') + n,
+        current_stock=(n % 5) * 10,
+        minimum_stock=10,
+        created_by=user,
+    )
+
+
+def make_supplier(tenant, user, n):
+    return Supplier.objects.create(tenant=tenant, name=f'Supplier {n}', email=f'supplier{n}@example.com',
+                                   created_by=user)
+
+
+def make_customer(tenant, user, n, status='active'):
+    return Customer.objects.create(
+        tenant=tenant,
+        name=f'Customer {n}',
+        email=f'customer{n}@example.com',
+        status=status,
+        created_by=user,
+        assigned_to=user,
+    )
+
+
+def make_sales_order(tenant, user, customer, products, status='draft'):
+    order = SalesOrder.objects.create(tenant=tenant, customer=customer, order_date=timezone.now(),
+                                      status=status, created_by=user, assigned_to=user)
+    items = [
+        SalesOrderItem(tenant=tenant, sales_order=order, product=product, quantity=Decimal(i + 1),
+                       unit_price=product.selling_price,
+                       line_total=calculate_line_total(Decimal(i + 1), product.selling_price, Decimal('0')))
+        for i, product in enumerate(products)
+    ]
+    SalesOrderItem.objects.bulk_create(items)
+    order.subtotal = order.total_amount = sum(item.line_total for item in items)
+    order.save(update_fields=['subtotal', 'total_amount'])
+    return order
+
+
+def make_invoice(tenant, user, order, status='sent'):
+    now = timezone.now()
+    invoice = Invoice.objects.create(
+        tenant=tenant, sales_order=order, customer=order.customer, invoice_date=now,
+        due_date=now + timedelta(days=30), status=status, subtotal=order.subtotal,
+        total_amount=order.total_amount, created_by=user,
+    )
+    InvoiceItem.objects.bulk_create([
+        InvoiceItem(tenant=tenant, invoice=invoice, product_id=item.product_id, quantity=item.quantity,
+                    unit_price=item.unit_price, line_total=item.line_total)
+        for item in order.items.all()
+    ])
+    return invoice
+
+
+def make_payment(tenant, user, invoice, amount, status='completed'):
+    return Payment.objects.create(tenant=tenant, invoice=invoice, customer=invoice.customer,
+                                  payment_date=timezone.now(), amount=amount, payment_method='bank_transfer',
+                                  status=status, created_by=user)
+
+
+def seed_tenant(tenant, user, count, offset=0):
+    """
+    Add `count` rows of every entity to a tenant (numbered from `offset` so
+    repeated calls grow the data set): catalog, customers with contacts and
+    follow-ups, orders and invoices with line items, partial payments,
+    stock movements and team members.
+    """
+    products = list(Product.objects.filter(tenant=tenant).order_by('-created_at')[:ITEMS_PER_DOCUMENT])
+    for n in range(offset, offset + count):
+        category = make_category(tenant, user, n)
+        product = make_product(tenant, user, n, category)
+        products = [product] + products[:ITEMS_PER_DOCUMENT - 1]
+        supplier = make_supplier(tenant, user, n)
+        ProductSupplier.objects.create(tenant=tenant, product=product, supplier=supplier,
+                                       supplier_price=product.cost_price, is_primary=True)
+        StockMovement.objects.create(tenant=tenant, product=product, movement_type='purchase', quantity=10,
+                                     previous_stock=0, new_stock=10, created_by=user)
+
+        CustomerCategory.objects.create(tenant=tenant, name=f'Segment {n}', created_by=user)
+        customer = make_customer(tenant, user, n, status=('lead', 'prospect', 'active')[n % 3])
+        CustomerContact.objects.create(customer=customer, name=f'Contact {n}', is_primary=True)
+        CustomerInteraction.objects.create(
+            customer=customer, interaction_type='call', subject=f'Call {n}', description='Follow-up call',
+            interaction_date=timezone.now(), follow_up_required=True,
+            follow_up_date=timezone.now().date() - timedelta(days=1), created_by=user,
+        )
+
+        order = make_sales_order(tenant, user, customer, products, status='confirmed')
+        invoice = make_invoice(tenant, user, order)
+        make_payment(tenant, user, invoice, (invoice.total_amount / 2).quantize(Decimal('0.01')))
+
+        # Members authenticate with tokens; skipping the password hash keeps large seeds fast
+        member = User(username=f'{tenant.slug}-member-{n}', email=f'{tenant.slug}-member-{n}@example.com')
+        member.set_unusable_password()
+        member.save()
+        TenantUser.objects.create(user=member, tenant=tenant, role='employee')
+
+
+_timings = {}
+
+
+def cold_snapshot(section):
+    """Endpoint build step that drops the tenant's cached stats snapshot first"""
+    def build(case):
+        invalidate_snapshots(case.tenant.pk, section)
+        return {}
+    return build
+
+
+def write_baseline(path, results):
+    """Merge per-endpoint results into the JSON baseline at `path`"""
+    baseline = {}
+    if os.path.exists(path):
+        with open(path) as f:
+            baseline = json.load(f)
+    baseline.update(results)
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class TenantAPITestCase(APITestCase):
+    """
+    An authenticated tenant owner with `seed_count` rows of every entity.
+    Set `neighbour` to seed a second tenant the same way, so missing tenant
+    filters show up as extra rows.
+    """
+    seed_count = 1
+    neighbour = False
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = make_user('owner')
+        cls.tenant = Tenant.objects.create(name='Perf Org', email='owner@example.com', admin=cls.user)
+        TenantUser.objects.create(user=cls.user, tenant=cls.tenant, role='admin')
+        seed_tenant(cls.tenant, cls.user, cls.seed_count)
+
+        if cls.neighbour:
+            other_user = make_user('other-owner')
+            other_tenant = Tenant.objects.create(name='Other Org', email='other@example.com', admin=other_user)
+            TenantUser.objects.create(user=other_user, tenant=other_tenant, role='admin')
+            seed_tenant(other_tenant, other_user, cls.seed_count)
+
+    def setUp(self):
+        cache.clear()
+        clear_local_tenant_contexts()
+        self._serial = 1000
+        self.token = Token.objects.get_or_create(user=self.user)[0]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def serial(self):
+        """A number no seeded row uses, for unique names"""
+        self._serial += 1
+        return self._serial
+
+    def first(self, model, **filters):
+        """The tenant's oldest (seeded) row of a model"""
+        return model.objects.filter(tenant=self.tenant, **filters).order_by('created_at', 'pk').first()
+
+    def products(self):
+        return list(Product.objects.filter(tenant=self.tenant).order_by('pk')[:ITEMS_PER_DOCUMENT])
+
+    def fresh_order(self, status='draft'):
+        return make_sales_order(self.tenant, self.user, self.first(Customer), self.products(), status=status)
+
+    def fresh_invoice(self, status='sent'):
+        return make_invoice(self.tenant, self.user, self.fresh_order(status='confirmed'), status=status)
+
+    def member(self):
+        """A seeded non-admin member of the tenant"""
+        return TenantUser.objects.select_related('user').filter(
+            tenant=self.tenant, role='employee'
+        ).order_by('pk').first().user
+
+    def outsider(self):
+        """A fresh user that belongs to no organization"""
+        return make_user(f'outsider-{self.serial()}')
+
+    def user_headers(self, user):
+        """Credentials for another user, used instead of the owner's for one call"""
+        token = Token.objects.get_or_create(user=user)[0]
+        return {'HTTP_AUTHORIZATION': f'Token {token.key}'}
+
+
+class QueryBudgetMixin:
+    """
+    Query budget suite for a TenantAPITestCase; subclasses list their
+    routes in `endpoints`.
+    """
+    endpoints = ()
+    seed_count = 3
+    neighbour = True
+    timing_runs = 5
+
+    @property
+    def large_scale(self):
+        return settings.QUERY_BUDGET_SCALE
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        path = getattr(settings, 'PERF_BASELINE_PATH', '')
+        if path and _timings:
+            write_baseline(path, _timings)
+
+    # Measurement
+
+    def build(self, endpoint):
+        return endpoint.build(self) if endpoint.build else {}
+
+    def call(self, endpoint, spec):
+        url = reverse(endpoint.route, kwargs=spec.get('kwargs'))
+        method = getattr(self.client, endpoint.method)
+        kwargs = {} if endpoint.method == 'get' else {'format': 'json'}
+        headers = spec.get('headers')
+        if headers:
+            self.client.credentials(**headers)
+        try:
+            response = method(url, spec.get('data'), **kwargs)
+            if response.streaming:
+                # Streamed bodies are generated after the view returns; count their queries too
+                response.streamed_content = b''.join(response.streaming_content)
+            return response
+        finally:
+            if headers:
+                self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def capture_queries(self, endpoint):
+        """SQL run by one call, after a warm-up call fills the caches"""
+        self.call(endpoint, self.build(endpoint))
+        spec = self.build(endpoint)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.call(endpoint, spec)
+        self.assertEqual(
+            response.status_code, endpoint.status,
+            f"{endpoint.label} returned {response.status_code}: {getattr(response, 'data', '')}"
+        )
+        return [query['sql'] for query in queries]
+
+    def time_endpoint(self, endpoint):
+        """Median wall-clock milliseconds over `timing_runs` calls"""
+        samples = []
+        for _ in range(self.timing_runs):
+            spec = self.build(endpoint)
+            start = time.perf_counter()
+            self.call(endpoint, spec)
+            samples.append((time.perf_counter() - start) * 1000)
+        return round(statistics.median(samples), 2)
+
+    def test_query_budgets(self):
+        small = {}
+        for endpoint in self.endpoints:
+            with self.subTest(endpoint=endpoint.label, scale=self.seed_count):
+                small[endpoint.label] = self.capture_queries(endpoint)
+                self.assertLessEqual(len(small[endpoint.label]), endpoint.budget, f"{endpoint.label} over budget")
+
+        seed_tenant(self.tenant, self.user, self.large_scale - self.seed_count, offset=self.seed_count)
+
+        for endpoint in self.endpoints:
+            with self.subTest(endpoint=endpoint.label, scale=self.large_scale):
+                queries = self.capture_queries(endpoint)
+                if endpoint.label in small:
+                    self.assertEqual(
+                        len(queries), len(small[endpoint.label]),
+                        f"{endpoint.label} query count grows with data:\n" + '\n'.join(queries)
+                    )
+                self.assertLessEqual(len(queries), endpoint.budget, f"{endpoint.label} over budget")
+                _timings[endpoint.label] = {'queries': len(queries), 'ms': self.time_endpoint(endpoint)}
@@ -1,3 +1,77 @@
-from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from sales.models import Payment
+
+from . import cache as tenant_cache
+from .models import TenantUser
+from .testing import Endpoint, QueryBudgetMixin, TenantAPITestCase, make_payment
+
+
+class TenantQueryBudgetTests(QueryBudgetMixin, TenantAPITestCase):
+    endpoints = [
+        Endpoint('current-tenant', 1),
+        Endpoint('tenant-users', 2),
+    ]
+
+
+class KeysetPaginationTests(TenantAPITestCase):
+    seed_count = 4  # More payments than the capped page
+
+    def walk(self, url, params=None, key='next'):
+        ids, pages = [], 0
+        while url:
+            data = self.client.get(url, params).data
+            ids.extend(payment['id'] for payment in data['results'])
+            url, params, pages = data[key], None, pages + 1
+        return ids, pages
+
+    def newest_first(self):
+        return list(Payment.objects.filter(tenant=self.tenant).order_by('-created_at', '-pk').values_list('pk', flat=True))
+
+    def test_pages_follow_created_at_and_id(self):
+        invoice = self.fresh_invoice()
+        for _ in range(4):
+            make_payment(self.tenant, self.user, invoice, 1)
+        expected = self.newest_first()
+        
+        first = self.client.get(reverse('payment-list'), {'cursor': '', 'page_size': 2}).data
+        self.assertIsNone(first['previous'])
+        # Rows inserted mid-walk are newer than the cursor and shift nothing
+        make_payment(self.tenant, self.user, invoice, 1)
+        ids, pages = self.walk(first['next'])
+        self.assertEqual([payment['id'] for payment in first['results']] + ids, expected)
+        self.assertEqual(pages, (len(expected) - 1) // 2)
+        
+        last = self.client.get(first['next']).data
+        back = self.client.get(last['previous']).data
+        self.assertEqual(back['results'], first['results'])
+
+    def test_page_size_is_capped_and_count_optional(self):
+        with override_settings(MAX_PAGE_SIZE=3):
+            response = self.client.get(reverse('payment-list'), {'cursor': '', 'page_size': 1000, 'estimate_count': 'true'})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertEqual(response.data['estimated_count'], len(self.newest_first()))
+        self.assertNotIn('count', self.client.get(reverse('payment-list'), {'cursor': ''}).data)
+        # Without a cursor the list keeps page numbers
+        self.assertIn('count', self.client.get(reverse('payment-list')).data)
+
+    def test_rejects_invalid_cursors(self):
+        for cursor in ('nonsense', 'WyJ4IiwgIjEiLCAwXQ=='):
+            self.assertEqual(self.client.get(reverse('payment-list'), {'cursor': cursor}).status_code, 404)
+
+
+class TenantContextCacheTests(TenantAPITestCase):
+    def test_other_workers_drop_contexts_after_invalidation(self):
+        member = self.member()
+        key = tenant_cache._cache_key(member.pk)
+        self.assertEqual(tenant_cache.get_tenant_context(member.pk).role, 'employee')
+        stale = tenant_cache._local.get(key)
+
+        TenantUser.objects.filter(user=member).update(is_active=False)
+        tenant_cache.invalidate_tenant_context(member.pk)
+        # Another worker's LRU still holds the entry the signal could not reach
+        tenant_cache._local.set(key, stale)
+
+        self.assertFalse(tenant_cache.get_tenant_context(member.pk).has_tenant)
 
-# Create your tests here.
@@ -8,6 +8,7 @@ from django.views.decorators.csrf import csrf_exempt
 from datetime import timedelta
 from .models import Tenant, TenantUser, TenantInvitation
 from .serializers import TenantSerializer, TenantUserSerializer, TenantInvitationSerializer, CreateTenantSerializer
+from .eager_loading import EagerLoadingMixin
 from .middleware import RequireTenantMixin, TenantQuerySetMixin
 
 
@@ -66,7 +67,7 @@ class TenantDetailView(RequireTenantMixin, generics.RetrieveUpdateDestroyAPIView
         return Tenant.objects.filter(id=self.request.tenant.id)
 
 
-class TenantUserListView(RequireTenantMixin, TenantQuerySetMixin, generics.ListAPIView):
+class TenantUserListView(RequireTenantMixin, TenantQuerySetMixin, EagerLoadingMixin, generics.ListAPIView):
     serializer_class = TenantUserSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -105,6 +105,7 @@ const SalesOrderFormDialog: React.FC<SalesOrderFormDialogProps> = ({
         internal_notes: order.internal_notes || '',
         assigned_to: order.assigned_to,
         items: order.items.map(item => ({
+          id: item.id,
           product: item.product,
           quantity: parseFloat(item.quantity.toString()),
           unit_price: parseFloat(item.unit_price.toString()),
@@ -41,10 +41,11 @@ import {
   Warning as WarningIcon,
   Dashboard as DashboardIcon,
 } from '@mui/icons-material';
-import { salesStatsApi, invoiceApi } from '../services/sales';
+import { salesStatsApi, salesAnalyticsApi, invoiceApi } from '../services/sales';
 import { productApi, stockApi } from '../services/inventory';
 import { customerApi } from '../services/customer';
 import { formatCurrency } from '../utils/currency';
+import { SalesSeriesPoint } from '../types/sales';
 
 interface TabPanelProps {
   children?: React.ReactNode;
@@ -96,14 +97,18 @@ const Reports: React.FC = () => {
         invoicesResponse,
         productsStatsResponse,
         lowStockResponse,
-        customersResponse,
+        customerStatsResponse,
+        dailyResponse,
+        monthlyResponse,
         stockMovementsResponse
       ] = await Promise.all([
         salesStatsApi.get(),
         invoiceApi.list(),
         productApi.stats(),
         productApi.lowStock(),
-        customerApi.list(),
+        customerApi.stats(),
+        salesAnalyticsApi.get({ granularity: 'day' }),
+        salesAnalyticsApi.get({ granularity: 'month' }),
         stockApi.movements()
       ]);
 
@@ -114,7 +119,9 @@ const Reports: React.FC = () => {
       await processRealAnalyticsData(
         invoicesResponse.data.results,
         productsStatsResponse.data,
-        customersResponse.data.results,
+        customerStatsResponse.data.total_customers,
+        dailyResponse.data.series,
+        monthlyResponse.data.series,
         stockMovementsResponse.data.results || []
       );
       
@@ -132,24 +139,20 @@ const Reports: React.FC = () => {
     }
   };
 
-  const processRealAnalyticsData = async (invoices: any[], productStats: any, customers: any[], stockMovements: any[]) => {
-    // Process real revenue data from invoices
-    const last7Days = Array.from({ length: 7 }, (_, i) => {
-      const date = new Date();
-      date.setDate(date.getDate() - (6 - i));
-      return date.toISOString().split('T')[0];
-    });
-
-    const revenueByDay = last7Days.map(date => {
-      const dayInvoices = invoices.filter(invoice => 
-        invoice.invoice_date?.startsWith(date) && invoice.status === 'paid'
-      );
-      return {
-        date: new Date(date).toLocaleDateString(),
-        revenue: dayInvoices.reduce((sum, inv) => sum + (parseFloat(inv.total_amount) || 0), 0),
-        orders: dayInvoices.length,
-      };
-    });
+  const processRealAnalyticsData = async (
+    invoices: any[],
+    productStats: any,
+    totalCustomers: number,
+    dailySeries: SalesSeriesPoint[],
+    monthlySeries: SalesSeriesPoint[],
+    stockMovements: any[]
+  ) => {
+    // Revenue per day from the server-side rollups (last 7 days, tenant timezone)
+    const revenueByDay = dailySeries.slice(-7).map(point => ({
+      date: new Date(`${point.period}T00:00:00`).toLocaleDateString(),
+      revenue: parseFloat(point.revenue) || 0,
+      orders: point.invoice_count,
+    }));
     setRevenueData(revenueByDay);
 
     // Process real sales status data
@@ -184,27 +187,18 @@ const Reports: React.FC = () => {
     ];
     setInventoryData(inventoryByCategory);
 
-    // Process real customer data over time
-    const last6Months = Array.from({ length: 6 }, (_, i) => {
-      const date = new Date();
-      date.setMonth(date.getMonth() - (5 - i));
-      return date;
-    });
-
-    const customerGrowth = last6Months.map(date => {
-      const monthStart = new Date(date.getFullYear(), date.getMonth(), 1).toISOString().split('T')[0];
-      const nextMonth = new Date(date.getFullYear(), date.getMonth() + 1, 1).toISOString().split('T')[0];
-      
-      const newCustomersThisMonth = customers.filter(customer => 
-        customer.created_at >= monthStart && customer.created_at < nextMonth
-      ).length;
-
-      return {
-        month: date.toLocaleDateString('en', { month: 'short' }),
-        new_customers: newCustomersThisMonth,
-        active_customers: customers.length, // Total customers up to this point
-      };
-    });
+    // Customer growth per month from the rollups; totals are walked back from today's count
+    const lastMonths = monthlySeries.slice(-6);
+    let customersAtMonthEnd = totalCustomers;
+    const customerGrowth = lastMonths.map(point => ({
+      month: new Date(`${point.period}T00:00:00`).toLocaleDateString('en', { month: 'short' }),
+      new_customers: point.new_customers,
+      active_customers: 0,
+    }));
+    for (let i = customerGrowth.length - 1; i >= 0; i--) {
+      customerGrowth[i].active_customers = customersAtMonthEnd;
+      customersAtMonthEnd -= customerGrowth[i].new_customers;
+    }
     setCustomerData(customerGrowth);
   };
 
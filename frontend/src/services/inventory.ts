@@ -97,6 +97,20 @@ export const stockApi = {
       `/inventory/stock/movements/?${searchParams.toString()}`
     );
   },
+  exportCsv: (params?: { product?: string; type?: string }) => {
+    const searchParams = new URLSearchParams();
+    if (params) {
+      Object.entries(params).forEach(([key, value]) => {
+        if (value !== undefined) {
+          searchParams.append(key, value.toString());
+        }
+      });
+    }
+    return api.get<Blob>(
+      `/inventory/stock/movements/export/?${searchParams.toString()}`,
+      { responseType: 'blob' }
+    );
+  },
 };
 
 // Suppliers API
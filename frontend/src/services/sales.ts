@@ -11,7 +11,11 @@ import {
   Payment,
   PaymentCreateUpdate,
   PaymentFilters,
-  SalesStats
+  SalesStats,
+  SalesAnalytics,
+  SalesAnalyticsParams,
+  ReceivablesAging,
+  ReceivablesAgingParams
 } from '../types/sales';
 
 export const salesOrderApi = {
@@ -55,6 +59,36 @@ export const salesOrderApi = {
 
   createInvoice: (id: string | number) => 
     api.post<Invoice>(`/sales/orders/${id}/create_invoice/`),
+
+  // Draft invoices for every billable, uninvoiced order matching the filters
+  createInvoices: (filters?: SalesFilters) => {
+    const params = new URLSearchParams();
+    if (filters) {
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '') {
+          params.append(key, value.toString());
+        }
+      });
+    }
+    const queryString = params.toString();
+    return api.post<{ message: string; created: number }>(
+      `/sales/orders/create_invoices/${queryString ? `?${queryString}` : ''}`
+    );
+  },
+
+  // Every row matching the filters as CSV
+  exportCsv: (filters?: SalesFilters) => {
+    const params = new URLSearchParams();
+    if (filters) {
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '' && key !== 'page') {
+          params.append(key, value.toString());
+        }
+      });
+    }
+    const queryString = params.toString();
+    return api.get<Blob>(`/sales/orders/export/${queryString ? `?${queryString}` : ''}`, { responseType: 'blob' });
+  },
 };
 
 export const invoiceApi = {
@@ -98,6 +132,20 @@ export const invoiceApi = {
 
   getPayments: (id: string | number) => 
     api.get<Payment[]>(`/sales/invoices/${id}/payments/`),
+
+  // Every row matching the filters as CSV
+  exportCsv: (filters?: InvoiceFilters) => {
+    const params = new URLSearchParams();
+    if (filters) {
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '' && key !== 'page') {
+          params.append(key, value.toString());
+        }
+      });
+    }
+    const queryString = params.toString();
+    return api.get<Blob>(`/sales/invoices/export/${queryString ? `?${queryString}` : ''}`, { responseType: 'blob' });
+  },
 };
 
 export const paymentApi = {
@@ -135,18 +183,42 @@ export const paymentApi = {
   // Payment Actions
   process: (id: string | number) => 
     api.post<{ message: string }>(`/sales/payments/${id}/process/`),
+
+  // Every row matching the filters as CSV
+  exportCsv: (filters?: PaymentFilters) => {
+    const params = new URLSearchParams();
+    if (filters) {
+      Object.entries(filters).forEach(([key, value]) => {
+        if (value !== undefined && value !== null && value !== '' && key !== 'page') {
+          params.append(key, value.toString());
+        }
+      });
+    }
+    const queryString = params.toString();
+    return api.get<Blob>(`/sales/payments/export/${queryString ? `?${queryString}` : ''}`, { responseType: 'blob' });
+  },
 };
 
 export const salesStatsApi = {
   get: () => api.get<SalesStats>('/sales/stats/'),
 };
 
+export const salesAnalyticsApi = {
+  get: (params?: SalesAnalyticsParams) => api.get<SalesAnalytics>('/sales/analytics/', { params }),
+};
+
+export const receivablesAgingApi = {
+  get: (params?: ReceivablesAgingParams) => api.get<ReceivablesAging>('/sales/aging/', { params }),
+};
+
 // Default export for convenience
 const salesApi = {
   orders: salesOrderApi,
   invoices: invoiceApi,
   payments: paymentApi,
   stats: salesStatsApi,
+  analytics: salesAnalyticsApi,
+  aging: receivablesAgingApi,
 };
 
 export default salesApi;
\ No newline at end of file
@@ -59,7 +59,8 @@ export interface SalesOrderCreateUpdate {
   notes?: string;
   internal_notes?: string;
   assigned_to?: number;
-  items: Omit<SalesOrderItem, 'id' | 'product_name' | 'product_sku' | 'line_total'>[];
+  // Lines keep their id so unchanged lines are left as they are
+  items: Omit<SalesOrderItem, 'product_name' | 'product_sku' | 'line_total'>[];
 }
 
 export interface InvoiceItem {
@@ -174,6 +175,61 @@ export interface SalesStats {
   recent_invoices: InvoiceListItem[];
 }
 
+export type AnalyticsGranularity = 'day' | 'week' | 'month';
+
+export interface SalesSeriesPoint {
+  period: string;
+  revenue: string;
+  invoice_count: number;
+  paid_amount: string;
+  new_customers: number;
+}
+
+export interface SalesAnalytics {
+  granularity: AnalyticsGranularity;
+  timezone: string;
+  start_date: string;
+  end_date: string;
+  series: SalesSeriesPoint[];
+}
+
+export interface SalesAnalyticsParams {
+  granularity?: AnalyticsGranularity;
+  start_date?: string;
+  end_date?: string;
+}
+
+export interface AgingBuckets {
+  current: string;
+  days_1_30: string;
+  days_31_60: string;
+  days_61_90: string;
+  days_over_90: string;
+  total: string;
+  invoice_count: number;
+}
+
+export interface CustomerAging extends AgingBuckets {
+  customer: string;
+  customer_name: string;
+}
+
+export interface ReceivablesAging {
+  as_of: string;
+  timezone: string;
+  totals: AgingBuckets;
+  count: number;
+  next: string | null;
+  previous: string | null;
+  results: CustomerAging[];
+}
+
+export interface ReceivablesAgingParams {
+  as_of?: string;
+  page?: number;
+  page_size?: number;
+}
+
 export interface SalesFilters {
   status?: string;
   priority?: string;
@@ -193,8 +249,11 @@ export interface InvoiceFilters {
   invoice_date_to?: string;
   due_date_from?: string;
   due_date_to?: string;
+  balance_due_min?: number;
+  balance_due_max?: number;
   overdue?: boolean;
   search?: string;
+  ordering?: string;
 }
 
 export interface PaymentFilters {